@@ -0,0 +1,66 @@
+# Copyright(C) 2026 woob project
+#
+# This file is part of woob.
+#
+# woob is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# woob is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with woob. If not, see <http://www.gnu.org/licenses/>.
+
+from threading import RLock
+
+from woob.applications.bill.bill import AppBill
+from woob.capabilities.bill import Document
+from woob.core.woob import WoobBase
+
+
+class FakeBackend:
+    name = "fake"
+    NAME = "fake"
+
+    def __init__(self):
+        self.lock = RLock()
+
+    def __enter__(self):
+        self.lock.acquire()
+
+    def __exit__(self, t, v, tb):
+        self.lock.release()
+
+    def download_document_stream(self, document):
+        for i in range(10):
+            yield b"%d" % i
+
+
+def test_download_ignores_count(tmp_path, monkeypatch):
+    """Count given by user applies to results, not to chunks of a downloaded file."""
+    # do not fetch repositories
+    monkeypatch.setattr("woob.tools.application.base.Woob", WoobBase)
+    monkeypatch.setattr("woob.tools.application.captcha.Woob", WoobBase)
+    monkeypatch.setattr(AppBill, "CONFDIR", str(tmp_path))
+    monkeypatch.chdir(tmp_path)
+
+    app = AppBill()
+    app.options, _ = app._parser.parse_args(["bill", "-n", "3"])
+    # what ReplApplication._handle_options() does, without loading backends
+    app.set_formatter(app.DEFAULT_FORMATTER)
+    app.selected_fields = ["$direct"]
+    app._is_default_count = False
+
+    backend = FakeBackend()
+    document = Document("doc")
+    document.backend = backend
+    document.format = "pdf"
+
+    assert app.download_doc(document, force_pdf=False)
+    assert (tmp_path / "doc.pdf").read_bytes() == b"0123456789"
+    app.woob.executor.shutdown()
+    app.captcha_woob.executor.shutdown()
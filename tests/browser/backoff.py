@@ -0,0 +1,170 @@
+import time
+from threading import Timer
+
+import pytest
+import requests
+import responses
+
+from woob.browser import URL, Browser, PagesBrowser
+from woob.browser.backoff import RetryBudget, RetryPolicy, use_retry_budget
+from woob.browser.exceptions import BrowserInterrupted, ServerError
+from woob.browser.interrupt import CallInterruption, use_interruption
+from woob.core.bcall import BackendsCall, CallErrors
+
+
+class RetryBrowser(PagesBrowser):
+    BASEURL = "https://example.org"
+    RETRY_POLICY = RetryPolicy(max_retries=2, backoff_factor=0.01)
+
+    no_retry = URL("/fragile", retry=False)
+
+
+def add_failures(url, *statuses, method=responses.GET, headers=None):
+    for status in statuses:
+        responses.add(method, url, status=status, headers=headers)
+    responses.add(method, url, body="ok")
+
+
+@responses.activate
+def test_retry_transient_errors():
+    add_failures("https://example.org/", 503, 502)
+
+    assert RetryBrowser().open("/").text == "ok"
+    assert len(responses.calls) == 3
+
+
+@responses.activate
+def test_retry_max_retries():
+    add_failures("https://example.org/", 503, 503, 503)
+
+    with pytest.raises(ServerError):
+        RetryBrowser().open("/")
+    assert len(responses.calls) == 3
+
+
+@responses.activate
+def test_retry_disabled():
+    add_failures("https://example.org/fragile", 503, 503)
+
+    browser = RetryBrowser()
+    with pytest.raises(ServerError):
+        browser.no_retry.open()
+    with pytest.raises(ServerError):
+        Browser().open("https://example.org/fragile")
+
+    assert browser.open("/fragile").text == "ok"
+
+
+@responses.activate
+def test_retry_idempotency():
+    add_failures("https://example.org/form", 503, method=responses.POST)
+
+    with pytest.raises(ServerError):
+        RetryBrowser().open("/form", data={"a": "b"})
+
+    responses.reset()
+    # the server did not process a rate-limited request
+    add_failures("https://example.org/form", 429, method=responses.POST)
+    assert RetryBrowser().open("/form", data={"a": "b"}).text == "ok"
+
+
+@responses.activate
+def test_retry_connection_error():
+    responses.add(responses.GET, "https://example.org/", body=requests.exceptions.ConnectionError("reset"))
+    responses.add(responses.GET, "https://example.org/", body="ok")
+
+    assert RetryBrowser().open("/").text == "ok"
+
+
+def test_retry_after():
+    policy = RetryPolicy(max_retry_after=60)
+    request = requests.Request("GET", "https://example.org/").prepare()
+
+    response = requests.Response()
+    response.request = request
+    response.status_code = 503
+    response.headers["Retry-After"] = "12"
+    assert policy.get_delay(request, 0, response=response) == 12
+
+    response.headers["Retry-After"] = "Thu, 01 Jan 1970 00:00:00 GMT"
+    assert policy.get_delay(request, 0, response=response) == 0
+
+    # too long, give up
+    response.headers["Retry-After"] = "3600"
+    assert policy.get_delay(request, 0, response=response) is None
+
+    del response.headers["Retry-After"]
+    for attempt in range(3):
+        assert 0 <= policy.get_delay(request, attempt, response=response) <= policy.backoff_factor * 2**attempt
+    assert policy.get_delay(request, 3, response=response) is None
+
+
+@responses.activate
+def test_retry_budget():
+    add_failures("https://example.org/", 503, 503)
+
+    with use_retry_budget(RetryBudget(1)):
+        with pytest.raises(ServerError):
+            RetryBrowser().open("/")
+    assert len(responses.calls) == 2
+
+
+class FakeBackend:
+    name = "fake"
+
+    def __init__(self, browser):
+        self.browser = browser
+
+    def __enter__(self):
+        pass
+
+    def __exit__(self, *args):
+        pass
+
+    def iter_pages(self):
+        for _ in range(3):
+            yield self.browser.open("/").text
+
+
+@responses.activate
+def test_backends_call_retry_budget():
+    add_failures("https://example.org/", 503, 503)
+
+    backend = FakeBackend(RetryBrowser())
+    # the budget is shared by every request of the call
+    call = BackendsCall([backend], "iter_pages", retry_budget=1)
+    with pytest.raises(CallErrors) as exc_info:
+        list(call)
+
+    [(_, error, _)] = exc_info.value.errors
+    assert isinstance(error, ServerError)
+    assert len(responses.calls) == 2
+
+
+class SlowRetryBrowser(Browser):
+    RETRY_POLICY = RetryPolicy(max_retries=2, backoff_factor=30, max_backoff=30)
+
+
+@responses.activate
+def test_retry_interrupted():
+    add_failures("https://example.org/", 503, 503)
+
+    interruption = CallInterruption()
+    Timer(0.05, interruption.interrupt).start()
+    start = time.monotonic()
+    with use_interruption(interruption), pytest.raises(BrowserInterrupted):
+        # a retry is waited for up to 30s
+        SlowRetryBrowser().open("https://example.org/")
+    assert time.monotonic() - start < 5
+    assert len(responses.calls) == 1
+
+
+@responses.activate
+def test_retry_after_deadline():
+    add_failures("https://example.org/", 503, headers={"Retry-After": "100"})
+
+    start = time.monotonic()
+    with use_interruption(CallInterruption(deadline=start + 0.05)), pytest.raises(BrowserInterrupted):
+        RetryBrowser().open("https://example.org/")
+    assert time.monotonic() - start < 5
+    assert len(responses.calls) == 1
@@ -0,0 +1,144 @@
+import time
+
+import pytest
+import requests
+import responses
+
+from woob.browser import Browser
+from woob.browser.breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, breakers
+from woob.browser.exceptions import CircuitOpen, ClientError, ServerError
+from woob.core.bcall import BackendsCall, CallErrors
+from woob.core.woob import WoobBase
+from woob.tools.backend import Module
+
+
+@pytest.fixture(autouse=True)
+def clear_breakers():
+    breakers.clear()
+    yield
+    breakers.clear()
+
+
+class BreakerBrowser(Browser):
+    CIRCUIT_BREAKER_THRESHOLD = 2
+    CIRCUIT_BREAKER_COOLDOWN = 0.1
+
+
+BreakerBrowser.__module__ = "woob_modules.fakebank.browser"
+
+
+def test_circuit_breaker():
+    breaker = CircuitBreaker(("fakebank", "example.org"), threshold=2, cooldown=0.1)
+    breaker.record_failure()
+    breaker.before_request()
+    breaker.record_failure()
+    assert breaker.state == OPEN
+
+    with pytest.raises(CircuitOpen) as exc_info:
+        breaker.before_request()
+    assert exc_info.value.key == ("fakebank", "example.org")
+    assert exc_info.value.retry_at == breaker.retry_at
+
+    time.sleep(0.1)
+    assert breaker.state == HALF_OPEN
+    # only one probe at a time
+    breaker.before_request()
+    with pytest.raises(CircuitOpen):
+        breaker.before_request()
+
+    # failed probe reopens the circuit
+    breaker.record_failure()
+    assert breaker.state == OPEN
+
+    time.sleep(0.1)
+    breaker.before_request()
+    breaker.record_success()
+    assert breaker.state == CLOSED
+    breaker.before_request()
+
+
+@responses.activate
+def test_browser_circuit_breaker():
+    responses.add(responses.GET, "https://example.org/", status=503)
+    responses.add(responses.GET, "https://example.org/", body=requests.exceptions.ConnectTimeout("timeout"))
+    responses.add(responses.GET, "https://example.org/", body="ok")
+
+    browser = BreakerBrowser()
+    with pytest.raises(ServerError):
+        browser.open("https://example.org/")
+    with pytest.raises(requests.exceptions.ConnectTimeout):
+        browser.open("https://example.org/")
+
+    # every browser of the module fails fast
+    with pytest.raises(CircuitOpen):
+        BreakerBrowser().open("https://example.org/")
+    assert len(responses.calls) == 2
+    assert breakers.get_states("fakebank") == {("fakebank", "example.org"): OPEN}
+    assert breakers.is_open("fakebank")
+
+    # other sites are not affected
+    responses.add(responses.GET, "https://example.com/", status=403)
+    with pytest.raises(ClientError):
+        browser.open("https://example.com/")
+
+    time.sleep(0.1)
+    assert browser.open("https://example.org/").text == "ok"
+    assert not breakers.is_open("fakebank")
+
+
+def test_no_circuit_breaker_by_default():
+    request = requests.Request("GET", "https://example.org/").prepare()
+    assert Browser().get_circuit_breaker(request) is None
+
+
+class FakeBackend:
+    NAME = "fakebank"
+
+    def __enter__(self):
+        pass
+
+    def __exit__(self, *args):
+        pass
+
+    def get_value(self):
+        return 42
+
+
+def test_backends_call_skip_open_circuits():
+    breaker = breakers.get("fakebank", "example.org", threshold=1)
+    breaker.record_failure()
+
+    backend = FakeBackend()
+    assert list(BackendsCall([backend], "get_value")) == [42]
+
+    with pytest.raises(CallErrors) as exc_info:
+        list(BackendsCall([backend], "get_value", skip_open_circuits=True))
+    [(error_backend, error, _)] = exc_info.value.errors
+    assert error_backend is backend
+    assert isinstance(error, CircuitOpen)
+
+
+class OtherModule(Module):
+    NAME = "othermodule"
+    BROWSER = BreakerBrowser
+
+
+@responses.activate
+def test_skip_open_circuits_of_browser_of_other_module():
+    responses.add(responses.GET, "https://example.org/", status=503)
+
+    woob = WoobBase()
+    backend = OtherModule(woob, "other")
+    for _ in range(2):
+        with pytest.raises(ServerError):
+            backend.browser.open("https://example.org/")
+
+    # the circuit is keyed by the module using the browser
+    assert breakers.is_open("othermodule")
+    assert not breakers.is_open("fakebank")
+
+    with pytest.raises(CallErrors) as exc_info:
+        list(BackendsCall([backend], lambda backend: 42, skip_open_circuits=True))
+    [(_, error, _)] = exc_info.value.errors
+    assert isinstance(error, CircuitOpen)
+    woob.executor.shutdown()
@@ -0,0 +1,231 @@
+import pytest
+import requests
+import responses
+
+from woob.browser import PagesBrowser
+from woob.browser.cache import CacheEntry, CacheMixin, DirectoryStore, MemoryStore, SQLiteStore, open_cache_store
+
+
+def make_entry(content, url="https://example.org/", stored_at=None):
+    response = requests.Response()
+    response._content = content
+    response.url = url
+    response.status_code = 200
+    response.reason = "OK"
+    response.encoding = "utf-8"
+    response.headers["ETag"] = '"%s"' % len(content)
+    return CacheEntry(response, stored_at=stored_at)
+
+
+@pytest.fixture(params=["memory", "sqlite", "directory"])
+def make_store(request, tmp_path):
+    def make_store(**kwargs):
+        if request.param == "memory":
+            return MemoryStore(**kwargs)
+        if request.param == "sqlite":
+            return SQLiteStore(str(tmp_path / "cache.sqlite"), **kwargs)
+        return DirectoryStore(str(tmp_path / "cache"), **kwargs)
+
+    return make_store
+
+
+def test_store(make_store):
+    store = make_store()
+    assert store.get("a") is None
+
+    store["a"] = make_entry(b"foo")
+    entry = store["a"]
+    assert entry.response.content == b"foo"
+    assert entry.response.text == "foo"
+    assert entry.etag == '"3"'
+    assert "a" in store
+    assert len(store) == 1
+
+    del store["a"]
+    assert "a" not in store
+    with pytest.raises(KeyError):
+        store["a"]
+
+
+def test_store_max_size(make_store):
+    entry_size = make_entry(b"x" * 100).size
+    store = make_store(max_size=entry_size * 2)
+
+    store["a"] = make_entry(b"a" * 100)
+    store["b"] = make_entry(b"b" * 100)
+    # "a" is now the most recently used
+    assert store["a"].response.content == b"a" * 100
+    store["c"] = make_entry(b"c" * 100)
+
+    assert "a" in store
+    assert "b" not in store
+    assert "c" in store
+
+
+def test_store_ttl(make_store):
+    store = make_store(ttl=60)
+    store["old"] = make_entry(b"foo", stored_at=0)
+    store["new"] = make_entry(b"bar")
+
+    assert "old" not in store
+    assert "new" in store
+
+
+def test_directory_store_shares_contents(tmp_path):
+    store = DirectoryStore(str(tmp_path))
+    store["a"] = make_entry(b"same")
+    store["b"] = make_entry(b"same", url="https://example.org/other")
+    assert len(list((tmp_path / "objects").glob("*/*"))) == 1
+
+    del store["a"]
+    assert store["b"].response.content == b"same"
+
+    store.clear()
+    assert len(store) == 0
+    assert not list((tmp_path / "objects").glob("*/*"))
+
+
+def test_directory_store_evicts_without_scanning(tmp_path, monkeypatch):
+    entry_size = make_entry(b"x" * 100).size
+    store = DirectoryStore(str(tmp_path), max_size=entry_size * 3)
+    scans = []
+    iter_entries = store._iter_entries
+    monkeypatch.setattr(store, "_iter_entries", lambda: scans.append(1) or iter_entries())
+
+    for key in "abc":
+        store[key] = make_entry(key.encode() * 100)
+    # replacing an entry does not change the size
+    store["a"] = make_entry(b"A" * 100)
+    assert len(scans) == 1
+    assert store.size == entry_size * 3
+
+    store["d"] = make_entry(b"d" * 100)
+    assert len(store) == 3
+    assert "b" not in store
+    assert store.size == entry_size * 3
+
+
+def test_open_cache_store(tmp_path):
+    assert isinstance(open_cache_store("memory"), MemoryStore)
+    assert isinstance(open_cache_store("sqlite:%s" % (tmp_path / "db")), SQLiteStore)
+    store = open_cache_store("directory:%s" % tmp_path, max_size=10, ttl=60)
+    assert isinstance(store, DirectoryStore)
+    assert (store.max_size, store.ttl) == (10, 60)
+
+    with pytest.raises(ValueError):
+        open_cache_store("sqlite")
+    with pytest.raises(ValueError):
+        open_cache_store("foo:bar")
+
+
+class CacheBrowser(CacheMixin, PagesBrowser):
+    BASEURL = "https://example.org"
+
+    open = CacheMixin.open_with_cache
+
+
+@responses.activate
+def test_revalidation_persisted(tmp_path):
+    def callback(request):
+        if request.headers.get("If-None-Match") == '"v1"':
+            return (304, {}, "")
+        return (200, {"ETag": '"v1"'}, "content")
+
+    responses.add_callback(responses.GET, "https://example.org/page", callback=callback)
+
+    path = str(tmp_path / "cache.sqlite")
+    browser = CacheBrowser(cache_store=SQLiteStore(path))
+    assert browser.open("/page").text == "content"
+
+    # a new run with the same store revalidates the stored response
+    browser = CacheBrowser(cache_store=SQLiteStore(path))
+    response = browser.location("/page")
+    assert response.text == "content"
+    assert response.page is None
+    assert len(responses.calls) == 2
+    assert responses.calls[1].request.headers["If-None-Match"] == '"v1"'
+
+
+@responses.activate
+def test_shared_store_namespaces(tmp_path):
+    responses.add(responses.GET, "https://example.org/account", body="user1", headers={"Cache-Control": "max-age=60"})
+    responses.add(responses.GET, "https://example.org/account", body="user2", headers={"Cache-Control": "max-age=60"})
+
+    path = str(tmp_path / "cache.sqlite")
+    browser1 = CacheBrowser(cache_store=SQLiteStore(path), cache_namespace="backend1")
+    browser2 = CacheBrowser(cache_store=SQLiteStore(path), cache_namespace="backend2")
+
+    assert browser1.open("/account").text == "user1"
+    assert browser2.open("/account").text == "user2"
+    assert browser1.open("/account").text == "user1"
+    assert len(responses.calls) == 2
+
+
+@responses.activate
+def test_fresh_response():
+    responses.add(responses.GET, "https://example.org/fresh", body="fresh", headers={"Cache-Control": "max-age=60"})
+    responses.add(responses.GET, "https://example.org/stale", body="stale", headers={"Cache-Control": "max-age=0"})
+    responses.add(
+        responses.GET,
+        "https://example.org/expired",
+        body="expired",
+        headers={"Expires": "Thu, 01 Jan 1970 00:00:00 GMT"},
+    )
+
+    browser = CacheBrowser()
+    for _ in range(2):
+        assert browser.open("/fresh").text == "fresh"
+        assert browser.open("/stale").text == "stale"
+        assert browser.open("/expired").text == "expired"
+
+    # the fresh response is returned without any request
+    assert [call.request.url for call in responses.calls].count("https://example.org/fresh") == 1
+    assert len(responses.calls) == 5
+    assert browser.cache_stats == {"hits": 1, "misses": 5}
+
+
+@responses.activate
+def test_no_store():
+    responses.add(
+        responses.GET, "https://example.org/", body="private", headers={"Cache-Control": "no-store", "ETag": '"1"'}
+    )
+
+    browser = CacheBrowser()
+    browser.open("/")
+    assert len(browser.cache) == 0
+
+
+@responses.activate
+def test_revalidation_updates_freshness():
+    def callback(request):
+        if request.headers.get("If-None-Match") == '"v1"':
+            return (304, {"Cache-Control": "max-age=60"}, "")
+        return (200, {"ETag": '"v1"', "Cache-Control": "max-age=0"}, "content")
+
+    responses.add_callback(responses.GET, "https://example.org/", callback=callback)
+
+    browser = CacheBrowser()
+    for _ in range(3):
+        assert browser.open("/").text == "content"
+
+    assert len(responses.calls) == 2
+    assert browser.cache_stats == {"misses": 1, "revalidations": 1, "hits": 1}
+
+
+@responses.activate
+def test_vary():
+    responses.add(
+        responses.GET,
+        "https://example.org/",
+        body="content",
+        headers={"Cache-Control": "max-age=60", "Vary": "Accept-Language"},
+    )
+
+    browser = CacheBrowser()
+    browser.open("/", headers={"Accept-Language": "fr", "Referer": "https://example.org/a"})
+    # Referer is not part of the key
+    browser.open("/", headers={"Accept-Language": "fr", "Referer": "https://example.org/b"})
+    assert len(responses.calls) == 1
+
+    browser.open("/", headers={"Accept-Language": "en"})
+    assert len(responses.calls) == 2
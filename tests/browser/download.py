@@ -0,0 +1,93 @@
+from hashlib import sha256
+
+import pytest
+import responses
+
+from woob.browser import URL, Browser, PagesBrowser
+from woob.browser.exceptions import DownloadError
+from woob.browser.pages import RawPage
+
+
+CONTENT = b"0123456789" * 1000
+
+
+def serve_ranges(request):
+    range_header = request.headers.get("Range")
+    if not range_header:
+        return (200, {"Content-Length": str(len(CONTENT))}, CONTENT)
+
+    start = int(range_header[len("bytes=") : -1])
+    if start >= len(CONTENT):
+        return (416, {}, b"")
+    headers = {"Content-Range": "bytes %d-%d/%d" % (start, len(CONTENT) - 1, len(CONTENT))}
+    return (206, headers, CONTENT[start:])
+
+
+@responses.activate
+def test_download(tmp_path):
+    responses.add_callback(responses.GET, "https://example.org/file", callback=serve_ranges)
+    dest = tmp_path / "file"
+
+    checksum = "sha256:%s" % sha256(CONTENT).hexdigest()
+    assert Browser().download("https://example.org/file", dest, checksum=checksum, chunk_size=1000) == str(dest)
+    assert dest.read_bytes() == CONTENT
+    assert not (tmp_path / "file.part").exists()
+
+
+@responses.activate
+def test_download_resume(tmp_path):
+    responses.add_callback(responses.GET, "https://example.org/file", callback=serve_ranges)
+    dest = tmp_path / "file"
+    (tmp_path / "file.part").write_bytes(CONTENT[:3000])
+
+    Browser().download("https://example.org/file", dest, size=len(CONTENT))
+    assert responses.calls[0].request.headers["Range"] == "bytes=3000-"
+    assert dest.read_bytes() == CONTENT
+
+
+@responses.activate
+def test_download_resume_unsupported(tmp_path):
+    responses.add(responses.GET, "https://example.org/file", body=CONTENT)
+    dest = tmp_path / "file"
+    (tmp_path / "file.part").write_bytes(b"garbage")
+
+    # the server ignores the range and sends the whole file
+    Browser().download("https://example.org/file", dest)
+    assert dest.read_bytes() == CONTENT
+
+
+@responses.activate
+def test_download_verification(tmp_path):
+    responses.add_callback(responses.GET, "https://example.org/file", callback=serve_ranges)
+    dest = tmp_path / "file"
+
+    with pytest.raises(DownloadError):
+        Browser().download("https://example.org/file", dest, checksum="sha256:%s" % ("0" * 64))
+    with pytest.raises(DownloadError):
+        Browser().download("https://example.org/file", dest, size=10)
+
+    assert not dest.exists()
+    assert not (tmp_path / "file.part").exists()
+
+    with pytest.raises(ValueError):
+        Browser().download("https://example.org/file", dest, checksum="foo:bar")
+
+
+class FilePage(RawPage):
+    def __init__(self, *args, **kwargs):
+        raise AssertionError("the file must not be loaded in a page")
+
+
+class FileBrowser(PagesBrowser):
+    BASEURL = "https://example.org"
+
+    file = URL("/file", FilePage)
+
+
+@responses.activate
+def test_download_pages_browser(tmp_path):
+    responses.add_callback(responses.GET, "https://example.org/file", callback=serve_ranges)
+    dest = tmp_path / "file"
+
+    FileBrowser().download("/file", dest)
+    assert dest.read_bytes() == CONTENT
@@ -15,12 +15,18 @@
 # You should have received a copy of the GNU Lesser General Public License
 # along with woob. If not, see <http://www.gnu.org/licenses/>.
 
+import re
+import time
 from unittest import TestCase
 
-from woob.browser.elements import DictElement, ItemElement, method
+import responses
+
+from woob.browser import URL, PagesBrowser
+from woob.browser.elements import DictElement, ItemElement, ListElement, TableElement, method
+from woob.browser.filters.html import CSS, Link, TableCell
 from woob.browser.filters.json import Dict
 from woob.browser.filters.standard import CleanText, Eval
-from woob.browser.pages import JsonPage
+from woob.browser.pages import HTMLPage, JsonPage, pagination
 from woob.capabilities.base import BaseObject, StringField
 from woob.tools.json import json
 
@@ -155,3 +161,251 @@ class iter_other_objects(DictElement):
 
         objects = list(page.iter_other_objects())
         assert len(objects) == 0
+
+    def test_loaders_prefetch_depth(self):
+        """Loaders of next items are scheduled ahead of the parsed item."""
+
+        class MyResponse:
+            pass
+
+        response = MyResponse()
+        response.url = "https://example.org/objects"
+        response.headers = {
+            "content-type": "application/json; charset=utf-8",
+        }
+        response.text = json.dumps({"objects": [{"id": "1"}, {"id": "2"}, {"id": "3"}]})
+
+        class MyBrowser:
+            PREFETCH_DEPTH = None
+
+        browser = MyBrowser()
+        browser.logger = None
+        events = []
+
+        class MyPage(JsonPage):
+            @method
+            class iter_objects(DictElement):
+                item_xpath = "objects"
+
+                class item(ItemElement):
+                    klass = BaseObject
+
+                    obj_id = Dict("id")
+
+                    def load_details(self):
+                        events.append("load %s" % self.el["id"])
+
+                    def parse(self, el):
+                        events.append("parse %s" % el["id"])
+
+        page = MyPage(browser, response)
+        assert len(list(page.iter_objects())) == 3
+        assert events == ["load 1", "load 2", "load 3", "parse 1", "parse 2", "parse 3"]
+
+        events.clear()
+        browser.PREFETCH_DEPTH = 1
+        assert len(list(page.iter_objects())) == 3
+        assert events == ["load 1", "load 2", "parse 1", "load 3", "parse 2", "parse 3"]
+
+    @responses.activate
+    def test_pagination_prefetch(self):
+        """Next pages are requested while items of the current page are parsed."""
+
+        for num in range(1, 5):
+            next_link = '<a href="/list?page=%d">next</a>' % (num + 1) if num < 4 else ""
+            responses.add(
+                responses.GET,
+                "https://example.org/list?page=%d" % num,
+                body="<html><ul><li>%d-1</li><li>%d-2</li></ul>%s</html>" % (num, num, next_link),
+                content_type="text/html",
+            )
+
+        class ListPage(HTMLPage):
+            @pagination
+            @method
+            class iter_values(ListElement):
+                item_xpath = "//li"
+                next_page = Link("//a")
+
+                class item(ItemElement):
+                    klass = BaseObject
+
+                    obj_id = CleanText(".")
+
+        class MyBrowser(PagesBrowser):
+            BASEURL = "https://example.org"
+            PAGINATION_PREFETCH = 2
+
+            list = URL(r"/list\?page=(?P<num>\d+)", ListPage)
+
+        browser = MyBrowser()
+        browser.list.go(num=1)
+
+        ids = []
+        for obj in browser.page.iter_values():
+            if not ids:
+                # pages 2 and 3 are requested ahead
+                for _ in range(100):
+                    if len(responses.calls) == 3:
+                        break
+                    time.sleep(0.01)
+                assert len(responses.calls) == 3
+            ids.append(obj.id)
+
+        assert ids == ["1-1", "1-2", "2-1", "2-2", "3-1", "3-2", "4-1", "4-2"]
+        # every page is requested only once
+        assert len(responses.calls) == 4
+        assert browser.url == "https://example.org/list?page=4"
+
+    def test_css_selectors(self):
+        """CSS selectors can be used to find items and table headers."""
+
+        class MyResponse:
+            pass
+
+        response = MyResponse()
+        response.url = "https://example.org/history"
+        response.headers = {"content-type": "text/html"}
+        response.encoding = "utf-8"
+        response.content = b"""
+            <table class="history">
+                <thead><tr><th>Date</th><th>Label</th></tr></thead>
+                <tbody>
+                    <tr class="row"><td>01/01</td><td>foo</td></tr>
+                    <tr class="row"><td>02/01</td><td>bar</td></tr>
+                </tbody>
+            </table>
+        """
+
+        class MyBrowser:
+            pass
+
+        browser = MyBrowser()
+        browser.logger = None
+
+        class MyPage(HTMLPage):
+            @method
+            class iter_rows(TableElement):
+                head_xpath = CSS("table.history th")
+                item_xpath = CSS("table.history tr.row")
+
+                col_label = "Label"
+
+                class item(ItemElement):
+                    klass = BaseObject
+
+                    obj_id = CleanText(TableCell("label"))
+
+            @method
+            class iter_empty(ListElement):
+                item_xpath = CSS("tr.empty")
+                empty_xpath = CSS("table.history")
+
+                class item(ItemElement):
+                    klass = BaseObject
+
+        page = MyPage(browser, response)
+        assert [obj.id for obj in page.iter_rows()] == ["foo", "bar"]
+        assert list(page.iter_empty()) == []
+
+    def test_element_plans(self):
+        """Element classes precompute their attributes, and follow changes."""
+
+        class MyResponse:
+            pass
+
+        response = MyResponse()
+        response.url = "https://example.org/table"
+        response.headers = {"content-type": "text/html"}
+        response.encoding = "utf-8"
+        response.content = b"""
+            <table>
+                <tr><th>Id</th><th>Label</th></tr>
+                <tr><td>1</td><td>foo</td></tr>
+                <tr><td>2</td><td>bar</td></tr>
+            </table>
+        """
+
+        class MyBrowser:
+            pass
+
+        browser = MyBrowser()
+        browser.logger = None
+
+        class MyItem(ItemElement):
+            klass = BaseObject
+
+            obj_id = CleanText(TableCell("label"))
+
+        class MyTable(TableElement):
+            head_xpath = "//th"
+            item_xpath = "//tr[td]"
+
+            col_label = [re.compile("Lab")]
+
+        class MyPage(HTMLPage):
+            iter_rows = method(MyTable)
+
+        page = MyPage(browser, response)
+        assert MyTable._column_names == ("col_label",)
+        assert list(page.iter_rows()) == []
+
+        MyTable.item = MyItem
+        assert [obj.id for obj in page.iter_rows()] == ["foo", "bar"]
+
+        MyTable.col_label = "Id"
+        assert [obj.id for obj in page.iter_rows()] == ["1", "2"]
+
+    def test_streaming(self):
+        """Items are built, parsed and yielded one by one."""
+
+        class MyResponse:
+            pass
+
+        response = MyResponse()
+        response.url = "https://example.org/objects"
+        response.headers = {
+            "content-type": "application/json; charset=utf-8",
+        }
+        response.text = json.dumps({"objects": [{"id": "1"}, {"id": "2"}, {"id": "3"}, {"id": "4"}]})
+
+        class MyBrowser:
+            PREFETCH_DEPTH = 1
+
+        browser = MyBrowser()
+        browser.logger = None
+        events = []
+
+        class MyPage(JsonPage):
+            @method
+            class iter_objects(DictElement):
+                item_xpath = "objects"
+                streaming = True
+
+                class item(ItemElement):
+                    klass = BaseObject
+
+                    obj_id = Dict("id")
+
+                    def __init__(self, *args, **kwargs):
+                        super().__init__(*args, **kwargs)
+                        events.append("build %s" % self.el["id"])
+
+                    def load_details(self):
+                        events.append("load %s" % self.el["id"])
+
+        page = MyPage(browser, response)
+        objects = page.iter_objects()
+        assert next(objects).id == "1"
+        assert events == ["build 1", "load 1", "build 2", "load 2"]
+
+        assert [obj.id for obj in objects] == ["2", "3", "4"]
+        assert events[4:] == ["build 3", "load 3", "build 4", "load 4"]
+
+        # without PREFETCH_DEPTH, the window is bounded anyway
+        events.clear()
+        browser.PREFETCH_DEPTH = None
+        MyPage.iter_objects.klass.streaming_prefetch_depth = 2
+        objects = page.iter_objects()
+        assert next(objects).id == "1"
+        assert events == ["build 1", "build 2", "load 1", "load 2", "build 3", "load 3"]
@@ -0,0 +1,35 @@
+import pytest
+import responses
+
+from woob.browser import Browser
+from woob.browser.exceptions import BrowserInterrupted
+from woob.browser.interrupt import CallInterruption, use_interruption
+
+
+@responses.activate
+def test_interrupted_call():
+    responses.add(responses.GET, "https://example.org/", body="ok")
+    browser = Browser()
+    interruption = CallInterruption()
+
+    with use_interruption(interruption):
+        assert browser.open("https://example.org/").text == "ok"
+        interruption.interrupt()
+        with pytest.raises(BrowserInterrupted):
+            browser.open("https://example.org/")
+
+    # the browser is still usable by other calls
+    assert browser.open("https://example.org/").text == "ok"
+
+
+@responses.activate
+def test_interrupt_closes_streamed_responses():
+    responses.add(responses.GET, "https://example.org/", body=b"0123456789" * 1000)
+    interruption = CallInterruption()
+
+    with use_interruption(interruption):
+        response = Browser().open("https://example.org/", stream=True)
+
+    assert not response.raw.closed
+    interruption.interrupt()
+    assert response.raw.closed
@@ -0,0 +1,184 @@
+import time
+from threading import Lock, Thread
+
+import pytest
+import responses
+
+from woob.browser import Browser
+from woob.browser.limits import (
+    LimiterRegistry,
+    MemoryBucketBackend,
+    RequestLimiter,
+    SQLiteBucketBackend,
+    TokenBucket,
+    limiters,
+    parse_rate,
+)
+
+
+@pytest.fixture(autouse=True)
+def clear_limiters():
+    limiters.clear()
+    yield
+    limiters.clear()
+
+
+class Counter:
+    def __init__(self):
+        self.lock = Lock()
+        self.current = 0
+        self.maximum = 0
+
+    def __enter__(self):
+        with self.lock:
+            self.current += 1
+            self.maximum = max(self.maximum, self.current)
+
+    def __exit__(self, *args):
+        with self.lock:
+            self.current -= 1
+
+
+def test_concurrency():
+    limiter = RequestLimiter(concurrency=2)
+    counter = Counter()
+
+    def request():
+        with limiter.limit(), counter:
+            time.sleep(0.05)
+
+    threads = [Thread(target=request) for _ in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert counter.maximum == 2
+    assert limiter.running == 0
+
+
+def test_rate():
+    limiter = RequestLimiter(rate=20)
+    start = time.monotonic()
+    for _ in range(5):
+        with limiter.limit():
+            pass
+
+    # first request is immediate, next ones are spaced by 50ms
+    assert time.monotonic() - start >= 0.19
+
+
+def test_parse_rate():
+    assert parse_rate("10/s") == (0.1, 10)
+    assert parse_rate("600/min") == (0.1, 600)
+    assert parse_rate("1/5s") == (5, 1)
+    assert parse_rate(4) == (0.25, 1)
+
+    for rate in ("10", "10/parsec", "0/s", 0):
+        with pytest.raises(ValueError):
+            parse_rate(rate)
+
+
+def test_token_bucket_burst():
+    bucket = TokenBucket("3/s")
+    # burst of three requests, then one request every 333ms
+    assert [round(bucket.reserve(), 1) for _ in range(5)] == [0, 0, 0, 0.3, 0.7]
+
+
+def test_token_bucket_shared_between_backends(tmp_path):
+    path = str(tmp_path / "limits.sqlite")
+    # two backends on the same database, like two processes
+    first = TokenBucket("1/10s", key="example.org", backend=SQLiteBucketBackend(path))
+    second = TokenBucket("1/10s", key="example.org", backend=SQLiteBucketBackend(path))
+
+    assert first.reserve() == 0
+    assert second.reserve() == pytest.approx(10, abs=1)
+
+    other = TokenBucket("1/10s", key="example.com", backend=SQLiteBucketBackend(path))
+    assert other.reserve() == 0
+
+
+def test_fair_queuing():
+    limiter = RequestLimiter(concurrency=1)
+    order = []
+
+    limiter.acquire("first")
+
+    def request(owner):
+        with limiter.limit(owner):
+            order.append(owner)
+
+    threads = []
+    for owner in ("a", "a", "a", "b"):
+        thread = Thread(target=request, args=(owner,))
+        thread.start()
+        threads.append(thread)
+        # wait for the thread to be queued
+        while sum(len(waiters) for waiters in limiter.waiters.values()) < len(threads):
+            time.sleep(0.001)
+
+    limiter.release()
+    for thread in threads:
+        thread.join()
+
+    # "b" is not queued behind every request of "a"
+    assert order == ["a", "b", "a", "a"]
+
+
+def test_registry():
+    registry = LimiterRegistry()
+    assert registry.get("example.org") is None
+
+    limiter = registry.get("example.org", concurrency=2)
+    assert limiter.concurrency == 2
+    # limits of the first declaration are kept
+    assert registry.get("example.org", concurrency=4) is limiter
+
+    registry.configure("example.org", concurrency=8, rate=1)
+    assert (limiter.concurrency, limiter.rate) == (8, 1)
+
+    registry.configure("example.com", concurrency=3)
+    assert registry.get("example.com", concurrency=1).concurrency == 3
+
+    backend = MemoryBucketBackend()
+    registry.set_backend(backend)
+    assert limiter.bucket.backend is backend
+
+    with pytest.raises(ValueError):
+        registry.configure("example.net", rate="fast")
+
+
+@responses.activate
+def test_browser_concurrency_limit():
+    counter = Counter()
+
+    def callback(request):
+        with counter:
+            time.sleep(0.05)
+        return (200, {}, "ok")
+
+    responses.add_callback(responses.GET, "https://example.org/", callback=callback)
+
+    class LimitedBrowser(Browser):
+        CONCURRENCY_LIMIT = 2
+
+    browsers = [LimitedBrowser() for _ in range(3)]
+    futures = [browser.async_open("https://example.org/") for browser in browsers for _ in range(3)]
+    for future in futures:
+        assert future.result().text == "ok"
+
+    assert counter.maximum == 2
+
+
+def test_browser_limit_scope():
+    class HostBrowser(Browser):
+        CONCURRENCY_LIMIT = 1
+
+    class ModuleBrowser(HostBrowser):
+        LIMIT_SCOPE = "module"
+
+    ModuleBrowser.__module__ = "woob_modules.creditmutuel.browser"
+
+    request = HostBrowser().build_request("https://www.creditmutuel.fr/login")
+    assert HostBrowser().get_limit_key(request) == "www.creditmutuel.fr"
+    assert ModuleBrowser().get_limit_key(request) == "creditmutuel"
@@ -0,0 +1,83 @@
+import time
+
+import responses
+
+from woob.browser import Browser
+
+
+class CoalescingBrowser(Browser):
+    COALESCE_REQUESTS = True
+    MAX_WORKERS = 5
+
+
+@responses.activate
+def test_coalesce_identical_requests():
+    def callback(request):
+        time.sleep(0.1)
+        return (200, {}, "content")
+
+    responses.add_callback(responses.GET, "https://example.org/detail", callback=callback)
+
+    browser = CoalescingBrowser()
+    futures = [browser.async_open("https://example.org/detail") for _ in range(5)]
+    results = [future.result() for future in futures]
+
+    assert len(responses.calls) == 1
+    assert all(response.text == "content" for response in results)
+    # every caller has its own response object
+    assert len({id(response) for response in results}) == 5
+
+    # the request is sent again once the previous one is finished
+    browser.open("https://example.org/detail")
+    assert len(responses.calls) == 2
+
+
+@responses.activate
+def test_coalesce_only_idempotent_requests():
+    def callback(request):
+        time.sleep(0.05)
+        return (200, {}, "ok")
+
+    responses.add_callback(responses.POST, "https://example.org/form", callback=callback)
+
+    browser = CoalescingBrowser()
+    futures = [browser.async_open("https://example.org/form", data={"a": "b"}) for _ in range(3)]
+    for future in futures:
+        future.result()
+
+    assert len(responses.calls) == 3
+
+
+@responses.activate
+def test_no_coalescing_by_default():
+    def callback(request):
+        time.sleep(0.05)
+        return (200, {}, "ok")
+
+    responses.add_callback(responses.GET, "https://example.org/", callback=callback)
+
+    class DefaultBrowser(Browser):
+        MAX_WORKERS = 3
+
+    browser = DefaultBrowser()
+    futures = [browser.async_open("https://example.org/") for _ in range(3)]
+    for future in futures:
+        future.result()
+
+    assert len(responses.calls) == 3
+
+
+def test_concurrency_settings():
+    class ConcurrentBrowser(Browser):
+        MAX_WORKERS = 20
+        POOL_MAXSIZE = 30
+
+    browser = ConcurrentBrowser()
+    assert browser.session.executor._max_workers == 20
+    assert browser.session.get_adapter("https://example.org")._pool_maxsize == 30
+
+    browser = ConcurrentBrowser(max_workers=4, pool_maxsize=8, prefetch_depth=5)
+    assert browser.session.executor._max_workers == 4
+    assert browser.session.get_adapter("https://example.org")._pool_maxsize == 8
+    assert browser.PREFETCH_DEPTH == 5
+    assert ConcurrentBrowser.MAX_WORKERS == 20
@@ -16,10 +16,11 @@
 # along with woob. If not, see <http://www.gnu.org/licenses/>.
 
 import pytest
+import requests
 import responses
 
 from woob.browser import URL, PagesBrowser
-from woob.browser.pages import Page, RawPage
+from woob.browser.pages import HTMLPage, Page, RawPage
 from woob.browser.url import BrowserParamURL, UrlNotResolvable, normalize_url
 
 
@@ -666,3 +667,114 @@ def test_normalize_url():
     ]
     for todo, expected in tests:
         assert normalize_url(todo) == expected
+
+
+def test_url_index():
+    class RejectedPage(RawPage):
+        is_here = False
+
+    class DetailPage(RawPage):
+        pass
+
+    class OtherPage(RawPage):
+        pass
+
+    class CustomURL(URL):
+        def match(self, url, base=None):
+            return super().match(url.lower(), base)
+
+    class MyBrowser(PagesBrowser):
+        BASEURL = "https://example.org/"
+
+        rejected = URL(r"item/(?P<id>\d+)", RejectedPage)
+        detail = URL(r"item/(?P<id>\d+)", r"(?i:ITEM)/(?P<id>\d+)/(?P=id)", DetailPage)
+        posted = URL(r"item/(?P<id>\d+)", OtherPage, methods=("POST",))
+        custom = CustomURL(r"other", OtherPage)
+        backref = URL(r"(\w+)/\1", OtherPage)
+
+    def candidates(url, method="GET"):
+        response = make_response(url, method)
+        return list(browser._url_index.candidates(response))
+
+    browser = MyBrowser()
+    assert browser.find_page(make_response("https://example.org/item/42")).params == {"id": "42"}
+
+    index = browser._url_index
+    assert candidates("https://example.org/item/42") == [
+        browser.rejected,
+        browser.detail,
+        browser.custom,
+        browser.backref,
+    ]
+    assert candidates("https://example.org/item/42", "POST")[:3] == [browser.rejected, browser.detail, browser.posted]
+    assert candidates("https://example.org/Item/4/4") == [browser.detail, browser.custom, browser.backref]
+    assert candidates("https://example.org/nothing") == [browser.custom, browser.backref]
+
+    # URLs are matched against the current base
+    browser.BASEURL = "https://example.com/"
+    assert candidates("https://example.org/item/42") == [browser.custom, browser.backref]
+    assert isinstance(browser.find_page(make_response("https://example.com/item/42")), DetailPage)
+
+    # the index is rebuilt when URLs change
+    browser.detail = URL(r"detail", DetailPage)
+    assert browser._url_index is not index
+    assert browser.find_page(make_response("https://example.com/item/42")) is None
+
+
+def make_response(url, method="GET"):
+    response = requests.Response()
+    response.url = url
+    response.request = requests.Request(method, url).prepare()
+    return response
+
+
+def test_shared_documents():
+    built = []
+
+    class CountingPage(HTMLPage):
+        def build_doc(self, content):
+            built.append((type(self).__name__, self.encoding))
+            return super().build_doc(content)
+
+    class FirstPage(CountingPage):
+        is_here = '//div[@id="first"]'
+
+    class SecondPage(CountingPage):
+        is_here = '//div[@id="second"]'
+
+    class AbsolutePage(CountingPage):
+        ABSOLUTE_LINKS = True
+
+    class MyBrowser(PagesBrowser):
+        BASEURL = "https://example.org/"
+
+        first = URL(r"item", FirstPage)
+        second = URL(r"item", SecondPage)
+        other = URL(r"other", FirstPage)
+        absolute = URL(r"other", AbsolutePage)
+
+    browser = MyBrowser()
+    response = make_response("https://example.org/item")
+    response._content = b'<html><head><meta charset="utf-8"></head><body><div id="second"/></body></html>'
+    response.encoding = "iso-8859-1"
+
+    page = browser.find_page(response)
+    assert isinstance(page, SecondPage)
+    # the document is parsed again once with the declared encoding
+    assert built == [("FirstPage", "iso-8859-1"), ("FirstPage", "utf-8")]
+    assert not hasattr(response, "shared_docs")
+
+    # documents are not shared outside of the lookup
+    del built[:]
+    assert SecondPage(browser, response).doc is not page.doc
+    assert built == [("SecondPage", "utf-8")]
+
+    # pages building different documents do not share them
+    del built[:]
+    response = make_response("https://example.org/other")
+    response._content = b"<html><body><a href='/link'/></body></html>"
+    response.encoding = "utf-8"
+    page = browser.find_page(response)
+    assert isinstance(page, AbsolutePage)
+    assert built == [("FirstPage", "utf-8"), ("AbsolutePage", "utf-8")]
+    assert page.doc.xpath("//a/@href") == ["https://example.org/link"]
@@ -0,0 +1,301 @@
+import asyncio
+import time
+from concurrent.futures import CancelledError
+from threading import Event, Lock, RLock, Timer
+
+import pytest
+
+from woob.browser.interrupt import current_interruption
+from woob.core.bcall import BackendsCall, CallErrors, CallTimeout
+from woob.core.executor import PoolExecutor
+
+
+class FakeBackend:
+    def __init__(self, name, module="fake"):
+        self.name = name
+        self.NAME = module
+        self.lock = RLock()
+
+    def __enter__(self):
+        self.lock.acquire()
+
+    def __exit__(self, t, v, tb):
+        self.lock.release()
+
+    def __repr__(self):
+        return f"<Backend {self.name}>"
+
+
+class Counter:
+    def __init__(self):
+        self.lock = Lock()
+        self.current = 0
+        self.peak = 0
+
+    def __call__(self, backend):
+        with self.lock:
+            self.current += 1
+            self.peak = max(self.peak, self.current)
+        time.sleep(0.01)
+        with self.lock:
+            self.current -= 1
+        return backend.name
+
+
+def test_pool_executor_bounds_concurrency():
+    executor = PoolExecutor(max_workers=3)
+    counter = Counter()
+    backends = [FakeBackend("b%d" % i) for i in range(20)]
+
+    results = BackendsCall(backends, counter, executor=executor)
+
+    assert sorted(results) == sorted(backend.name for backend in backends)
+    assert counter.peak <= 3
+    executor.shutdown()
+
+
+def test_pool_executor_module_workers():
+    executor = PoolExecutor(max_workers=10, module_workers={"slow": 1})
+    counter = Counter()
+    backends = [FakeBackend("b%d" % i, module="slow") for i in range(5)]
+
+    assert len(list(BackendsCall(backends, counter, executor=executor))) == 5
+    assert counter.peak == 1
+    executor.shutdown()
+
+
+def test_executor_shut_down():
+    executor = PoolExecutor()
+    executor.shutdown()
+
+    bcall = BackendsCall([FakeBackend("b1")], lambda backend: backend.name, executor=executor, timeout=5)
+    with pytest.raises(CallErrors) as exc_info:
+        list(bcall)
+    ((_, error, _),) = exc_info.value.errors
+    assert isinstance(error, RuntimeError)
+
+
+def test_task_cancelled_by_executor():
+    executor = PoolExecutor(module_workers={"fake": 1})
+    started = Event()
+    release = Event()
+
+    def call(backend):
+        started.set()
+        release.wait()
+        return backend.name
+
+    backends = [FakeBackend("b1"), FakeBackend("b2")]
+    bcall = BackendsCall(backends, call, executor=executor, timeout=5)
+    started.wait()
+    # b2 is still queued
+    executor.shutdown(wait=False)
+    release.set()
+
+    results = []
+    with pytest.raises(CallErrors) as exc_info:
+        for result in bcall:
+            results.append(result)
+    assert results == ["b1"]
+    ((backend, error, _),) = exc_info.value.errors
+    assert backend is backends[1]
+    assert isinstance(error, CancelledError)
+
+
+def test_callback_thread():
+    backends = [FakeBackend("b%d" % i) for i in range(5)]
+    results = []
+    finished = Event()
+
+    bcall = BackendsCall(backends, lambda backend: [backend.name, backend.name.upper()])
+    bcall.callback_thread(results.append, finishback=finished.set).join()
+
+    assert finished.is_set()
+    assert len(results) == 10
+
+
+def test_stop_wakes_up_consumer():
+    release = Event()
+
+    def blocking(backend):
+        yield backend.name
+        release.wait()
+
+    bcall = BackendsCall([FakeBackend("b1")], blocking)
+    Timer(0.05, bcall.stop).start()
+
+    assert list(bcall) == ["b1"]
+    release.set()
+    bcall.wait()
+
+
+def test_async_iteration():
+    async def consume(bcall):
+        return [result async for result in bcall]
+
+    backends = [FakeBackend("b%d" % i) for i in range(5)]
+    results = asyncio.run(consume(BackendsCall(backends, lambda backend: backend.name)))
+
+    assert sorted(results) == sorted(backend.name for backend in backends)
+
+
+def test_async_cancel_stops_call():
+    release = Event()
+
+    def blocking(backend):
+        yield backend.name
+        release.wait()
+        yield "never"
+
+    async def consume(bcall):
+        results = []
+
+        async def iterate():
+            async for result in bcall:
+                results.append(result)
+
+        task = asyncio.create_task(iterate())
+        await asyncio.sleep(0.05)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        return results
+
+    bcall = BackendsCall([FakeBackend("b1")], blocking)
+    assert asyncio.run(consume(bcall)) == ["b1"]
+    assert bcall.stop_event.is_set()
+    release.set()
+    bcall.wait()
+
+
+def test_timeout_returns_partial_results():
+    release = Event()
+
+    def call(backend):
+        yield backend.name
+        if backend.name == "slow":
+            release.wait()
+            yield "too late"
+
+    backends = [FakeBackend("fast"), FakeBackend("slow")]
+    bcall = BackendsCall(backends, call, timeout=0.1)
+
+    results = []
+    with pytest.raises(CallErrors) as exc_info:
+        for result in bcall:
+            results.append(result)
+
+    assert sorted(results) == ["fast", "slow"]
+    ((backend, error, _),) = exc_info.value.errors
+    assert backend.name == "slow"
+    assert isinstance(error, CallTimeout)
+    assert bcall.interruption.is_set()
+
+    release.set()
+
+
+def test_maxsize_pauses_backends():
+    produced = []
+
+    def call(backend):
+        for i in range(10):
+            produced.append(i)
+            yield i
+
+    bcall = BackendsCall([FakeBackend("b1")], call, maxsize=2)
+    it = iter(bcall)
+    assert next(it) == 0
+    time.sleep(0.05)
+    # one result consumed, two waiting, one blocked in store_result()
+    assert len(produced) <= 4
+
+    assert list(it) == list(range(1, 10))
+
+
+def test_max_results():
+    closed = []
+
+    def call(backend):
+        try:
+            yield from range(100)
+        finally:
+            closed.append(backend.name)
+
+    backends = [FakeBackend("b1"), FakeBackend("b2")]
+    results = list(BackendsCall(backends, call, max_results=3))
+
+    assert sorted(results) == [0, 0, 1, 1, 2, 2]
+    assert sorted(closed) == ["b1", "b2"]
+
+
+def test_first_results():
+    release = Event()
+
+    def call(backend):
+        if backend.name == "slow":
+            release.wait()
+        yield backend.name
+
+    backends = [FakeBackend("slow"), FakeBackend("fast")]
+    bcall = BackendsCall(backends, call, first=1)
+
+    assert list(bcall) == ["fast"]
+    assert bcall.interruption.is_set()
+
+    release.set()
+    bcall.futures[0][1].result()
+
+
+def test_interrupt_is_per_call():
+    release = Event()
+    interrupted = {}
+
+    def call(backend, name):
+        release.wait()
+        interrupted[name] = current_interruption.get().is_set()
+        return name
+
+    backend = FakeBackend("b1")
+    # both calls use the same backend, run one after the other
+    expired = BackendsCall([backend], call, "expired", timeout=0.05)
+    other = BackendsCall([backend], call, "other")
+
+    with pytest.raises(CallErrors):
+        list(expired)
+    release.set()
+
+    assert list(other) == ["other"]
+    assert interrupted == {"expired": True, "other": False}
+
+
+@pytest.mark.parametrize("reverse", (False, True))
+def test_merge_key(reverse):
+    values = {
+        "b1": [1, 4, 7, 10],
+        "b2": [2, 3, 5, 11, 12],
+        "b3": [6, 8, 9],
+    }
+
+    def call(backend):
+        for value in sorted(values[backend.name], reverse=reverse):
+            time.sleep(0.001 * value)
+            yield value
+
+    backends = [FakeBackend(name) for name in values]
+    bcall = BackendsCall(backends, call, merge_key=lambda value: value, merge_reverse=reverse, maxsize=2)
+
+    assert list(bcall) == sorted(range(1, 13), reverse=reverse)
+
+
+def test_merge_key_more_backends_than_workers():
+    executor = PoolExecutor(max_workers=2)
+    backends = [FakeBackend("b%d" % i) for i in range(6)]
+
+    def call(backend):
+        index = int(backend.name[1:])
+        return range(index, 60, 6)
+
+    bcall = BackendsCall(backends, call, executor=executor, timeout=5, merge_key=lambda value: value, maxsize=2)
+
+    assert list(bcall) == list(range(60))
+    executor.shutdown()
@@ -0,0 +1,106 @@
+import os
+import textwrap
+
+import pytest
+
+from woob.core import CallErrors, WoobBase
+from woob.core.executor import ProcessExecutor
+from woob.tools.application.repl import ReplApplication
+from woob.tools.application.results import ResultsCondition
+
+
+MODULE = """
+import os
+
+from woob.capabilities.base import BaseObject, StringField
+from woob.tools.backend import Module
+
+
+class Thing(BaseObject):
+    pid = StringField("pid")
+
+
+class ProcessTestModule(Module):
+    NAME = "processtest"
+
+    def iter_things(self, count):
+        for i in range(count):
+            thing = Thing(str(i))
+            thing.pid = str(os.getpid())
+            yield thing
+
+    def fail(self):
+        raise ValueError("boom")
+"""
+
+
+@pytest.fixture
+def woob(tmp_path):
+    module_path = tmp_path / "processtest"
+    module_path.mkdir()
+    (module_path / "__init__.py").write_text(textwrap.dedent(MODULE))
+
+    woob = WoobBase(str(tmp_path), executor=ProcessExecutor(processes=2))
+    woob.load_backend("processtest", "test1")
+    woob.load_backend("processtest", "test2")
+    yield woob
+    woob.deinit()
+
+
+def test_process_executor_results(woob):
+    things = list(woob.do("iter_things", 250))
+
+    assert len(things) == 500
+    assert {thing.backend for thing in things} == {"test1", "test2"}
+    assert str(os.getpid()) not in {thing.pid for thing in things}
+
+
+def test_process_executor_errors(woob):
+    with pytest.raises(CallErrors) as exc_info:
+        list(woob.do("fail"))
+
+    errors = exc_info.value.errors
+    assert len(errors) == 2
+    for _, error, backtrace in errors:
+        assert isinstance(error, ValueError)
+        assert "in fail" in backtrace
+
+
+class ThingsApp(ReplApplication):
+    APPNAME = "things"
+    VERSION = "1.0"
+    COPYRIGHT = "Copyright(C) YEAR woob project"
+
+    def do_things(self, line):
+        """
+        things COUNT
+
+        Get things.
+        """
+        self.things = list(self.do("iter_things", int(line)))
+
+
+def test_process_executor_repl_application(tmp_path, monkeypatch):
+    module_path = tmp_path / "modules" / "processtest"
+    module_path.mkdir(parents=True)
+    (module_path / "__init__.py").write_text(textwrap.dedent(MODULE))
+    monkeypatch.setattr(ThingsApp, "CONFDIR", str(tmp_path))
+    monkeypatch.setattr(ThingsApp, "create_woob", lambda self: WoobBase(str(tmp_path / "modules")))
+
+    app = ThingsApp()
+    app.options, _ = app._parser.parse_args(["things", "--processes", "2", "-n", "3"])
+    # what Application.parse_args() does, without loading backends from config
+    app.setup_process_executor()
+    app.set_formatter(app.DEFAULT_FORMATTER)
+    app.selected_fields = ["$direct"]
+    app._is_default_count = False
+    app.condition = ResultsCondition("id=0 OR id=2 OR id=3 OR id=5")
+    app.enabled_backends = {app.woob.load_backend("processtest", "test1")}
+
+    try:
+        app.onecmd("things 10")
+        assert isinstance(app.woob.executor, ProcessExecutor)
+        assert [thing.id for thing in app.things] == ["0", "2", "3"]
+        assert str(os.getpid()) not in {thing.pid for thing in app.things}
+    finally:
+        app.woob.deinit()
@@ -0,0 +1,68 @@
+import threading
+import time
+
+from woob.core.scheduler import Scheduler
+
+
+def test_schedule():
+    scheduler = Scheduler()
+    called = threading.Event()
+
+    assert scheduler.schedule(0.01, called.set) == 1
+    assert called.wait(1)
+    scheduler.want_stop()
+
+
+def test_repeat_single_timer_thread():
+    scheduler = Scheduler(max_workers=4)
+    counts = [0] * 100
+    lock = threading.Lock()
+    polled_twice = [threading.Event() for _ in range(100)]
+
+    def poll(i):
+        with lock:
+            counts[i] += 1
+            if counts[i] >= 2:
+                polled_twice[i].set()
+
+    threads = threading.active_count()
+    for i in range(100):
+        scheduler.repeat(0.02, poll, i)
+    # timer thread and pool workers
+    assert threading.active_count() <= threads + 5
+
+    try:
+        assert all(event.wait(10) for event in polled_twice)
+    finally:
+        scheduler.want_stop()
+
+
+def test_cancel():
+    scheduler = Scheduler()
+    called = threading.Event()
+
+    ev = scheduler.schedule(0.05, called.set)
+    assert scheduler.cancel(ev)
+    assert not scheduler.cancel(ev)
+    assert not called.wait(0.1)
+    scheduler.want_stop()
+
+
+def test_max_concurrency():
+    scheduler = Scheduler(max_workers=4)
+    lock = threading.Lock()
+    running = []
+    peak = []
+
+    def slow():
+        with lock:
+            running.append(1)
+            peak.append(len(running))
+        time.sleep(0.05)
+        with lock:
+            running.pop()
+
+    scheduler.repeat(0.01, slow, max_concurrency=2)
+    time.sleep(0.2)
+    scheduler.want_stop()
+    assert max(peak) == 2
@@ -1,6 +1,6 @@
 import pytest
 
-from woob.tools.misc import clean_text
+from woob.tools.misc import clean_text, ratelimit
 
 
 @pytest.mark.parametrize(
@@ -33,3 +33,9 @@ def test_clean_text_keep_newlines(src, output):
 def test_clean_text_transliterate(src, output):
     """Test clean text without transliteration."""
     assert clean_text(src, transliterate=True) == output
+
+
+def test_ratelimit_no_delay():
+    """A null delay does not limit calls."""
+    with pytest.deprecated_call():
+        ratelimit("test_no_delay", 0)
@@ -0,0 +1,83 @@
+import pytest
+from lxml import etree
+from lxml.html import fromstring
+
+from woob.browser.filters.standard import CleanText
+from woob.browser.pages import HTMLPage
+from woob.tools.xpath import clear_xpath_cache, compile_xpath, css_to_xpath, cssselect, xpath, xpath_cache_info
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    clear_xpath_cache()
+    yield
+    clear_xpath_cache()
+
+
+def test_xpath():
+    HTMLPage.setup_xpath_functions()
+    root = fromstring('<div><p class="a b">foo</p><p class="b">bar</p></div>')
+
+    assert xpath(root, '//p[has-class("a")]/text()') == ["foo"]
+    assert xpath(root, "//p[text()=$text]/@class", text="bar") == ["b"]
+    assert xpath(root.getroottree(), "count(//p)") == 2
+    assert xpath_cache_info().misses == 3
+
+    for _ in range(3):
+        assert xpath(root, '//p[has-class("a")]/text()') == ["foo"]
+    assert xpath_cache_info().hits == 3
+
+    with pytest.raises(etree.XPathEvalError):
+        xpath(root, "//p[")
+
+
+def test_xpath_namespaces():
+    root = etree.fromstring('<root xmlns:x="urn:x"><x:item>1</x:item></root>')
+    assert xpath(root, "//y:item/text()", namespaces={"y": "urn:x"}) == ["1"]
+    assert compile_xpath("//y:item", {"y": "urn:x"}) is compile_xpath("//y:item", {"y": "urn:x"})
+    assert compile_xpath("//y:item", {"y": "urn:x"}) is not compile_xpath("//y:item", {"y": "urn:y"})
+
+
+def test_filters_use_cache():
+    root = fromstring("<ul><li>a</li><li>b</li></ul>")
+    for li in root.xpath("//li"):
+        CleanText(".")(li)
+    assert xpath_cache_info().hits > 0
+
+
+def test_cssselect():
+    root = fromstring('<div><p class="a">foo</p><p class="b">bar</p></div>')
+
+    assert [el.text for el in cssselect(root, "p.b")] == ["bar"]
+    assert [el.text for el in cssselect(root, "div > p")] == ["foo", "bar"]
+    assert [el.text for el in cssselect(root, "p.b")] == ["bar"]
+    assert css_to_xpath.cache_info().hits == 1
+
+    # the translated expression shares the XPath cache
+    assert compile_xpath(css_to_xpath("p.b")) is compile_xpath(css_to_xpath("p.b"))
+
+    # element names are case-sensitive in XML
+    root = etree.fromstring("<root><Item>1</Item></root>")
+    assert [el.text for el in cssselect(root, "Item")] == ["1"]
+    assert cssselect(root, "item") == []
+
+
+def test_xpath_options():
+    root = fromstring("<div><p>foo</p></div>")
+
+    text = xpath(root, "//p/text()")[0]
+    assert text.getparent() is not None
+    text = xpath(root, "//p/text()", smart_strings=False)[0]
+    assert not hasattr(text, "getparent")
+    assert xpath_cache_info().misses == 2
+
+    def upper(context, value):
+        return value[0].upper()
+
+    extensions = {("urn:test", "upper"): upper}
+    assert xpath(root, "t:upper(//p/text())", namespaces={"t": "urn:test"}, extensions=extensions) == "FOO"
+    assert xpath(root, "t:upper(//p/text())", namespaces={"t": "urn:test"}, extensions=[extensions]) == "FOO"
+    assert xpath_cache_info().hits == 1
+
+    # options are not taken as XPath variables
+    assert xpath(root, "//p[text()=$text]/text()", smart_strings=False, text="foo") == ["foo"]
@@ -220,20 +220,14 @@ def do_download(self, line, force_pdf=False):
             extension = document.format if not force_pdf else "pdf"
             dest = document.id + (f".{extension}" if extension else "")
 
-        for buf in self.do("download_document" if not force_pdf else "download_document_pdf", document, backends=names):
-            if buf:
-                if dest == "-":
-                    self.stdout.buffer.write(buf)
-                else:
-                    try:
-                        with open(dest, "wb") as f:
-                            f.write(buf)
-                        if not document.has_file:
-                            print("Warning: document.has_file is falsy but the file is available", file=self.stderr)
-                    except OSError as e:
-                        print(f'Unable to write document in "{dest}": {e}', file=self.stderr)
-                        return 1
-                return
+        try:
+            written = self.write_chunks(dest, self.iter_document_chunks(document, force_pdf))
+        except OSError as e:
+            print(f'Unable to write document in "{dest}": {e}', file=self.stderr)
+            return 1
+
+        if written and dest != "-" and not document.has_file:
+            print("Warning: document.has_file is falsy but the file is available", file=self.stderr)
 
     def do_download_pdf(self, line):
         """
@@ -263,26 +257,32 @@ def download_subscription(self, subscription, force_pdf):
         return True
 
     def download_doc(self, document, force_pdf):
-        if force_pdf:
-            method = "download_document_pdf"
-        else:
-            method = "download_document"
-
         extension = document.format if not force_pdf else "pdf"
         dest = document.id + (f".{extension}" if extension else "")
 
-        for buf in self.do(method, document, backends=(document.backend,)):
-            if buf:
-                try:
-                    with open(dest, "wb") as f:
-                        f.write(buf)
-                        if not document.has_file:
-                            print("Warning: document.has_file is falsy but the file is available", file=self.stderr)
-                except OSError as e:
-                    print(f'Unable to write bill in "{dest}": {e}', file=self.stderr)
-                    return False
+        try:
+            written = self.write_chunks(dest, self.iter_document_chunks(document, force_pdf))
+        except OSError as e:
+            print(f'Unable to write bill in "{dest}": {e}', file=self.stderr)
+            return False
+
+        if written and not document.has_file:
+            print("Warning: document.has_file is falsy but the file is available", file=self.stderr)
         return True
 
+    def iter_document_chunks(self, document, force_pdf):
+        """
+        Download a document, in chunks, to avoid loading large files in memory.
+
+        Chunks are not results to display, so Woob.do() is called
+        directly, without the count and condition given by user.
+        """
+        if force_pdf:
+            return self.woob.do("download_document_pdf", document, backends=(document.backend,))
+
+        # bound the chunks waiting to be written
+        return self.woob.do("download_document_stream", document, backends=(document.backend,), maxsize=16)
+
     def do_profile(self, line):
         """
         profile
@@ -116,14 +116,12 @@ def do_download(self, line):
             if i < first:
                 continue
 
-            self.woob[backend].fillobj(img, ("url", "data"))
-            if img.data is None:
-                self.woob[backend].fillobj(img, ("url", "data"))
-                if img.data is None:
-                    print("Couldn't get page %d, exiting" % i, file=self.stderr)
-                    break
+            self.woob[backend].fillobj(img, ("url",))
+            if empty(img.url):
+                # some modules only fill the URL on a second try
+                self.woob[backend].fillobj(img, ("url",))
 
-            ext = search(r"\.([^\.]{1,5})$", img.url)
+            ext = search(r"\.([^\.]{1,5})$", img.url or "")
             if ext:
                 ext = ext.group(1)
             else:
@@ -132,8 +130,13 @@ def do_download(self, line):
             name = "%03d.%s" % (i, ext)
             print("Writing file %s" % name)
 
-            with open(name, "wb") as f:
-                f.write(img.data)
+            written = self.write_chunks(name, self.woob[backend].download_image_stream(img))
+            if not written:
+                self.woob[backend].fillobj(img, ("url", "data"))
+                written = self.write_chunks(name, self.woob[backend].download_image_stream(img))
+            if not written:
+                print("Couldn't get page %d, exiting" % i, file=self.stderr)
+                break
 
         os.chdir(os.path.pardir)
 
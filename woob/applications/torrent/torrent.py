@@ -149,15 +149,11 @@ def do_getfile(self, line):
         try:
             for buf in self.do("get_torrent_file", torrent.id, backends=torrent.backend):
                 if buf:
-                    if dest == "-":
-                        print(buf)
-                    else:
-                        try:
-                            with open(dest, "w") as f:
-                                f.write(buf)
-                        except OSError as e:
-                            print(f'Unable to write .torrent in "{dest}": {e}', file=self.stderr)
-                            return 1
+                    try:
+                        self.write_chunks(dest, [buf])
+                    except OSError as e:
+                        print(f'Unable to write .torrent in "{dest}": {e}', file=self.stderr)
+                        return 1
                     return
         except CallErrors as errors:
             for backend, error, backtrace in errors:
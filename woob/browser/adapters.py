@@ -29,12 +29,53 @@ class HTTPAdapter(requests.adapters.HTTPAdapter):
 
     :param proxy_headers: headers to send to proxy (if any)
     :type proxy_headers: dict
+    :param limiter: function called with the request to send, returning a
+                    context manager held while the request is running
+    :type limiter: callable
+    :param breaker: function called with the request to send, returning the
+                    :class:`woob.browser.breaker.CircuitBreaker` of the site,
+                    or None
+    :type breaker: callable
     """
 
     def __init__(self, *args, **kwargs):
         self._proxy_headers = kwargs.pop("proxy_headers", {})
+        self.limiter = kwargs.pop("limiter", None)
+        self.breaker = kwargs.pop("breaker", None)
         super().__init__(*args, **kwargs)
 
+    def send(self, request, **kwargs):
+        breaker = self.breaker(request) if self.breaker is not None else None
+        if breaker is None:
+            return self.limited_send(request, **kwargs)
+
+        breaker.before_request()
+        try:
+            response = self.limited_send(request, **kwargs)
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+            breaker.record_failure()
+            raise
+        except BaseException:
+            breaker.release()
+            raise
+
+        if response.status_code >= 500:
+            breaker.record_failure()
+        else:
+            breaker.record_success()
+        return response
+
+    def limited_send(self, request, **kwargs):
+        if self.limiter is None:
+            return super().send(request, **kwargs)
+
+        with self.limiter(request):
+            response = super().send(request, **kwargs)
+            if not kwargs.get("stream"):
+                # read the body while the request is limited
+                response.content
+            return response
+
     def add_proxy_header(self, key, value):
         self._proxy_headers[key] = value
 
@@ -0,0 +1,281 @@
+# Copyright(C) 2010-2024 Romain Bignon
+#
+# This file is part of woob.
+#
+# woob is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# woob is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with woob. If not, see <http://www.gnu.org/licenses/>.
+
+from __future__ import annotations
+
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+from threading import Lock
+from time import sleep, time
+from typing import Callable
+
+import requests
+from urllib3.exceptions import NewConnectionError
+
+from woob.tools.log import getLogger
+
+from .cache import parse_http_date
+from .exceptions import BrowserInterrupted
+from .interrupt import CallInterruption
+
+
+__all__ = ["RetryPolicy", "RetryBudget", "current_retry_budget", "use_retry_budget"]
+
+
+class RetryBudget:
+    """
+    Total number of retries allowed for a set of requests.
+
+    It is shared by every browser of a :class:`woob.core.bcall.BackendsCall`,
+    so a site which is down does not make the call retry forever.
+
+    :param retries: number of retries
+    :type retries: int
+    """
+
+    def __init__(self, retries: int):
+        self.lock = Lock()
+        self.remaining = retries
+
+    def consume(self) -> bool:
+        """
+        Take a retry from the budget.
+
+        :returns: False if the budget is exhausted
+        :rtype: bool
+        """
+        with self.lock:
+            if self.remaining <= 0:
+                return False
+            self.remaining -= 1
+            return True
+
+
+current_retry_budget: ContextVar[RetryBudget | None] = ContextVar("current_retry_budget", default=None)
+"""
+Retry budget of the backend call being run, if any.
+"""
+
+
+@contextmanager
+def use_retry_budget(budget: RetryBudget | None):
+    """
+    Context manager setting the retry budget of requests sent in it.
+    """
+    token = current_retry_budget.set(budget)
+    try:
+        yield budget
+    finally:
+        current_retry_budget.reset(token)
+
+
+class RetryPolicy:
+    """
+    Retry requests failing because of a transient error.
+
+    Requests are retried when the server replies with one of the
+    ``statuses``, or when the connection fails. The delay between two
+    attempts grows exponentially, with a random jitter so clients do not
+    retry all at the same time. When the server sends a ``Retry-After``
+    header, it is honored.
+
+    Only idempotent requests are retried, unless the server certainly did
+    not process the request: the connection could not be established, or
+    the server replied with ``429 Too Many Requests``.
+
+    >>> class MyBrowser(PagesBrowser):  # doctest: +SKIP
+    ...     RETRY_POLICY = RetryPolicy(max_retries=5)
+
+    :param max_retries: maximum number of retries of a request
+    :type max_retries: int
+    :param statuses: HTTP status codes to retry
+    :type statuses: tuple[int]
+    :param methods: methods which are retried on any transient error
+    :type methods: tuple[str]
+    :param backoff_factor: delay before the first retry, in seconds; it is
+                           doubled for each next retry
+    :type backoff_factor: float
+    :param max_backoff: maximum delay between two attempts, in seconds
+    :type max_backoff: float
+    :param max_retry_after: maximum ``Retry-After`` delay honored, in
+                            seconds; if the server asks to wait longer,
+                            the request is not retried
+    :type max_retry_after: float
+    """
+
+    IDEMPOTENT_METHODS = ("GET", "HEAD", "OPTIONS", "TRACE", "PUT", "DELETE")
+
+    def __init__(
+        self,
+        max_retries: int = 3,
+        statuses: tuple[int, ...] = (429, 502, 503),
+        methods: tuple[str, ...] = IDEMPOTENT_METHODS,
+        backoff_factor: float = 0.5,
+        max_backoff: float = 30,
+        max_retry_after: float = 120,
+    ):
+        self.max_retries = max_retries
+        self.statuses = statuses
+        self.methods = methods
+        self.backoff_factor = backoff_factor
+        self.max_backoff = max_backoff
+        self.max_retry_after = max_retry_after
+        self.logger = getLogger("woob.browser.backoff")
+
+    def is_retryable_error(self, request: requests.PreparedRequest, error: Exception) -> bool:
+        """
+        Whether a request which raised an exception can be sent again.
+        """
+        if not isinstance(error, requests.exceptions.ConnectionError) or isinstance(
+            error, (requests.exceptions.SSLError, requests.exceptions.ProxyError)
+        ):
+            return False
+
+        if request.method in self.methods:
+            return True
+
+        # the request has not been sent at all
+        reason = error.args[0] if error.args else None
+        return isinstance(error, requests.exceptions.ConnectTimeout) or isinstance(
+            getattr(reason, "reason", None), NewConnectionError
+        )
+
+    def is_retryable_response(self, response: requests.Response) -> bool:
+        """
+        Whether a request can be sent again after this response.
+        """
+        if response.status_code not in self.statuses:
+            return False
+
+        return response.request.method in self.methods or response.status_code == 429
+
+    def get_retry_after(self, response: requests.Response) -> float | None:
+        """
+        Get the delay asked by the server in the ``Retry-After`` header.
+
+        :returns: seconds, or None if there is no valid header
+        """
+        value = response.headers.get("Retry-After")
+        if not value:
+            return None
+
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            pass
+
+        date = parse_http_date(value)
+        if date is None:
+            return None
+        return max(0.0, date - time())
+
+    def get_backoff(self, attempt: int) -> float:
+        """
+        Get the delay before a retry, with a "full jitter".
+
+        :param attempt: number of retries already made
+        """
+        return random.uniform(0, min(self.max_backoff, self.backoff_factor * 2**attempt))
+
+    def get_delay(
+        self,
+        request: requests.PreparedRequest,
+        attempt: int,
+        response: requests.Response | None = None,
+        error: Exception | None = None,
+    ) -> float | None:
+        """
+        Get the delay before sending a request again.
+
+        :param request: request sent
+        :param attempt: number of retries already made
+        :param response: response received, if any
+        :param error: exception raised, if any
+        :returns: seconds, or None if the request must not be retried
+        """
+        if attempt >= self.max_retries:
+            return None
+
+        if error is not None:
+            return self.get_backoff(attempt) if self.is_retryable_error(request, error) else None
+
+        if not self.is_retryable_response(response):
+            return None
+
+        retry_after = self.get_retry_after(response)
+        if retry_after is None:
+            return self.get_backoff(attempt)
+        if retry_after > self.max_retry_after:
+            return None
+        return retry_after
+
+    def send(
+        self,
+        send: Callable[[], requests.Response],
+        request: requests.PreparedRequest,
+        budget: RetryBudget | None = None,
+        interruption: CallInterruption | None = None,
+    ) -> requests.Response:
+        """
+        Send a request, and send it again as long as it fails with a
+        transient error.
+
+        When the request can not be retried anymore, the last response is
+        returned, or the last exception is raised.
+
+        :param send: function sending the request
+        :param request: request sent
+        :param budget: retry budget shared with other requests
+        :type budget: :class:`RetryBudget`
+        :param interruption: interruption of the backend call; no retry is
+                             sent once the call is interrupted, or after its
+                             deadline
+        :type interruption: :class:`~woob.browser.interrupt.CallInterruption`
+        :raises: :class:`~woob.browser.exceptions.BrowserInterrupted` if the
+                 call is interrupted while waiting for a retry
+        """
+        attempt = 0
+        while True:
+            try:
+                response = send()
+            except Exception as error:
+                delay = self.get_delay(request, attempt, error=error)
+                if delay is None or (budget is not None and not budget.consume()):
+                    raise
+                reason = repr(error)
+            else:
+                delay = self.get_delay(request, attempt, response=response)
+                if delay is None or (budget is not None and not budget.consume()):
+                    return response
+                reason = "%s %s" % (response.status_code, response.reason)
+                response.close()
+
+            attempt += 1
+            self.logger.info(
+                "%s %s failed (%s), retry %d/%d in %.1fs",
+                request.method,
+                request.url,
+                reason,
+                attempt,
+                self.max_retries,
+                delay,
+            )
+            if interruption is None:
+                sleep(delay)
+            elif interruption.wait(delay):
+                raise BrowserInterrupted()
@@ -0,0 +1,240 @@
+# Copyright(C) 2010-2024 Romain Bignon
+#
+# This file is part of woob.
+#
+# woob is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# woob is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with woob. If not, see <http://www.gnu.org/licenses/>.
+
+from __future__ import annotations
+
+from threading import Lock
+from time import time
+
+from woob.tools.log import getLogger
+
+from .exceptions import CircuitOpen
+
+
+__all__ = ["CLOSED", "OPEN", "HALF_OPEN", "CircuitBreaker", "CircuitBreakerRegistry", "breakers"]
+
+
+CLOSED = "closed"
+"""Requests are sent normally."""
+
+OPEN = "open"
+"""Requests fail immediately, until the cool-down is over."""
+
+HALF_OPEN = "half-open"
+"""A single request is sent to check whether the site is back."""
+
+
+class CircuitBreaker:
+    """
+    Stop sending requests to a site which keeps failing.
+
+    After ``threshold`` consecutive failures (connection errors, timeouts or
+    5xx responses), the circuit is opened: requests raise
+    :class:`~woob.browser.exceptions.CircuitOpen` without being sent, for
+    ``cooldown`` seconds. Then a single request is let through to probe the
+    site: if it succeeds, the circuit is closed again, otherwise it is
+    reopened for another cool-down.
+
+    :param key: module name and host name of the site
+    :type key: tuple[str, str]
+    :param threshold: number of consecutive failures opening the circuit
+    :type threshold: int
+    :param cooldown: duration of the open state, in seconds
+    :type cooldown: float
+    """
+
+    def __init__(self, key: tuple[str, str], threshold: int = 5, cooldown: float = 60):
+        self.key = key
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.lock = Lock()
+        self.failures = 0
+        self.opened_at: float | None = None
+        self.probing = False
+        self.logger = getLogger("woob.browser.breaker")
+
+    @property
+    def state(self) -> str:
+        """
+        Current state: :data:`CLOSED`, :data:`OPEN` or :data:`HALF_OPEN`.
+        """
+        if self.opened_at is None:
+            return CLOSED
+        if self.probing or time() >= self.retry_at:
+            return HALF_OPEN
+        return OPEN
+
+    @property
+    def retry_at(self) -> float | None:
+        """
+        Timestamp at which a request will be sent to probe the site, if the
+        circuit is open.
+        """
+        if self.opened_at is None:
+            return None
+        return self.opened_at + self.cooldown
+
+    def before_request(self):
+        """
+        Check whether a request can be sent.
+
+        :raises: :class:`~woob.browser.exceptions.CircuitOpen` if it can not
+        """
+        with self.lock:
+            if self.opened_at is None:
+                return
+
+            if not self.probing and time() >= self.retry_at:
+                # this request is the probe
+                self.probing = True
+                return
+
+            raise self.make_error()
+
+    def make_error(self) -> CircuitOpen:
+        """
+        Build the exception raised while the circuit is open.
+        """
+        return CircuitOpen(
+            "%s seems to be down, requests are suspended" % self.key[1],
+            key=self.key,
+            retry_at=self.retry_at,
+        )
+
+    def record_success(self):
+        """
+        Signal that a request succeeded.
+        """
+        with self.lock:
+            if self.opened_at is not None:
+                self.logger.info("Circuit of %s/%s is closed", *self.key)
+            self.failures = 0
+            self.opened_at = None
+            self.probing = False
+
+    def record_failure(self):
+        """
+        Signal that a request failed.
+        """
+        with self.lock:
+            self.failures += 1
+            if self.probing or (self.opened_at is None and self.failures >= self.threshold):
+                self.logger.warning(
+                    "Circuit of %s/%s is open after %d failures, retry in %gs",
+                    *self.key,
+                    self.failures,
+                    self.cooldown,
+                )
+                self.opened_at = time()
+            self.probing = False
+
+    def release(self):
+        """
+        Signal that a request ended without telling whether the site works,
+        for example because it has been interrupted.
+        """
+        with self.lock:
+            self.probing = False
+
+
+class CircuitBreakerRegistry:
+    """
+    Registry of the :class:`CircuitBreaker` shared by every browser of the
+    process, keyed by module name and host name.
+
+    It can be used to know which modules are unavailable, to avoid calling
+    them at all:
+
+    >>> if not breakers.is_open('creditmutuel'):  # doctest: +SKIP
+    ...     woob.do('iter_accounts', backends=['creditmutuel'])
+    """
+
+    def __init__(self):
+        self.lock = Lock()
+        self.breakers: dict[tuple[str, str], CircuitBreaker] = {}
+
+    def get(self, module: str, host: str, threshold: int = 5, cooldown: float = 60) -> CircuitBreaker:
+        """
+        Get the circuit breaker of a site.
+
+        :param module: module name
+        :type module: str
+        :param host: host name
+        :type host: str
+        :param threshold: number of consecutive failures opening the circuit,
+                          if it is created
+        :type threshold: int
+        :param cooldown: duration of the open state, if it is created
+        :type cooldown: float
+        """
+        key = (module, host)
+        with self.lock:
+            breaker = self.breakers.get(key)
+            if breaker is None:
+                breaker = self.breakers[key] = CircuitBreaker(key, threshold, cooldown)
+            return breaker
+
+    def get_states(self, module: str | None = None) -> dict[tuple[str, str], str]:
+        """
+        Get states of circuits.
+
+        :param module: if set, only get circuits of this module
+        :type module: str
+        :returns: state of every circuit, by module name and host name
+        :rtype: dict
+        """
+        with self.lock:
+            breakers = list(self.breakers.items())
+
+        return {key: breaker.state for key, breaker in breakers if module is None or key[0] == module}
+
+    def get_open(self, module: str) -> CircuitBreaker | None:
+        """
+        Get an open circuit of a module, if any.
+
+        :param module: module name
+        :type module: str
+        """
+        with self.lock:
+            breakers = [breaker for key, breaker in self.breakers.items() if key[0] == module]
+
+        for breaker in breakers:
+            if breaker.state == OPEN:
+                return breaker
+        return None
+
+    def is_open(self, module: str) -> bool:
+        """
+        Whether requests of a module to a site currently fail immediately.
+
+        :param module: module name
+        :type module: str
+        """
+        return self.get_open(module) is not None
+
+    def clear(self):
+        """
+        Remove every circuit breaker.
+        """
+        with self.lock:
+            self.breakers.clear()
+
+
+breakers = CircuitBreakerRegistry()
+"""
+Registry used by browsers.
+"""
@@ -28,9 +28,11 @@
 import warnings
 import zlib
 from collections import OrderedDict
+from contextlib import AbstractContextManager, nullcontext
 from copy import copy, deepcopy
 from datetime import datetime, timedelta
 from functools import wraps
+from hashlib import new as new_hash
 from hashlib import sha256
 from logging import Logger
 from threading import Lock
@@ -49,13 +51,17 @@
 from woob.tools.request import to_curl
 
 from .adapters import HTTPAdapter
+from .backoff import RetryPolicy, current_retry_budget
+from .breaker import CircuitBreaker, breakers
 from .cookies import WoobCookieJar
-from .exceptions import ClientError, HTTPNotFound, ServerError
+from .exceptions import BrowserInterrupted, ClientError, DownloadError, HTTPNotFound, ServerError
 from .har import HARManager
-from .pages import NextPage
+from .interrupt import current_interruption
+from .limits import limiters
+from .pages import NextPage, Page, shared_documents
 from .profiles import Firefox, Profile
 from .sessions import FuturesSession
-from .url import URL, normalize_url
+from .url import URL, URLIndex, normalize_url
 
 
 class Browser:
@@ -80,6 +86,9 @@ class Browser:
         TLS certificate, or a string, in which case it must be a path to a CA bundle to use.
         Defaults will use the :attr:`Browser.VERIFY` attribute.
     :type verify: `None`, `bool` or `str`
+    :param module_name: name of the module using the browser, which may not be
+        the module defining the browser class. Defaults to :meth:`get_module_name()`.
+    :type module_name: str
     """
 
     PROFILE: ClassVar[Profile] = Firefox()
@@ -113,9 +122,113 @@ class Browser:
     Maximum retries on failed requests.
     """
 
+    RETRY_POLICY: ClassVar[RetryPolicy | None] = None
+    """
+    Policy to retry requests failing with a transient error, like a
+    ``503 Service Unavailable`` response or a connection reset.
+
+    If None, requests are not retried. It can be overriden for a
+    :class:`~woob.browser.url.URL` or a request with the ``retry`` argument.
+    """
+
     MAX_WORKERS: ClassVar[int] = 10
     """
     Maximum of threads for asynchronous requests.
+
+    Note that this value may be overriden by the ``max_workers`` argument on
+    the constructor.
+    """
+
+    POOL_MAXSIZE: ClassVar[int | None] = None
+    """
+    Maximum number of connections kept open to a host.
+
+    If None, it is :attr:`MAX_WORKERS`, or the default value of requests if
+    greater.
+
+    Note that this value may be overriden by the ``pool_maxsize`` argument on
+    the constructor.
+    """
+
+    PAGINATION_PREFETCH: ClassVar[int] = 0
+    """
+    Number of next pages of a :class:`~woob.browser.elements.ListElement`
+    requested ahead, while the items of the current page are parsed.
+
+    It only works for list elements whose ``next_page`` can be evaluated
+    before parsing items, see
+    :attr:`woob.browser.elements.ListElement.next_page_prefetch`.
+    """
+
+    PREFETCH_DEPTH: ClassVar[int | None] = None
+    """
+    Number of items of a :class:`~woob.browser.elements.ListElement` whose
+    loaders (like :class:`~woob.browser.filters.standard.AsyncLoad`) are
+    scheduled ahead of the item being parsed.
+
+    If None, loaders of every item of the page are scheduled before parsing
+    the first one.
+
+    Note that this value may be overriden by the ``prefetch_depth`` argument
+    on the constructor.
+    """
+
+    COALESCE_REQUESTS: ClassVar[bool] = False
+    """
+    Share the network exchange of identical GET and HEAD requests sent at
+    the same time, for example with :meth:`async_open()` from several
+    threads.
+
+    Every caller gets its own copy of the response.
+    """
+
+    CONCURRENCY_LIMIT: ClassVar[int | None] = None
+    """
+    Maximum number of requests sent at the same time to a site.
+
+    This limit is shared by every browser of the process accessing the same
+    site, see :attr:`LIMIT_SCOPE`.
+    """
+
+    RATE_LIMIT: ClassVar[str | float | None] = None
+    """
+    Maximum rate of requests sent to a site.
+
+    It is either a string like ``'10/s'``, ``'600/min'`` or ``'1/5s'``, which
+    allows bursts of that number of requests, or a number of requests per
+    second, always spaced. See :func:`woob.browser.limits.parse_rate`.
+
+    This limit is shared by every browser of the process accessing the same
+    site, see :attr:`LIMIT_SCOPE`.
+    """
+
+    LIMIT_SCOPE: ClassVar[str] = "host"
+    """
+    Scope of :attr:`CONCURRENCY_LIMIT` and :attr:`RATE_LIMIT`.
+
+    If ``"host"``, limits apply to each host name, and if ``"module"``, to
+    all requests made by browsers of the module.
+
+    Limits can also be set at runtime with
+    :meth:`woob.browser.limits.LimiterRegistry.configure`.
+    """
+
+    CIRCUIT_BREAKER_THRESHOLD: ClassVar[int | None] = None
+    """
+    Number of consecutive failures of requests to a site (connection errors,
+    timeouts or 5xx responses) after which requests fail immediately with
+    :class:`~woob.browser.exceptions.CircuitOpen`, instead of being sent.
+
+    The state of the circuit is shared by every browser of the module in the
+    process, see :class:`woob.browser.breaker.CircuitBreakerRegistry`.
+    If None, there is no circuit breaker.
+    """
+
+    CIRCUIT_BREAKER_COOLDOWN: ClassVar[float] = 60.0
+    """
+    Duration, in seconds, during which requests fail immediately once the
+    circuit is open. A single request is then sent to check whether the site
+    is back.
     """
 
     ALLOW_REFERRER: ClassVar[bool] = True
@@ -167,6 +280,10 @@ def __init__(
         weboob: None = None,
         *,
         verify: bool | str | None = None,
+        max_workers: int | None = None,
+        pool_maxsize: int | None = None,
+        prefetch_depth: int | None = None,
+        module_name: str | None = None,
     ):
 
         if woob is not None or weboob is not None:
@@ -184,6 +301,7 @@ def __init__(
         self.responses_dirname = responses_dirname
         self.responses_count = 0
         self.responses_lock = Lock()
+        self.module_name = module_name or self.get_module_name()
 
         if self.logger.settings["ssl_insecure"]:
             self.verify = False
@@ -195,6 +313,13 @@ def __init__(
         if isinstance(self.verify, str):
             self.verify = self.asset(self.verify)
 
+        if max_workers is not None:
+            self.MAX_WORKERS = max_workers
+        if pool_maxsize is not None:
+            self.POOL_MAXSIZE = pool_maxsize
+        if prefetch_depth is not None:
+            self.PREFETCH_DEPTH = prefetch_depth
+
         self.PROXIES = proxy or {}
         self.proxy_headers = proxy_headers or {}
         self._setup_session(self.PROFILE)
@@ -365,6 +490,8 @@ def _create_session(self) -> requests.Session:
             max_workers=self.MAX_WORKERS,
             max_retries=self.MAX_RETRIES,
             adapter_class=self.HTTP_ADAPTER_CLASS,
+            pool_maxsize=self.POOL_MAXSIZE,
+            coalesce=self.COALESCE_REQUESTS,
         )
 
     def _setup_session(self, profile: Profile):
@@ -392,10 +519,14 @@ def _setup_session(self, profile: Profile):
 
         adapter_kwargs["proxy_headers"] = self.proxy_headers
 
+        adapter_kwargs["limiter"] = self.limit_request
+        adapter_kwargs["breaker"] = self.get_circuit_breaker
+
         # set connection pool size equal to MAX_WORKERS if needed
-        if self.MAX_WORKERS > requests.adapters.DEFAULT_POOLSIZE:
-            adapter_kwargs["pool_connections"] = self.MAX_WORKERS
-            adapter_kwargs["pool_maxsize"] = self.MAX_WORKERS
+        pool_maxsize = self.POOL_MAXSIZE or max(self.MAX_WORKERS, requests.adapters.DEFAULT_POOLSIZE)
+        if pool_maxsize != requests.adapters.DEFAULT_POOLSIZE:
+            adapter_kwargs["pool_connections"] = pool_maxsize
+            adapter_kwargs["pool_maxsize"] = pool_maxsize
 
         session.mount("http://", self.HTTP_ADAPTER_CLASS(**adapter_kwargs))
         session.mount("https://", self.HTTP_ADAPTER_CLASS(**adapter_kwargs))
@@ -415,6 +546,55 @@ def _setup_session(self, profile: Profile):
         if self.COOKIE_POLICY:
             session.cookies.set_policy(self.COOKIE_POLICY)
 
+    def get_limit_key(self, request: requests.PreparedRequest) -> str | None:
+        """
+        Get the key of the limiter to use for a request.
+
+        By default, it is the host name or the module name, according to
+        :attr:`LIMIT_SCOPE`.
+        """
+        if self.LIMIT_SCOPE == "module":
+            return self.module_name
+        return urlparse(request.url).hostname
+
+    @classmethod
+    def get_module_name(cls) -> str:
+        """
+        Get the name of the module defining the browser class.
+
+        A module may use the browser of another module, so the name of the
+        module using the browser is :attr:`module_name`.
+        """
+        # modules are loaded as woob_modules.<name>
+        parts = cls.__module__.split(".")
+        if len(parts) > 1 and parts[0] == "woob_modules":
+            return parts[1]
+        return cls.__module__
+
+    def get_circuit_breaker(self, request: requests.PreparedRequest) -> CircuitBreaker | None:
+        """
+        Get the circuit breaker of the site of a request.
+
+        See :attr:`CIRCUIT_BREAKER_THRESHOLD`.
+        """
+        host = urlparse(request.url).hostname
+        if self.CIRCUIT_BREAKER_THRESHOLD is None or not host:
+            return None
+        return breakers.get(self.module_name, host, self.CIRCUIT_BREAKER_THRESHOLD, self.CIRCUIT_BREAKER_COOLDOWN)
+
+    def limit_request(self, request: requests.PreparedRequest) -> AbstractContextManager:
+        """
+        Get a context manager held while a request is running.
+
+        It waits for the limiter of the site, shared by every browser of the
+        process, see :attr:`CONCURRENCY_LIMIT` and :attr:`RATE_LIMIT`.
+        """
+        key = self.get_limit_key(request)
+        limiter = limiters.get(key, self.CONCURRENCY_LIMIT, self.RATE_LIMIT) if key else None
+        if limiter is None:
+            return nullcontext()
+        return limiter.limit(owner=self)
+
     def set_profile(self, profile: Profile):
         """
         Update the profile of the session.
@@ -448,6 +628,7 @@ def open(
         data_encoding: str | None = None,
         is_async: bool = False,
         callback: Callable[[requests.Response], requests.Response] | None = None,
+        retry: RetryPolicy | bool | None = None,
         **kwargs,
     ) -> requests.Response:
         """
@@ -516,10 +697,21 @@ def open(
                          with response as its first and only argument
         :type callback: callable
 
+        :param retry: (optional) Policy to retry the request if it fails with a transient error.
+                      If not provided, uses the :attr:`Browser.RETRY_POLICY` class attribute value.
+                      True to use a default policy if there is none, False to disable retries.
+        :type retry: :class:`~woob.browser.backoff.RetryPolicy` or bool
+
         :return: :class:`requests.Response <Response>` object
         :rtype: :class:`requests.Response`
         """
 
+        # the interruption of the backend call, read here as async requests
+        # are sent from other threads
+        interruption = current_interruption.get()
+        if interruption is not None:
+            interruption.check()
+
         if isinstance(url, str):
             url = normalize_url(url)
         elif isinstance(url, requests.Request):
@@ -547,9 +739,24 @@ def open(
         if callback is None:
             callback = lambda response: response
 
+        if retry is None:
+            retry = self.RETRY_POLICY
+        elif retry is True:
+            retry = self.RETRY_POLICY or RetryPolicy()
+        send_kwargs = {}
+        if retry:
+            # the budget of the backend call, read here as async requests
+            # are sent from other threads
+            send_kwargs.update(retry=retry, retry_budget=current_retry_budget.get(), interruption=interruption)
+
         # We define an inner_callback here in order to execute the same code
         # regardless of is_async param.
         def inner_callback(future, response):
+            if interruption is not None:
+                interruption.check()
+                if stream:
+                    interruption.track(response)
+
             if allow_redirects:
                 response = self.handle_refresh(response)
 
@@ -568,6 +775,7 @@ def inner_callback(future, response):
                 proxies=proxies,
                 callback=inner_callback,
                 is_async=is_async,
+                **send_kwargs,
             )
         except Exception as error:
             # response in these kind of exception are already stored in HAR
@@ -605,6 +813,129 @@ def async_open(self, url: str, **kwargs) -> requests.Response:
             del kwargs["is_async"]
         return self.open(url, is_async=True, **kwargs)
 
+    def download(
+        self,
+        url: str | requests.Request,
+        dest: str | os.PathLike,
+        *,
+        resume: bool = True,
+        size: int | None = None,
+        checksum: str | None = None,
+        chunk_size: int = 64 * 1024,
+        **kwargs,
+    ) -> str:
+        """
+        Download a file to disk, without loading it in memory.
+
+        The content is written in chunks to ``dest`` suffixed with ``.part``,
+        which is renamed to ``dest`` once the download is complete and
+        verified. If the download is interrupted, the next call resumes it
+        with a ``Range`` request, if the server supports it.
+
+        >>> Browser().download('https://example.org/big.pdf', 'big.pdf', checksum='sha256:5e3f...')  # doctest: +SKIP
+
+        :param url: URL of the file
+        :param dest: path of the file to write
+        :param resume: resume a previous interrupted download
+        :type resume: bool
+        :param size: expected size of the file, in bytes
+        :type size: int
+        :param checksum: expected digest of the file, as ``algorithm:hexdigest``,
+                         where algorithm is supported by :func:`hashlib.new`
+        :type checksum: str
+        :param chunk_size: size of chunks read from the network
+        :type chunk_size: int
+        :param kwargs: other arguments of :meth:`open()`
+        :return: path of the downloaded file
+        :rtype: str
+        :raises: :class:`~woob.browser.exceptions.DownloadError` if the file
+                 has not the expected size or checksum
+        """
+        dest = os.fspath(dest)
+        part = dest + ".part"
+        headers = dict(kwargs.pop("headers", None) or {})
+
+        if checksum is not None:
+            algorithm, _, digest = checksum.partition(":")
+            # check the algorithm before downloading
+            new_hash(algorithm)
+
+        offset = os.path.getsize(part) if resume and os.path.exists(part) else 0
+        if offset:
+            headers["Range"] = "bytes=%d-" % offset
+
+        try:
+            response = self.open(url, stream=True, headers=headers, **kwargs)
+        except ClientError as exc:
+            if not offset or exc.response.status_code != 416:
+                raise
+            # the part file is not a prefix of the file anymore
+            self.logger.debug("Unable to resume download of %s, restarting", url)
+            os.remove(part)
+            headers.pop("Range")
+            return self.download(url, dest, resume=False, size=size, checksum=checksum, headers=headers, **kwargs)
+
+        with response:
+            total = None
+            mode = "wb"
+            if response.status_code == 206:
+                m = re.match(r"bytes (\d+)-\d+/(\d+|\*)", response.headers.get("Content-Range", ""))
+                if m and int(m.group(1)) == offset:
+                    mode = "ab"
+                    if m.group(2) != "*":
+                        total = int(m.group(2))
+                else:
+                    response.close()
+                    os.remove(part)
+                    headers.pop("Range")
+                    return self.download(
+                        url, dest, resume=False, size=size, checksum=checksum, headers=headers, **kwargs
+                    )
+            elif (
+                "Content-Length" in response.headers
+                and response.headers.get("Content-Encoding", "identity") == "identity"
+            ):
+                total = int(response.headers["Content-Length"])
+
+            if mode == "ab":
+                self.logger.debug("Resuming download of %s at %d bytes", url, offset)
+
+            with open(part, mode) as fp:
+                for chunk in response.iter_content(chunk_size):
+                    fp.write(chunk)
+                fp.flush()
+                os.fsync(fp.fileno())
+
+        # the response is closed when the call is interrupted, so the part
+        # file may be incomplete; keep it to resume the download
+        interruption = current_interruption.get()
+        if interruption is not None:
+            interruption.check()
+
+        length = os.path.getsize(part)
+        if total is not None and length < total:
+            # keep the part file to resume the download
+            raise DownloadError("Incomplete download of %s: got %d bytes of %d" % (url, length, total))
+
+        if (total is not None and length != total) or (size is not None and length != size):
+            os.remove(part)
+            raise DownloadError(
+                "Unexpected size of %s: got %d bytes instead of %d" % (url, length, total if size is None else size)
+            )
+
+        if checksum is not None:
+            hasher = new_hash(algorithm)
+            with open(part, "rb") as fp:
+                for chunk in iter(lambda: fp.read(chunk_size), b""):
+                    hasher.update(chunk)
+
+            if hasher.hexdigest() != digest.lower():
+                os.remove(part)
+                raise DownloadError("Checksum mismatch of %s: got %s:%s" % (url, algorithm, hasher.hexdigest()))
+
+        os.replace(part, dest)
+        return dest
+
     def raise_for_status(self, response: requests.Response):
         """
         Like :meth:`requests.Response.raise_for_status()` but will use other
@@ -945,6 +1276,7 @@ class PagesBrowser(DomainBrowser):
     """
 
     _urls = None
+    _url_index = None
 
     def __init__(self, *args, **kwargs):
         self._urls = OrderedDict()
@@ -979,10 +1311,12 @@ def __setattr__(self, key, value):
                 value = copy(value)
                 value.browser = self
                 self._urls[key] = value
+                self._url_index = None
             elif key in self._urls:
                 # We want to remove the URL from our mapping only.
                 url = self._urls.pop(key)
                 url.browser = None
+                self._url_index = None
 
         super().__setattr__(key, value)
 
@@ -991,6 +1325,7 @@ def __delattr__(self, key):
             if key in self._urls:
                 # We want to remove the URL from our mapping.
                 del self._urls[key]
+                self._url_index = None
 
         super().__delattr__(key)
 
@@ -1000,10 +1335,17 @@ def open(self, *args, **kwargs) -> requests.Response:
         :meth:`~woob.browser.browsers.DomainBrowser.open`, but the
         response contains an attribute ``page`` if the url matches any
         :class:`~woob.browser.url.URL` object.
+
+        :param page: (optional) class of the page of the response, instead
+                     of the page of the matching URL
+        :param match_page: (optional) if False, the response has no page, and
+                           its content is not read (default: True)
+        :type match_page: bool
         """
 
         callback = kwargs.pop("callback", lambda response: response)
         page_class = kwargs.pop("page", None)
+        match_page = kwargs.pop("match_page", True)
 
         # Have to define a callback to seamlessly process synchronous and
         # asynchronous requests, see :meth:`Browser.open` and its `is_async`
@@ -1014,12 +1356,12 @@ def internal_callback(response):
             if page_class:
                 response.page = page_class(self, response)
                 return callback(response)
+            if not match_page:
+                return callback(response)
 
-            for url in self._urls.values():
-                response.page = url.handle(response)
-                if response.page is not None:
-                    self.logger.debug("Handle %s with %s", response.url, response.page.__class__.__name__)
-                    break
+            response.page = self.find_page(response)
+            if response.page is not None:
+                self.logger.debug("Handle %s with %s", response.url, response.page.__class__.__name__)
 
             if response.page is None:
                 regexp = r"^(?P<proto>\w+)://.*"
@@ -1038,6 +1380,31 @@ def internal_callback(response):
 
         return super().open(callback=internal_callback, *args, **kwargs)
 
+    def download(self, *args, **kwargs) -> str:
+        """
+        Same method than :meth:`~woob.browser.browsers.Browser.download`,
+        but the response is not handled by a page, as it would read the
+        whole file in memory.
+        """
+        kwargs.setdefault("match_page", False)
+        return super().download(*args, **kwargs)
+
+    def find_page(self, response: requests.Response) -> Page | None:
+        """
+        Get the page of the first :class:`~woob.browser.url.URL` object
+        handling a response, if any.
+        """
+        if self._url_index is None:
+            self._url_index = URLIndex(self._urls.values())
+
+        # candidate pages parse the response only once
+        with shared_documents(response):
+            for url in self._url_index.candidates(response):
+                page = url.handle(response)
+                if page is not None:
+                    return page
+        return None
+
     def location(self, *args, **kwargs) -> requests.Response:
         """
         Same method than :meth:`~woob.browser.browsers.Browser.location`, but
@@ -1050,7 +1417,20 @@ def location(self, *args, **kwargs) -> requests.Response:
             self.page.on_leave()
 
         response = self.open(*args, **kwargs)
+        return self._load_response(response)
+
+    def load_response(self, response: requests.Response) -> requests.Response:
+        """
+        Set a response got with :meth:`open()`, for example with
+        :meth:`async_open()`, as the current one, like :meth:`location()` does.
+        """
+        if self.page is not None:
+            # Call leave hook.
+            self.page.on_leave()
 
+        return self._load_response(response)
+
+    def _load_response(self, response: requests.Response) -> requests.Response:
         self.response = response
         self.page = response.page
         self.url = response.url
@@ -1089,13 +1469,19 @@ def pagination(self, func: Callable, *args, **kwargs):
         >>> list(b.pagination(lambda: b.page.iter_values()))
         ['One', 'Two', 'Three', 'Four']
 
+        If the :class:`~woob.browser.pages.NextPage` exception has a prefetched
+        response, it is used instead of requesting the next page again.
+
         .. note: consider using :func:`~woob.browser.pages.pagination` decorator instead.
         """
         while True:
             try:
                 yield from func(*args, **kwargs)
             except NextPage as e:
-                self.location(e.request)
+                if e.prefetched is not None:
+                    self.load_response(e.prefetched.result())
+                else:
+                    self.location(e.request)
             else:
                 return
 
@@ -15,27 +15,574 @@
 # You should have received a copy of the GNU Lesser General Public License
 # along with woob. If not, see <http://www.gnu.org/licenses/>.
 
-__all__ = ["CacheMixin"]
+import json
+import os
+import sqlite3
+import tempfile
+from collections import Counter, OrderedDict
+from email.utils import parsedate_to_datetime
+from hashlib import sha256
+from threading import Lock
+from time import time, time_ns
+
+from requests import Response
+from requests.structures import CaseInsensitiveDict
+
+
+__all__ = ["CacheMixin", "CacheStore", "MemoryStore", "SQLiteStore", "DirectoryStore", "open_cache_store"]
+
+
+def parse_cache_control(value):
+    """
+    Parse a ``Cache-Control`` header.
+
+    :returns: directives, with their value or None
+    :rtype: dict
+    """
+    directives = {}
+    for directive in (value or "").split(","):
+        name, _, arg = directive.partition("=")
+        name = name.strip().lower()
+        if name:
+            directives[name] = arg.strip().strip('"') or None
+    return directives
+
+
+def parse_http_date(value):
+    """
+    Parse a HTTP date.
+
+    :returns: the timestamp, or None if the date is invalid
+    """
+    try:
+        return parsedate_to_datetime(value).timestamp()
+    except (TypeError, ValueError, IndexError):
+        return None
 
 
 class CacheEntry:
-    def __init__(self, response):
+    def __init__(self, response, stored_at=None, vary=None):
         self.response = response
         self.etag = response.headers.get("ETag")
         self.last_modified = response.headers.get("Last-Modified")
+        self.stored_at = time() if stored_at is None else stored_at
+
+        if vary is None:
+            # values of request headers used to select this response
+            vary = {}
+            if response.request is not None:
+                for name in self.vary_headers:
+                    vary[name] = response.request.headers.get(name)
+        self.vary = vary
+
+    @property
+    def cache_control(self):
+        return parse_cache_control(self.response.headers.get("Cache-Control"))
+
+    @property
+    def vary_headers(self):
+        return [name.strip().lower() for name in self.response.headers.get("Vary", "").split(",") if name.strip()]
 
     def has_cache_key(self):
         return self.etag or self.last_modified
 
+    def is_storable(self):
+        """Whether the response can be stored, according to RFC 7234."""
+        if self.response.status_code != 200 or "no-store" in self.cache_control or "*" in self.vary_headers:
+            return False
+        return bool(self.has_cache_key()) or self.freshness_lifetime() is not None
+
+    def freshness_lifetime(self):
+        """
+        Get the time during which the response can be used without
+        revalidation, in seconds, or None if the server doesn't say.
+        """
+        cache_control = self.cache_control
+        if "max-age" in cache_control:
+            try:
+                return max(0, int(cache_control["max-age"]))
+            except (TypeError, ValueError):
+                return 0
+
+        if "Expires" in self.response.headers:
+            expires = parse_http_date(self.response.headers["Expires"])
+            if expires is None:
+                # invalid dates, like "0", mean already expired
+                return 0
+            date = parse_http_date(self.response.headers.get("Date")) or self.stored_at
+            return max(0, expires - date)
+
+        return None
+
+    def current_age(self):
+        """Get the age of the response, in seconds."""
+        try:
+            age = max(0, int(self.response.headers.get("Age", 0)))
+        except ValueError:
+            age = 0
+
+        date = parse_http_date(self.response.headers.get("Date"))
+        if date is not None:
+            age = max(age, self.stored_at - date)
+        return age + time() - self.stored_at
+
+    def is_fresh(self):
+        """Whether the response can be used without revalidation."""
+        if "no-cache" in self.cache_control:
+            return False
+
+        lifetime = self.freshness_lifetime()
+        return lifetime is not None and self.current_age() < lifetime
+
+    def matches(self, request):
+        """Whether the response has been selected with the same headers as the request."""
+        return all(request.headers.get(name) == value for name, value in self.vary.items())
+
     def update_request(self, request):
         if self.last_modified:
             request.headers["If-Modified-Since"] = self.last_modified
         if self.etag:
             request.headers["If-None-Match"] = self.etag
 
+    def revalidate(self, response):
+        """Update the entry with the headers of a 304 response."""
+        for name, value in response.headers.items():
+            if name.lower() not in ("content-length", "content-encoding", "transfer-encoding"):
+                self.response.headers[name] = value
+        self.etag = self.response.headers.get("ETag")
+        self.last_modified = self.response.headers.get("Last-Modified")
+        self.stored_at = time()
+
+    @property
+    def size(self):
+        """Approximate size of the entry, in bytes."""
+        return len(self.response.content) + sum(len(k) + len(v) for k, v in self.response.headers.items())
+
+    def dump(self):
+        """
+        Get the metadata of the entry, which can be serialized in JSON.
+
+        The response content is not included.
+        """
+        return {
+            "url": self.response.url,
+            "status_code": self.response.status_code,
+            "reason": self.response.reason,
+            "encoding": self.response.encoding,
+            "headers": list(self.response.headers.items()),
+            "stored_at": self.stored_at,
+            "vary": self.vary,
+        }
+
+    @classmethod
+    def load(cls, meta, content):
+        """
+        Build an entry from metadata returned by :meth:`dump` and the
+        response content.
+        """
+        response = Response()
+        response._content = content
+        response.url = meta["url"]
+        response.status_code = meta["status_code"]
+        response.reason = meta["reason"]
+        response.encoding = meta["encoding"]
+        response.headers = CaseInsensitiveDict(meta["headers"])
+        return cls(response, stored_at=meta["stored_at"], vary=meta.get("vary", {}))
+
+
+class CacheStore:
+    """
+    Base class of stores of :class:`CacheMixin`.
+
+    Stores behave like a dict of cache entries. Entries older than ``ttl``
+    are removed, and least recently used entries are removed when the size
+    of the store exceeds ``max_size``.
+
+    :param max_size: maximum size of the store, in bytes
+    :type max_size: int or None
+    :param ttl: time to live of entries, in seconds
+    :type ttl: float or None
+    """
+
+    def __init__(self, max_size=None, ttl=None):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.lock = Lock()
+
+    def is_expired(self, stored_at):
+        return self.ttl is not None and stored_at + self.ttl < time()
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def __contains__(self, key):
+        return self.get(key) is not None
+
+    def __getitem__(self, key):
+        raise NotImplementedError()
+
+    def __setitem__(self, key, entry):
+        raise NotImplementedError()
+
+    def __delitem__(self, key):
+        raise NotImplementedError()
+
+    def __len__(self):
+        raise NotImplementedError()
+
+    def clear(self):
+        raise NotImplementedError()
+
+
+class MemoryStore(CacheStore):
+    """
+    Store entries in memory.
+    """
+
+    def __init__(self, max_size=None, ttl=None):
+        super().__init__(max_size, ttl)
+        self.entries = OrderedDict()
+        self.sizes = {}
+        self.size = 0
+
+    def __getitem__(self, key):
+        with self.lock:
+            entry = self.entries[key]
+            if self.is_expired(entry.stored_at):
+                self._remove(key)
+                raise KeyError(key)
+
+            self.entries.move_to_end(key)
+            return entry
+
+    def __setitem__(self, key, entry):
+        with self.lock:
+            if key in self.entries:
+                self._remove(key)
+
+            self.entries[key] = entry
+            self.sizes[key] = entry.size
+            self.size += self.sizes[key]
+            while self.max_size is not None and self.size > self.max_size and self.entries:
+                self._remove(next(iter(self.entries)))
+
+    def __delitem__(self, key):
+        with self.lock:
+            self._remove(key)
+
+    def _remove(self, key):
+        del self.entries[key]
+        self.size -= self.sizes.pop(key)
+
+    def __len__(self):
+        return len(self.entries)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.sizes.clear()
+            self.size = 0
+
+
+def _hash_key(key):
+    if isinstance(key, str):
+        key = key.encode("utf-8")
+    elif not isinstance(key, bytes):
+        key = repr(key).encode("utf-8")
+    return sha256(key).hexdigest()
+
+
+class SQLiteStore(CacheStore):
+    """
+    Store entries in a SQLite database.
+
+    The database can be shared by several processes.
+
+    :param path: path to the database file
+    :type path: str
+    """
+
+    def __init__(self, path, max_size=None, ttl=None):
+        super().__init__(max_size, ttl)
+        self.path = path
+        self.db = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+        with self.lock:
+            self.db.execute(
+                "CREATE TABLE IF NOT EXISTS cache ("
+                "key TEXT PRIMARY KEY, meta TEXT, content BLOB, size INTEGER, stored_at REAL, accessed_at REAL)"
+            )
+            self.db.execute("CREATE INDEX IF NOT EXISTS cache_accessed_at ON cache (accessed_at)")
+
+    def __getitem__(self, key):
+        hkey = _hash_key(key)
+        with self.lock:
+            row = self.db.execute("SELECT meta, content, stored_at FROM cache WHERE key = ?", (hkey,)).fetchone()
+            if row is None:
+                raise KeyError(key)
+
+            meta, content, stored_at = row
+            if self.is_expired(stored_at):
+                self.db.execute("DELETE FROM cache WHERE key = ?", (hkey,))
+                raise KeyError(key)
+
+            self.db.execute("UPDATE cache SET accessed_at = ? WHERE key = ?", (time(), hkey))
+
+        return CacheEntry.load(json.loads(meta), content)
+
+    def __setitem__(self, key, entry):
+        hkey = _hash_key(key)
+        with self.lock:
+            self.db.execute(
+                "INSERT OR REPLACE INTO cache (key, meta, content, size, stored_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (hkey, json.dumps(entry.dump()), entry.response.content, entry.size, entry.stored_at, time()),
+            )
+            if self.max_size is not None:
+                self._evict()
+
+    def _evict(self):
+        (size,) = self.db.execute("SELECT COALESCE(SUM(size), 0) FROM cache").fetchone()
+        if size <= self.max_size:
+            return
+
+        keys = []
+        for hkey, entry_size in self.db.execute("SELECT key, size FROM cache ORDER BY accessed_at"):
+            if size <= self.max_size:
+                break
+            keys.append((hkey,))
+            size -= entry_size
+
+        self.db.executemany("DELETE FROM cache WHERE key = ?", keys)
+
+    def __delitem__(self, key):
+        with self.lock:
+            cursor = self.db.execute("DELETE FROM cache WHERE key = ?", (_hash_key(key),))
+            if not cursor.rowcount:
+                raise KeyError(key)
+
+    def __len__(self):
+        with self.lock:
+            return self.db.execute("SELECT COUNT(*) FROM cache").fetchone()[0]
+
+    def clear(self):
+        with self.lock:
+            self.db.execute("DELETE FROM cache")
+
+    def close(self):
+        with self.lock:
+            self.db.close()
+
+
+class DirectoryStore(CacheStore):
+    """
+    Store entries in a directory.
+
+    Response contents are stored once in the ``objects`` sub-directory,
+    named after their SHA-256 hash, so identical contents served at
+    different URLs share the same file. Metadata are stored in JSON files
+    in the ``entries`` sub-directory.
+
+    :param path: path to the directory
+    :type path: str
+    """
+
+    def __init__(self, path, max_size=None, ttl=None):
+        super().__init__(max_size, ttl)
+        self.path = path
+        self.entries_path = os.path.join(path, "entries")
+        self.objects_path = os.path.join(path, "objects")
+        os.makedirs(self.entries_path, exist_ok=True)
+        os.makedirs(self.objects_path, exist_ok=True)
+        # total size of entries, computed on first write when max_size is set
+        self.size = None
+
+    def _entry_path(self, key):
+        return os.path.join(self.entries_path, "%s.json" % _hash_key(key))
+
+    def _object_path(self, digest):
+        return os.path.join(self.objects_path, digest[:2], digest)
+
+    def _write(self, path, data):
+        # write in a temporary file first, so readers never see a partial file
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as fp:
+                fp.write(data)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    def _touch(self, path):
+        # the modification time of the entry file is used for LRU, set it
+        # precisely as the file system clock may be too coarse
+        now = time_ns()
+        os.utime(path, ns=(now, now))
+
+    def __getitem__(self, key):
+        path = self._entry_path(key)
+        with self.lock:
+            try:
+                with open(path, encoding="utf-8") as fp:
+                    meta = json.load(fp)
+                if self.is_expired(meta["stored_at"]):
+                    os.unlink(path)
+                    if self.size is not None:
+                        self.size -= meta["size"]
+                    raise KeyError(key)
+
+                with open(self._object_path(meta["digest"]), "rb") as fp:
+                    content = fp.read()
+
+                self._touch(path)
+            except (OSError, ValueError) as exc:
+                raise KeyError(key) from exc
+
+        return CacheEntry.load(meta, content)
+
+    def __setitem__(self, key, entry):
+        content = entry.response.content
+        meta = entry.dump()
+        meta["digest"] = sha256(content).hexdigest()
+        meta["size"] = entry.size
+
+        with self.lock:
+            object_path = self._object_path(meta["digest"])
+            if not os.path.exists(object_path):
+                os.makedirs(os.path.dirname(object_path), exist_ok=True)
+                self._write(object_path, content)
+
+            entry_path = self._entry_path(key)
+            old_size = self._read_size(entry_path)
+            self._write(entry_path, json.dumps(meta).encode("utf-8"))
+            self._touch(entry_path)
+
+            if self.max_size is None:
+                return
+
+            if self.size is None:
+                self.size = sum(meta["size"] for _, _, meta in self._iter_entries())
+            else:
+                self.size += meta["size"] - old_size
+            if self.size > self.max_size:
+                self._evict()
+
+    def _read_size(self, path):
+        try:
+            with open(path, encoding="utf-8") as fp:
+                return json.load(fp)["size"]
+        except (OSError, ValueError, KeyError):
+            return 0
+
+    def _iter_entries(self):
+        for name in os.listdir(self.entries_path):
+            if not name.endswith(".json"):
+                continue
+            path = os.path.join(self.entries_path, name)
+            try:
+                with open(path, encoding="utf-8") as fp:
+                    meta = json.load(fp)
+                yield path, os.stat(path).st_mtime_ns, meta
+            except (OSError, ValueError):
+                continue
+
+    def _evict(self):
+        entries = sorted(self._iter_entries(), key=lambda entry: entry[1])
+        digests = {meta["digest"] for _, _, meta in entries}
+        size = sum(meta["size"] for _, _, meta in entries)
+
+        while entries and size > self.max_size:
+            path, _, meta = entries.pop(0)
+            os.unlink(path)
+            size -= meta["size"]
+        # entries may also have been written by other processes
+        self.size = size
+
+        self._collect({meta["digest"] for _, _, meta in entries}, digests)
+
+    def _collect(self, used, digests):
+        # remove contents which are not used anymore
+        for digest in digests - used:
+            try:
+                os.unlink(self._object_path(digest))
+            except OSError:
+                pass
+
+    def __delitem__(self, key):
+        with self.lock:
+            try:
+                with open(self._entry_path(key), encoding="utf-8") as fp:
+                    meta = json.load(fp)
+                digest = meta["digest"]
+                os.unlink(self._entry_path(key))
+            except (OSError, ValueError) as exc:
+                raise KeyError(key) from exc
+
+            if self.size is not None:
+                self.size -= meta["size"]
+
+            self._collect({meta["digest"] for _, _, meta in self._iter_entries()}, {digest})
+
+    def __len__(self):
+        return sum(1 for name in os.listdir(self.entries_path) if name.endswith(".json"))
+
+    def clear(self):
+        with self.lock:
+            entries = list(self._iter_entries())
+            for path, _, _ in entries:
+                os.unlink(path)
+            self._collect(set(), {meta["digest"] for _, _, meta in entries})
+            if self.size is not None:
+                self.size = 0
+
+
+def open_cache_store(spec, max_size=None, ttl=None):
+    """
+    Build a cache store from a specification.
+
+    The specification is one of:
+
+    * ``memory``: :class:`MemoryStore`;
+    * ``sqlite:PATH``: :class:`SQLiteStore` in the ``PATH`` file;
+    * ``directory:PATH``: :class:`DirectoryStore` in the ``PATH`` directory.
+
+    :param spec: specification of the store
+    :type spec: str
+    :param max_size: maximum size of the store, in bytes
+    :type max_size: int or None
+    :param ttl: time to live of entries, in seconds
+    :type ttl: float or None
+    :rtype: :class:`CacheStore`
+    """
+    kind, _, path = spec.partition(":")
+    if kind == "memory":
+        return MemoryStore(max_size, ttl)
+
+    if not path:
+        raise ValueError("A path is required for the %r cache store" % kind)
+    path = os.path.expanduser(path)
+
+    if kind == "sqlite":
+        return SQLiteStore(path, max_size, ttl)
+    if kind == "directory":
+        return DirectoryStore(path, max_size, ttl)
+    raise ValueError("Unknown cache store %r" % kind)
+
 
 class CacheMixin:
-    """Mixin to inherit in a Browser"""
+    """Mixin to inherit in a Browser
+
+    :param cache_store: store of the cache (default is an unbounded
+                        :class:`MemoryStore`)
+    :type cache_store: :class:`CacheStore`
+    :param cache_namespace: prefix of the keys of the cache, to share a
+                            persistent store between browsers of several
+                            users without mixing their responses
+    :type cache_namespace: str
+    """
 
     cache_is_updatable = True
 
@@ -52,45 +599,100 @@ class CacheMixin:
     obsolete page in the cache.
     """
 
-    def __init__(self, *args, **kwargs):
+    cache_methods = ("GET", "HEAD")
+
+    """HTTP methods of requests whose responses are cached"""
+
+    def __init__(self, *args, cache_store=None, cache_namespace=None, **kwargs):
         super().__init__(*args, **kwargs)
 
-        self.cache = {}
+        self.cache = cache_store if cache_store is not None else MemoryStore()
+        self.cache_namespace = cache_namespace
 
         """Cache store object
 
-        To limit the size of the cache, a :class:`woob.tools.lrudict.LimitedLRUDict`
-        instance can be used.
+        It can be any :class:`CacheStore`, like a :class:`SQLiteStore` to
+        keep the cache between runs. A dict, or a
+        :class:`woob.tools.lrudict.LimitedLRUDict` instance, can also be
+        used.
+        """
+
+        self.cache_stats = Counter()
+
+        """Cache statistics
+
+        Number of responses returned from the cache without request
+        (``hits``), after a revalidation by the server (``revalidations``),
+        and from the server (``misses``).
         """
 
     def make_cache_key(self, request):
-        """Make a key for the cache corresponding to the request."""
+        """Make a key for the cache corresponding to the prepared request.
+
+        Request headers are not part of the key: a cached response is only
+        used for requests with the same values of the headers listed in its
+        ``Vary`` header.
+        """
+
+        return (request.method, request.url, request.body)
 
-        body = getattr(request, "body", None)
-        headers = tuple(request.headers.values())
-        return (request.method, request.url, body, headers)
+    def get_cached_response(self, entry, request):
+        """Get the response of a cache entry."""
+
+        response = entry.response
+        if response.request is None:
+            # entry has been loaded from a persistent store
+            response.request = request
+        if not hasattr(response, "page") and hasattr(self, "find_page"):
+            response.page = self.find_page(response)
+        return response
 
     def open_with_cache(self, url, **kwargs):
-        """Perform a request using the cache if possible."""
+        """Perform a request using the cache if possible.
+
+        Caching follows RFC 7234: a response is returned from the cache
+        without any request while it is fresh according to its
+        ``Cache-Control: max-age`` or ``Expires`` headers, it is revalidated
+        with its ``ETag`` or ``Last-Modified`` headers once stale, and it is
+        never stored if it has a ``Cache-Control: no-store`` header.
+        """
         request = self.build_request(url, **kwargs)
+        if hasattr(self, "absurl"):
+            request.url = self.absurl(request.url)
+        prepared = self.prepare_request(request)
+
+        request_cache_control = parse_cache_control(prepared.headers.get("Cache-Control"))
+        if prepared.method not in self.cache_methods or "no-store" in request_cache_control:
+            return super().open(request, **kwargs)
 
-        key = self.make_cache_key(request)
-        if key in self.cache:
-            if not self.cache_is_updatable:
+        key = self.make_cache_key(prepared)
+        if self.cache_namespace is not None:
+            key = (self.cache_namespace, key)
+        entry = self.cache.get(key)
+        if entry is not None and not entry.matches(prepared):
+            entry = None
+
+        if entry is not None:
+            if not self.cache_is_updatable or ("no-cache" not in request_cache_control and entry.is_fresh()):
                 self.logger.debug("cache HIT for %r", request.url)
-                return self.cache[key].response
+                self.cache_stats["hits"] += 1
+                return self.get_cached_response(entry, prepared)
             else:
-                self.cache[key].update_request(request)
+                entry.update_request(request)
 
         response = super().open(request, **kwargs)
-        if response.status_code == 304:
-            self.logger.debug("cache HIT for %r", request.url)
-            return self.cache[key].response
-        elif response.status_code == 200:
-            entry = CacheEntry(response)
-            if entry.has_cache_key():
-                self.logger.debug("storing %r response in cache", request.url)
-                self.cache[key] = entry
+        if response.status_code == 304 and entry is not None:
+            self.logger.debug("cache HIT for %r after revalidation", request.url)
+            self.cache_stats["revalidations"] += 1
+            entry.revalidate(response)
+            self.cache[key] = entry
+            return self.get_cached_response(entry, prepared)
+
+        new_entry = CacheEntry(response)
+        if new_entry.is_storable():
+            self.logger.debug("storing %r response in cache", request.url)
+            self.cache[key] = new_entry
 
         self.logger.debug("cache MISS for %r", request.url)
+        self.cache_stats["misses"] += 1
         return response
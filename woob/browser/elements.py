@@ -23,17 +23,20 @@
 import sys
 import traceback
 import warnings
-from collections import OrderedDict
+from collections import OrderedDict, deque
 from copy import deepcopy
-from typing import Any, Callable
+from itertools import islice
+from threading import Lock
+from typing import Any, Callable, Sequence
 
 import lxml.html
 
-from woob.browser.pages import NextPage
+from woob.browser.pages import NextPage, Page
 from woob.capabilities.base import FetchError
 from woob.tools.log import DEBUG_FILTERS, getLogger
+from woob.tools.xpath import cssselect, xpath
 
-from .filters.html import AttributeNotFound, XPathNotFound
+from .filters.html import CSS, AttributeNotFound, XPathNotFound
 from .filters.json import Dict
 from .filters.standard import CleanText, _Filter
 
@@ -51,9 +54,35 @@
     "generate_table_element",
     "magic_highlight",
     "method",
+    "select_nodes",
 ]
 
 
+# Protects the prefetched_next_pages attribute of responses.
+_prefetch_lock = Lock()
+
+_filters_logger = getLogger("woob.browser.b2filters")
+
+
+def select_nodes(el, selector: str | CSS) -> list:
+    """
+    Get the nodes of an element matching a selector.
+
+    :param el: lxml element
+    :param selector: XPath expression, or :class:`~woob.browser.filters.html.CSS` selector
+    """
+    if isinstance(selector, CSS):
+        return cssselect(el, selector.selector)
+    return xpath(el, selector)
+
+
+def _is_element_class(value: Any) -> bool:
+    """
+    Whether a value is an element class.
+    """
+    return isinstance(value, type) and issubclass(value, AbstractElement)
+
+
 def generate_table_element(doc, head_xpath, cleaner=CleanText):
     """
     Prints generated base code for TableElement/TableCell usage.
@@ -108,9 +137,39 @@ def inner(self, *args, **kwargs):
     return inner
 
 
-class AbstractElement:
+class _ElementMeta(type):
+    """
+    Private meta-class computing the parsing plan of element classes once,
+    when they are created, instead of looking up their attributes for every
+    parsed node. See :meth:`AbstractElement._compile_plan`.
+    """
+
+    def __new__(mcs, name, bases, attrs):
+        new_class = super().__new__(mcs, name, bases, attrs)
+        new_class._compile_plan()
+        return new_class
+
+    def __setattr__(cls, name, value):
+        super().__setattr__(name, value)
+        if not name.startswith("_"):
+            cls._refresh_plans()
+
+    def __delattr__(cls, name):
+        super().__delattr__(name)
+        if not name.startswith("_"):
+            cls._refresh_plans()
+
+    def _refresh_plans(cls):
+        cls._compile_plan()
+        for subclass in cls.__subclasses__():
+            subclass._refresh_plans()
+
+
+class AbstractElement(metaclass=_ElementMeta):
     _creation_counter = 0
 
+    _loader_names: tuple[str, ...] = ()
+
     condition: None | bool | _Filter | Callable[[], Any] = None
     """The condition to parse the element.
 
@@ -177,21 +236,36 @@ def use_selector(self, func: _Filter | ItemElement | ListElement | Callable[[],
 
         return value
 
+    @classmethod
+    def _compile_plan(cls):
+        """
+        Compute the attributes used to parse elements of this class. It is
+        called when the class is created or modified.
+        """
+        cls._loader_names = tuple(name for name in dir(cls) if name.startswith("load_"))
+
+    def _plan_names(self, names: tuple[str, ...], match: Callable[[str, Any], bool]) -> Sequence[str]:
+        """
+        Get names of a plan, with the matching attributes set on this
+        instance, if any.
+        """
+        extra = [name for name, value in vars(self).items() if name not in names and match(name, value)]
+        if not extra:
+            return names
+        return sorted(names + tuple(extra))
+
     def parse(self, obj):
         pass
 
     def cssselect(self, *args, **kwargs):
-        return self.el.cssselect(*args, **kwargs)
+        return cssselect(self.el, *args, **kwargs)
 
     def xpath(self, *args, **kwargs):
-        return self.el.xpath(*args, **kwargs)
+        return xpath(self.el, *args, **kwargs)
 
     def handle_loaders(self):
-        for attrname in dir(self):
-            m = re.match("load_(.*)", attrname)
-            if not m:
-                continue
-            name = m.group(1)
+        for attrname in self._plan_names(self._loader_names, lambda name, value: name.startswith("load_")):
+            name = attrname[len("load_") :]
             if name in self.loaders:
                 continue
             loader = getattr(self, attrname)
@@ -217,7 +291,7 @@ def check_condition(self):
                 return True
         else:
             assert isinstance(self.condition, str)
-            if self.el.xpath(self.condition):
+            if xpath(self.el, self.condition):
                 return True
 
         return False
@@ -229,10 +303,60 @@ class ListElement(AbstractElement):
     flush_at_end = False
     ignore_duplicate = False
 
+    _element_names: tuple[str, ...] = ()
+
+    streaming: bool = False
+    """Build, parse and yield items one by one.
+
+    By default, every item of the list is built and its condition checked
+    before the first object is yielded, and items are kept until the end of
+    the list. With streaming, objects are yielded as soon as nodes are
+    parsed, and items are released once parsed, which is better for long
+    lists.
+
+    Loaders of next items are scheduled in a window of
+    :attr:`woob.browser.browsers.Browser.PREFETCH_DEPTH` items, or
+    :attr:`streaming_prefetch_depth` items if it is None.
+    """
+
+    streaming_prefetch_depth: int = 10
+    """Number of items whose loaders are scheduled ahead, when
+    :attr:`streaming` is enabled and there is no ``PREFETCH_DEPTH``.
+    """
+
+    next_page_prefetch: int | None = None
+    """Number of next pages requested ahead while items are parsed.
+
+    If None, :attr:`woob.browser.browsers.Browser.PAGINATION_PREFETCH` is
+    used.
+
+    When enabled, ``next_page`` is evaluated before parsing items, and the
+    next page is requested with
+    :meth:`~woob.browser.browsers.Browser.async_open`. Once it is received,
+    ``next_page`` is evaluated on it to request the following one, and so
+    on. So ``next_page`` must only depend on the page and its parameters.
+
+    It only applies to elements which are not children of another element.
+    """
+
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self.objects = OrderedDict()
 
+    @classmethod
+    def _compile_plan(cls):
+        super()._compile_plan()
+
+        names = []
+        for name in dir(cls):
+            value = getattr(cls, name, None)
+            if _is_element_class(value) and value is not cls:
+                names.append(name)
+            elif isinstance(value, property) and getattr(value.fget, "__module__", None) != __name__:
+                # it may return an element class, evaluate it for each node
+                names.append(name)
+        cls._element_names = tuple(names)
+
     def __call__(self, *args, **kwargs):
         for key, value in kwargs.items():
             self.env[key] = value
@@ -246,10 +370,10 @@ def find_elements(self):
         sufficient.
         """
         if self.item_xpath is not None:
-            element_list = self.el.xpath(self.item_xpath)
+            element_list = select_nodes(self.el, self.item_xpath)
             if element_list:
                 yield from element_list
-            elif self.empty_xpath is not None and not self.el.xpath(self.empty_xpath):
+            elif self.empty_xpath is not None and not select_nodes(self.el, self.empty_xpath):
                 # Send a warning if no item_xpath node was found and an empty_xpath is defined
                 self.logger.warning("No element matched the item_xpath and the defined empty_xpath was not found!")
         else:
@@ -261,23 +385,19 @@ def __iter__(self):
 
         self.parse(self.el)
 
-        items = []
-        for el in self.find_elements():
-            for attrname in dir(self):
-                attr = getattr(self, attrname)
-                if isinstance(attr, type) and issubclass(attr, AbstractElement) and attr != type(self):
-                    item = attr(self.page, self, el)
-                    if not item.check_condition():
-                        continue
+        depth = self.pagination_prefetch
+        if depth and self.parent is None and hasattr(self, "next_page"):
+            self.prefetch_next_pages(self.page.response, lambda: self, depth)
 
-                    item.handle_loaders()
-                    items.append(item)
+        if self.streaming:
+            objects = self.stream_items()
+        else:
+            objects = self.parse_items()
 
-        for item in items:
-            for obj in item:
-                obj = self.store(obj)
-                if obj and not self.flush_at_end:
-                    yield obj
+        for obj in objects:
+            obj = self.store(obj)
+            if obj and not self.flush_at_end:
+                yield obj
 
         if self.flush_at_end:
             for obj in self.flush():
@@ -285,23 +405,166 @@ def __iter__(self):
 
         self.check_next_page()
 
+    def iter_items(self):
+        """
+        Build the elements of nodes found by :meth:`find_elements`, whose
+        condition is respected.
+        """
+        names = self._plan_names(self._element_names, lambda name, value: _is_element_class(value))
+        for el in self.find_elements():
+            for attrname in names:
+                attr = getattr(self, attrname)
+                if _is_element_class(attr) and attr != type(self):
+                    item = attr(self.page, self, el)
+                    if item.check_condition():
+                        yield item
+
+    def parse_items(self):
+        """
+        Build every element of the list, then parse them.
+        """
+        items = list(self.iter_items())
+
+        # schedule loaders of next items, so asynchronous requests run
+        # while previous items are parsed
+        depth = self.prefetch_depth
+        for item in items[:depth]:
+            item.handle_loaders()
+
+        for i, item in enumerate(items):
+            if depth is not None and i + depth < len(items):
+                items[i + depth].handle_loaders()
+
+            yield from item
+
+    def stream_items(self):
+        """
+        Build and parse elements of the list one by one, see :attr:`streaming`.
+        """
+        depth = self.prefetch_depth
+        if depth is None:
+            depth = self.streaming_prefetch_depth
+
+        items = self.iter_items()
+        window = deque(islice(items, depth))
+        for item in window:
+            item.handle_loaders()
+
+        for item in items:
+            item.handle_loaders()
+            window.append(item)
+            yield from window.popleft()
+
+        while window:
+            yield from window.popleft()
+
+    @property
+    def prefetch_depth(self):
+        """
+        Number of items whose loaders are scheduled ahead of the parsed one.
+
+        None means that loaders of all items are scheduled before parsing
+        the first one. See :attr:`woob.browser.browsers.Browser.PREFETCH_DEPTH`.
+        """
+        browser = getattr(self.page, "browser", None)
+        return getattr(browser, "PREFETCH_DEPTH", None)
+
     def flush(self):
         yield from self.objects.values()
 
-    def check_next_page(self):
+    @property
+    def pagination_prefetch(self):
+        """
+        Number of next pages requested ahead, see :attr:`next_page_prefetch`.
+        """
+        if self.next_page_prefetch is not None:
+            return self.next_page_prefetch
+        browser = getattr(self.page, "browser", None)
+        return getattr(browser, "PAGINATION_PREFETCH", 0)
+
+    def get_next_page(self):
+        """
+        Evaluate ``next_page``.
+
+        :returns: the next page, or None if there isn't any
+        """
         if not hasattr(self, "next_page"):
-            return
+            return None
 
         next_page = getattr(self, "next_page")
         try:
-            value = self.use_selector(next_page)
+            return self.use_selector(next_page)
         except (AttributeNotFound, XPathNotFound):
+            return None
+
+    def prefetch_next_pages(self, response, get_element, depth):
+        """
+        Request the next pages of a response.
+
+        Requests are only sent once for a response: the prefetched next
+        page is stored in the ``prefetched_next_pages`` attribute of the
+        response.
+
+        :param response: response of the page
+        :param get_element: callable returning the list element of the page
+        :param depth: number of next pages to request
+        :returns: the next page and the future of its response
+        :rtype: tuple
+        """
+        with _prefetch_lock:
+            if not hasattr(response, "prefetched_next_pages"):
+                response.prefetched_next_pages = {}
+
+            prefetched = response.prefetched_next_pages.get(type(self))
+            if prefetched is None:
+                value = get_element().get_next_page()
+                future = None
+                if value is not None and not isinstance(value, Page):
+                    self.logger.debug("Prefetching next page %s", value)
+                    future = self.page.browser.async_open(value)
+                prefetched = response.prefetched_next_pages[type(self)] = (value, future)
+
+        future = prefetched[1]
+        if future is not None and depth > 1:
+
+            def done(future):
+                if future.cancelled() or future.exception() is not None:
+                    return
+
+                next_response = future.result()
+                if getattr(next_response, "page", None) is None:
+                    return
+
+                def get_next_element():
+                    element = type(self)(next_response.page)
+                    for key, value in self.env.items():
+                        element.env.setdefault(key, value)
+                    return element
+
+                self.prefetch_next_pages(next_response, get_next_element, depth - 1)
+
+            future.add_done_callback(done)
+
+        return prefetched
+
+    def check_next_page(self):
+        if not hasattr(self, "next_page"):
             return
 
+        future = None
+        prefetched = None
+        if self.pagination_prefetch and self.parent is None:
+            prefetched = getattr(self.page.response, "prefetched_next_pages", {}).get(type(self))
+
+        if prefetched is not None:
+            value, future = prefetched
+        else:
+            value = self.get_next_page()
+
         if value is None:
             return
 
-        raise NextPage(value)
+        raise NextPage(value, prefetched=future)
 
     def store(self, obj):
         if obj.id:
@@ -321,7 +584,7 @@ class SkipItem(Exception):
     """
 
 
-class _ItemElementMeta(type):
+class _ItemElementMeta(_ElementMeta):
     """
     Private meta-class used to keep order of obj_* attributes in :class:`ItemElement`.
     """
@@ -345,13 +608,13 @@ def __new__(mcs, name, bases, attrs):
         )
 
         attrs["_class_file"], attrs["_class_line"] = traceback.extract_stack()[-2][:2]
-        new_class = super().__new__(mcs, name, bases, attrs)
-        new_class._attrs = _attrs + [f[0] for f in filters]
-        return new_class
+        attrs["_attrs"] = _attrs + [f[0] for f in filters]
+        return super().__new__(mcs, name, bases, attrs)
 
 
 class ItemElement(AbstractElement, metaclass=_ItemElementMeta):
     _attrs = None
+    _filter_names: tuple[tuple[str, str], ...] = ()
     klass: type | None = None
     validate: Callable[[Any], bool] | None = None
     skip_optional_fields_errors: bool = False
@@ -372,6 +635,11 @@ def __init__(self, *args, **kwargs):
         self.obj: Any | None = None
         self.saved_attrib = {}  # safer way would be to clone lxml tree
 
+    @classmethod
+    def _compile_plan(cls):
+        super()._compile_plan()
+        cls._filter_names = tuple((attr, "obj_%s" % attr) for attr in cls._attrs or ())
+
     def build_object(self):
         if self.klass is None:
             return
@@ -424,7 +692,7 @@ def reroot_element(self, el: Any) -> Any:
             return el
 
         if hasattr(el, "xpath"):
-            return el.xpath(item_xpath)
+            return select_nodes(el, item_xpath)
         elif isinstance(el, (dict, list)):
             return Dict.select(item_xpath.split("/"), self)
         return el
@@ -469,8 +737,8 @@ def __iter__(self):
                         self.obj = self.build_object()
                     self.parse(self.el)
                     self.handle_loaders()
-                    for attr in self._attrs:
-                        self.handle_attr(attr, getattr(self, "obj_%s" % attr))
+                    for attr, attrname in self._filter_names:
+                        self.handle_attr(attr, getattr(self, attrname))
                 except SkipItem:
                     return
 
@@ -501,8 +769,8 @@ def handle_attr(self, key: str, func):
                 raise
             else:
                 value = FetchError
-        logger = getLogger("woob.browser.b2filters")
-        logger.log(DEBUG_FILTERS, f"{self._random_id}.{key} = {value!r}")
+        if _filters_logger.isEnabledFor(DEBUG_FILTERS):
+            _filters_logger.log(DEBUG_FILTERS, "%s.%s = %r", self._random_id, key, value)
         setattr(self.obj, key, value)
 
 
@@ -551,35 +819,42 @@ class TableElement(ListElement):
     head_xpath = None
     cleaner = CleanText
 
+    _column_names: tuple[str, ...] = ()
+
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
 
         self._cols = {}
 
         columns = {}
-        for attrname in dir(self):
-            m = re.match("col_(.*)", attrname)
-            if m:
-                cols = getattr(self, attrname)
-                if not isinstance(cols, (list, tuple)):
-                    cols = [cols]
-                columns[m.group(1)] = [s.lower() if isinstance(s, str) else s for s in cols]
+        for attrname in self._plan_names(self._column_names, lambda name, value: name.startswith("col_")):
+            cols = getattr(self, attrname)
+            if not isinstance(cols, (list, tuple)):
+                cols = [cols]
+            columns[attrname[len("col_") :]] = (
+                [s.lower() for s in cols if isinstance(s, str)],
+                [s for s in cols if isinstance(s, re.Pattern)],
+            )
 
         colnum = 0
-        for el in self.el.xpath(self.head_xpath):
+        for el in select_nodes(self.el, self.head_xpath):
             title = self.cleaner.clean(el)
-            for name, titles in columns.items():
+            lower_title = title.lower()
+            for name, (titles, patterns) in columns.items():
                 if name in self._cols:
                     continue
-                if title.lower() in [s for s in titles if isinstance(s, str)] or any(
-                    map(lambda x: x.match(title), [s for s in titles if isinstance(s, type(re.compile("")))])
-                ):
+                if lower_title in titles or any(pattern.match(title) for pattern in patterns):
                     self._cols[name] = colnum
             try:
                 colnum += int(el.attrib.get("colspan", 1))
             except (ValueError, AttributeError):
                 colnum += 1
 
+    @classmethod
+    def _compile_plan(cls):
+        super()._compile_plan()
+        cls._column_names = tuple(name for name in dir(cls) if name.startswith("col_"))
+
     def get_colnum(self, name):
         return self._cols.get(name, None)
 
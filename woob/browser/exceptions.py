@@ -39,6 +39,35 @@ class LoggedOut(Exception):
     pass
 
 
+class BrowserInterrupted(Exception):
+    """
+    Raised by requests of a backend call which has been interrupted, for
+    example because it has reached its deadline.
+    """
+
+
+class DownloadError(Exception):
+    """
+    Raised by :meth:`woob.browser.browsers.Browser.download` when the
+    downloaded file does not have the expected size or checksum.
+    """
+
+
+class CircuitOpen(BrowserUnavailable):
+    """
+    Raised instead of sending a request to a site which keeps failing, see
+    :class:`woob.browser.breaker.CircuitBreaker`.
+
+    :param key: module name and host name of the site
+    :param retry_at: timestamp at which requests will be sent again
+    """
+
+    def __init__(self, message="", key=None, retry_at=None):
+        super().__init__(message)
+        self.key = key
+        self.retry_at = retry_at
+
+
 class BrowserTooManyRequests(BrowserUnavailable):
     """
     Client tries to perform too many requests within a certain timeframe.
@@ -23,6 +23,7 @@
 from woob.tools.log import DEBUG_FILTERS, getLogger
 from woob.tools.misc import NO_DEFAULT as _NO_DEFAULT
 from woob.tools.misc import NoDefaultType
+from woob.tools.xpath import xpath
 
 
 __all__ = ["FilterError", "ItemNotFound", "Filter"]
@@ -169,7 +170,7 @@ def __init__(self, selector=None, default=_NO_DEFAULT):
 
     def select(self, selector, item):
         if isinstance(selector, str):
-            ret = item.xpath(selector)
+            ret = xpath(item, selector)
         elif isinstance(selector, _Filter):
             selector._key = self._key
             selector._obj = self._obj
@@ -23,6 +23,7 @@
 import lxml.html as html
 
 from woob.tools.html import html2text
+from woob.tools.xpath import cssselect, xpath
 
 from .base import _NO_DEFAULT, Filter, FilterError, ItemNotFound, _Filter, _Selector, debug
 from .standard import CleanText
@@ -65,10 +66,16 @@ class CSS(_Selector):
         obj_foo = CleanText(CSS('div.main'))
 
     will take the text of all ``<div>`` having CSS class "main".
+
+    It can also be used as ``item_xpath`` or ``empty_xpath`` of
+    :class:`~woob.browser.elements.ListElement`, and as ``head_xpath`` of
+    :class:`~woob.browser.elements.TableElement`::
+
+        item_xpath = CSS('table.history > tbody > tr')
     """
 
     def select(self, selector, item):
-        ret = item.cssselect(selector)
+        ret = cssselect(item, selector)
         if isinstance(ret, list):
             for el in ret:
                 if isinstance(el, html.HtmlElement):
@@ -232,10 +239,10 @@ def filter(self, el):
         elif el.tag == "textarea":
             return str(el.text)
         elif el.tag == "select":
-            options = el.xpath(".//option[@selected]")
+            options = xpath(el, ".//option[@selected]")
             # default is the first one
             if len(options) == 0:
-                options = el.xpath(".//option[1]")
+                options = xpath(el, ".//option[1]")
             return "\n".join(str(o.text) for o in options)
         else:
             raise UnrecognizedElement("Element %s is not recognized" % el)
@@ -35,6 +35,7 @@
 from woob.capabilities.base import Currency as BaseCurrency
 from woob.capabilities.base import empty
 from woob.tools.misc import clean_text
+from woob.tools.xpath import xpath
 
 from .base import _NO_DEFAULT, Filter, FilterError, ItemNotFound, _Filter, debug
 
@@ -324,7 +325,7 @@ def clean(cls, txt, children=True, newlines=True, normalize="NFC", transliterate
             if children:
                 txt = list(txt.itertext())
             else:
-                txt = list(txt.xpath("./text()"))
+                txt = list(xpath(txt, "./text()"))
             txt = " ".join(txt)  # 'foo   bar '
         elif not isinstance(txt, str):
             txt = " ".join(txt.itertext())
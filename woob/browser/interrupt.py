@@ -0,0 +1,126 @@
+# Copyright(C) 2010-2024 Romain Bignon
+#
+# This file is part of woob.
+#
+# woob is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# woob is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with woob. If not, see <http://www.gnu.org/licenses/>.
+
+from __future__ import annotations
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+from threading import Event, Lock
+from time import monotonic
+from weakref import WeakSet
+
+import requests
+
+from .exceptions import BrowserInterrupted
+
+
+__all__ = ["CallInterruption", "current_interruption", "use_interruption"]
+
+
+class CallInterruption:
+    """
+    Interruption of a backend call.
+
+    Requests sent by backends of the call get it through
+    :data:`current_interruption`, so interrupting a call does not affect
+    other calls using the same backends.
+
+    :param deadline: time, as returned by :func:`time.monotonic`, at which
+                     the call expires
+    :type deadline: float
+    """
+
+    def __init__(self, deadline: float | None = None):
+        self.deadline = deadline
+        self.event = Event()
+        self.lock = Lock()
+        self.responses = WeakSet()
+
+    def is_set(self) -> bool:
+        """
+        Whether the call has been interrupted.
+        """
+        return self.event.is_set()
+
+    def wait(self, timeout: float) -> bool:
+        """
+        Wait until the call is interrupted, at most *timeout* seconds.
+
+        The wait is shortened to the deadline of the call.
+
+        :returns: True if the call is interrupted, or has reached its deadline
+        """
+        if self.deadline is not None:
+            remaining = self.deadline - monotonic()
+            if remaining <= timeout:
+                self.event.wait(max(0, remaining))
+                return True
+
+        return self.event.wait(timeout)
+
+    def check(self):
+        """
+        Raise :class:`~woob.browser.exceptions.BrowserInterrupted` if the call
+        has been interrupted.
+        """
+        if self.event.is_set():
+            raise BrowserInterrupted()
+
+    def interrupt(self):
+        """
+        Interrupt the call.
+
+        Streamed responses being read are closed. A request already sent and
+        waiting for its response can't be aborted: it runs until it gets a
+        response, or until the timeout of the browser.
+        """
+        with self.lock:
+            self.event.set()
+            responses = list(self.responses)
+            self.responses.clear()
+
+        for response in responses:
+            response.close()
+
+    def track(self, response: requests.Response):
+        """
+        Close a streamed response if the call is interrupted while it is read.
+        """
+        with self.lock:
+            if not self.event.is_set():
+                self.responses.add(response)
+                return
+
+        response.close()
+
+
+current_interruption: ContextVar[CallInterruption | None] = ContextVar("current_interruption", default=None)
+"""
+Interruption of the backend call being run, if any.
+"""
+
+
+@contextmanager
+def use_interruption(interruption: CallInterruption | None):
+    """
+    Context manager setting the interruption of requests sent in it.
+    """
+    token = current_interruption.set(interruption)
+    try:
+        yield interruption
+    finally:
+        current_interruption.reset(token)
@@ -0,0 +1,400 @@
+# Copyright(C) 2010-2024 Romain Bignon
+#
+# This file is part of woob.
+#
+# woob is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# woob is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with woob. If not, see <http://www.gnu.org/licenses/>.
+
+from __future__ import annotations
+
+import re
+import sqlite3
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from threading import Condition, Lock
+from time import sleep, time
+from typing import Union
+
+
+__all__ = [
+    "parse_rate",
+    "MemoryBucketBackend",
+    "SQLiteBucketBackend",
+    "TokenBucket",
+    "RequestLimiter",
+    "LimiterRegistry",
+    "limiters",
+]
+
+
+Rate = Union[str, float]
+
+
+RATE_RE = re.compile(r"^\s*(\d+(?:\.\d+)?)\s*/\s*(\d+(?:\.\d+)?)?\s*(ms|s|sec|m|min|h|hour|d|day)\s*$")
+
+RATE_UNITS = {
+    "ms": 0.001,
+    "s": 1,
+    "sec": 1,
+    "m": 60,
+    "min": 60,
+    "h": 3600,
+    "hour": 3600,
+    "d": 86400,
+    "day": 86400,
+}
+
+
+def parse_rate(rate: Rate) -> tuple[float, int]:
+    """
+    Parse a rate limit.
+
+    A rate is either a string like ``'10/s'``, ``'600/min'`` or ``'1/5s'``,
+    or a number of requests per second.
+
+    With a string, the number of requests can be sent at once, as a burst,
+    before being spaced according to the rate. With a number, requests are
+    always spaced.
+
+    :returns: the interval between two requests, in seconds, and the burst
+    :rtype: tuple[float, int]
+    :raises ValueError: the rate is invalid
+    """
+    if isinstance(rate, str):
+        m = RATE_RE.match(rate)
+        if not m:
+            raise ValueError("Invalid rate %r" % rate)
+
+        count = float(m.group(1))
+        period = float(m.group(2) or 1) * RATE_UNITS[m.group(3)]
+        if count <= 0 or period <= 0:
+            raise ValueError("Invalid rate %r" % rate)
+        return period / count, max(1, int(count))
+
+    if rate <= 0:
+        raise ValueError("Invalid rate %r" % rate)
+    return 1.0 / rate, 1
+
+
+class MemoryBucketBackend:
+    """
+    Store states of token buckets in memory, for one process.
+    """
+
+    def __init__(self):
+        self.lock = Lock()
+        self.tats: dict[str, float] = {}
+
+    def reserve(self, key: str, interval: float, tolerance: float) -> float:
+        """
+        Take a token from a bucket.
+
+        Buckets are implemented with the generic cell rate algorithm: the
+        state of a bucket is the theoretical arrival time of the next
+        request.
+
+        :param key: key of the bucket
+        :param interval: interval between two requests, in seconds
+        :param tolerance: how much a request can be sent before its
+                          theoretical arrival time, in seconds
+        :returns: delay to wait before using the token, in seconds
+        :rtype: float
+        """
+        with self.lock:
+            now = time()
+            tat = max(self.tats.get(key, now), now)
+            self.tats[key] = tat + interval
+        return max(0.0, tat - tolerance - now)
+
+
+class SQLiteBucketBackend:
+    """
+    Store states of token buckets in a SQLite database.
+
+    Several processes using the same database share the same buckets.
+
+    :param path: path to the database file
+    :type path: str
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.lock = Lock()
+        self.db = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+        with self.lock:
+            self.db.execute("CREATE TABLE IF NOT EXISTS buckets (key TEXT PRIMARY KEY, tat REAL)")
+
+    def reserve(self, key: str, interval: float, tolerance: float) -> float:
+        with self.lock:
+            # lock the database, so other processes wait for our update
+            self.db.execute("BEGIN IMMEDIATE")
+            try:
+                now = time()
+                row = self.db.execute("SELECT tat FROM buckets WHERE key = ?", (key,)).fetchone()
+                tat = max(row[0] if row else now, now)
+                self.db.execute("INSERT OR REPLACE INTO buckets (key, tat) VALUES (?, ?)", (key, tat + interval))
+            except BaseException:
+                self.db.execute("ROLLBACK")
+                raise
+            else:
+                self.db.execute("COMMIT")
+        return max(0.0, tat - tolerance - now)
+
+    def close(self):
+        with self.lock:
+            self.db.close()
+
+
+class TokenBucket:
+    """
+    Token bucket limiting the rate of requests.
+
+    A token is taken for every request. As a token is reserved before
+    waiting, callers sleep exactly until their token is available, without
+    polling.
+
+    :param rate: rate limit, see :func:`parse_rate`
+    :type rate: str or float
+    :param key: key of the bucket in the backend
+    :type key: str
+    :param backend: storage of the bucket state (default is in memory)
+    :type backend: :class:`MemoryBucketBackend` or :class:`SQLiteBucketBackend`
+    """
+
+    def __init__(self, rate: Rate, key: str = "default", backend=None):
+        self.rate = rate
+        self.interval, self.burst = parse_rate(rate)
+        self.key = key
+        self.backend = backend or MemoryBucketBackend()
+
+    def reserve(self) -> float:
+        """
+        Take a token.
+
+        :returns: delay to wait before using the token, in seconds
+        :rtype: float
+        """
+        return self.backend.reserve(self.key, self.interval, (self.burst - 1) * self.interval)
+
+    def acquire(self):
+        """
+        Take a token, waiting until it is available.
+        """
+        delay = self.reserve()
+        if delay > 0:
+            sleep(delay)
+
+
+class RequestLimiter:
+    """
+    Limit the requests sent to a site.
+
+    A request waits until less than ``concurrency`` requests are running,
+    then until a token of the :class:`TokenBucket` of ``rate`` is available.
+
+    Waiting requests are granted in turn for each owner (usually a browser),
+    so a browser sending a lot of requests at once does not prevent other
+    browsers from accessing the site.
+
+    :param concurrency: maximum number of requests running at the same time
+    :type concurrency: int or None
+    :param rate: rate limit, see :func:`parse_rate`
+    :type rate: str or float or None
+    :param key: key of the token bucket in the backend
+    :type key: str
+    :param backend: storage of the token bucket state
+    """
+
+    def __init__(self, concurrency: int | None = None, rate: Rate | None = None, key: str = "default", backend=None):
+        self.condition = Condition()
+        self.key = key
+        self.backend = backend
+        self.running = 0
+        # owner -> deque of waiters, each waiter is a list with a single
+        # boolean set to True when the request is granted.
+        self.waiters: OrderedDict[object, deque[list[bool]]] = OrderedDict()
+        self.configure(concurrency, rate)
+
+    def configure(self, concurrency: int | None = None, rate: Rate | None = None):
+        """
+        Change limits.
+
+        Requests already waiting are granted according to the new limits.
+        """
+        bucket = TokenBucket(rate, self.key, self.backend) if rate else None
+        with self.condition:
+            self.concurrency = concurrency
+            self.rate = rate
+            self.bucket = bucket
+            self._dispatch()
+
+    def set_backend(self, backend):
+        """
+        Change the storage of the token bucket state.
+        """
+        self.backend = backend
+        self.configure(self.concurrency, self.rate)
+
+    def _dispatch(self):
+        granted = False
+        while self.waiters and (self.concurrency is None or self.running < self.concurrency):
+            # round-robin between owners
+            owner, waiters = self.waiters.popitem(last=False)
+            waiter = waiters.popleft()
+            if waiters:
+                self.waiters[owner] = waiters
+
+            waiter[0] = True
+            self.running += 1
+            granted = True
+
+        if granted:
+            self.condition.notify_all()
+
+    def acquire(self, owner: object = None):
+        """
+        Wait until a request can be sent.
+
+        :param owner: object making the request
+        """
+        with self.condition:
+            waiter = [False]
+            self.waiters.setdefault(owner, deque()).append(waiter)
+            self._dispatch()
+            while not waiter[0]:
+                self.condition.wait()
+            bucket = self.bucket
+
+        if bucket is not None:
+            try:
+                bucket.acquire()
+            except BaseException:
+                self.release()
+                raise
+
+    def release(self):
+        """
+        Signal that a request is finished.
+        """
+        with self.condition:
+            self.running -= 1
+            self._dispatch()
+
+    @contextmanager
+    def limit(self, owner: object = None):
+        """
+        Context manager acquiring the limiter during the request.
+        """
+        self.acquire(owner)
+        try:
+            yield
+        finally:
+            self.release()
+
+
+class LimiterRegistry:
+    """
+    Registry of the :class:`RequestLimiter` shared by every browser of the
+    process.
+
+    Limiters are keyed by the host name or by the module name, depending on
+    the :attr:`woob.browser.browsers.Browser.LIMIT_SCOPE` attribute.
+    The limits declared by the first browser using a key are kept, unless
+    they are set with :meth:`configure`, which takes precedence over
+    declarations of browsers.
+
+    By default, rate limits apply to the current process. To share them
+    between processes of the same host, use a :class:`SQLiteBucketBackend`:
+
+    >>> limiters.set_backend(SQLiteBucketBackend('/tmp/woob-limits.sqlite'))  # doctest: +SKIP
+    """
+
+    def __init__(self, backend=None):
+        self.lock = Lock()
+        self.backend = backend or MemoryBucketBackend()
+        self.limiters: dict[str, RequestLimiter] = {}
+        self.settings: dict[str, tuple[int | None, Rate | None]] = {}
+
+    def set_backend(self, backend):
+        """
+        Change the storage of token buckets states.
+
+        :param backend: storage of token buckets states
+        :type backend: :class:`MemoryBucketBackend` or :class:`SQLiteBucketBackend`
+        """
+        with self.lock:
+            self.backend = backend
+            limiters = list(self.limiters.values())
+
+        for limiter in limiters:
+            limiter.set_backend(backend)
+
+    def configure(self, key: str, concurrency: int | None = None, rate: Rate | None = None):
+        """
+        Set limits for a host or a module.
+
+        :param key: host name or module name
+        :type key: str
+        :param concurrency: maximum number of requests running at the same time
+        :type concurrency: int or None
+        :param rate: rate limit, see :func:`parse_rate`
+        :type rate: str or float or None
+        """
+        if rate:
+            # check it now rather than when sending a request
+            parse_rate(rate)
+
+        with self.lock:
+            self.settings[key] = (concurrency, rate)
+            limiter = self.limiters.get(key)
+
+        if limiter is not None:
+            limiter.configure(concurrency, rate)
+
+    def get(self, key: str, concurrency: int | None = None, rate: Rate | None = None) -> RequestLimiter | None:
+        """
+        Get the limiter of a host or a module.
+
+        :param key: host name or module name
+        :type key: str
+        :param concurrency: default maximum number of requests running at the same time
+        :type concurrency: int or None
+        :param rate: default rate limit, see :func:`parse_rate`
+        :type rate: str or float or None
+        :returns: the limiter, or None if there is no limit for this key
+        """
+        with self.lock:
+            limiter = self.limiters.get(key)
+            if limiter is not None:
+                return limiter
+
+            concurrency, rate = self.settings.get(key, (concurrency, rate))
+            if concurrency is None and rate is None:
+                return None
+
+            limiter = self.limiters[key] = RequestLimiter(concurrency, rate, key=key, backend=self.backend)
+            return limiter
+
+    def clear(self):
+        """
+        Remove every limiter and setting.
+        """
+        with self.lock:
+            self.limiters.clear()
+            self.settings.clear()
+
+
+limiters = LimiterRegistry()
+"""
+Registry used by browsers.
+"""
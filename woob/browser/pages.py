@@ -24,7 +24,9 @@
 import warnings
 from ast import literal_eval
 from collections import OrderedDict
-from collections.abc import Iterator
+from collections.abc import Hashable, Iterator
+from concurrent.futures import Future
+from contextlib import contextmanager
 from datetime import datetime
 from functools import wraps
 from io import BytesIO, StringIO
@@ -75,6 +77,9 @@ def pagination(func: Callable):
     <woob.browser.pages.Page object at 0x...>
     >>> list(b.page.iter_values())
     ['One', 'Two', 'Three', 'Four']
+
+    If the :class:`NextPage` exception has a prefetched response, it is used
+    instead of requesting the next page again.
     """
 
     @wraps(func)
@@ -85,6 +90,9 @@ def inner(page: Page, *args, **kwargs):
             except NextPage as e:
                 if isinstance(e.request, Page):
                     page = e.request
+                elif e.prefetched is not None:
+                    result = page.browser.load_response(e.prefetched.result())
+                    page = result.page
                 else:
                     result = page.browser.location(e.request)
                     page = result.page
@@ -100,11 +108,41 @@ class NextPage(Exception):
     go on the next page.
 
     See :meth:`PagesBrowser.pagination` or decorator :func:`pagination`.
+
+    :param request: the next page, as an URL, a :class:`requests.Request`
+                    or a :class:`Page` object
+    :param prefetched: the response of the next page, if it has already been
+                       requested with :meth:`~woob.browser.browsers.Browser.async_open`
+    :type prefetched: :class:`concurrent.futures.Future`
     """
 
-    def __init__(self, request: str | Page):
+    def __init__(self, request: str | requests.Request | Page, prefetched: Future | None = None):
         super().__init__()
         self.request = request
+        self.prefetched = prefetched
+
+
+@contextmanager
+def shared_documents(response: requests.Response):
+    """
+    Context manager sharing the documents built for a response between the
+    pages instantiated in it.
+
+    It is used while looking for the page handling a response: when several
+    :class:`~woob.browser.url.URL` objects match it, the candidate pages
+    with the same kind of document (see :meth:`Page.get_doc_key`) parse the
+    response only once. Documents are not shared outside of it, as pages may
+    modify their document.
+    """
+    if getattr(response, "shared_docs", None) is not None:
+        yield response.shared_docs
+        return
+
+    response.shared_docs = {}
+    try:
+        yield response.shared_docs
+    finally:
+        del response.shared_docs
 
 
 class Page:
@@ -154,6 +192,13 @@ class Page:
       page object directly.
     """
 
+    DOC_ATTRIBUTES: ClassVar[tuple[str, ...]] = ()
+    """
+    Names of the class attributes used by :meth:`build_doc`, besides
+    :attr:`data` and :attr:`encoding`. Pages only share a document (see
+    :func:`shared_documents`) if these attributes are the same.
+    """
+
     logged: bool = False
     """
     If True, the page is in a restricted area of the website. Useful with
@@ -187,15 +232,59 @@ def __init__(
         self.forced_encoding = self.normalize_encoding(encoding or self.ENCODING)
         if self.forced_encoding:
             self.response.encoding = self.forced_encoding
-        self.doc = self.build_doc(self.data)
+        self.doc = self.get_doc()
 
         # Last chance to change encoding, according to :meth:`detect_encoding`,
         # which can be used to detect a document-level encoding declaration
         if not self.forced_encoding:
             encoding = self.detect_encoding()
             if encoding and encoding != self.encoding:
+                # the response keeps it, so next candidate pages directly
+                # build their document with the right encoding
                 self.response.encoding = encoding
-                self.doc = self.build_doc(self.data)
+                self.doc = self.get_doc()
+
+    def get_doc_key(self) -> Hashable | None:
+        """
+        Get the key of the document built by this page, used to share it
+        between pages of the same response (see :func:`shared_documents`).
+
+        By default, pages share their document when they use the same
+        :meth:`build_doc` and :attr:`data` implementations, the same
+        :attr:`encoding` and the same :attr:`DOC_ATTRIBUTES`.
+
+        :returns: the key, or None to never share the document
+        """
+        cls = type(self)
+        values = []
+        for name in self.DOC_ATTRIBUTES:
+            value = getattr(cls, name)
+            if isinstance(value, dict):
+                value = tuple(sorted(value.items()))
+            values.append(value)
+
+        key = (cls.build_doc, cls.data, self.encoding, tuple(values))
+        try:
+            hash(key)
+        except TypeError:
+            return None
+        return key
+
+    def get_doc(self) -> Any:
+        """
+        Build the document from :attr:`data`, or get it from the documents
+        shared by candidate pages of the response.
+        """
+        docs = getattr(self.response, "shared_docs", None)
+        key = self.get_doc_key() if docs is not None else None
+        if key is None:
+            return self.build_doc(self.data)
+
+        try:
+            return docs[key]
+        except KeyError:
+            doc = docs[key] = self.build_doc(self.data)
+            return doc
 
     # Encoding issues are delegated to Response instance, implemented by
     # requests module.
@@ -424,6 +513,8 @@ class CsvPage(Page):
     This means the rows will be also available as dictionaries.
     """
 
+    DOC_ATTRIBUTES = ("parse", "DIALECT", "FMTPARAMS", "NEWLINES_HACK", "HEADER")
+
     def build_doc(self, content: bytes) -> list:
         # We may need to temporarily convert content to utf-8 because csv
         # does not support Unicode.
@@ -518,6 +609,8 @@ class XLSPage(Page):
     Specify the index of the worksheet to use.
     """
 
+    DOC_ATTRIBUTES = ("parse", "HEADER", "SHEET_INDEX")
+
     def build_doc(self, content: bytes) -> list:
         return self.parse(content)
 
@@ -616,6 +709,8 @@ class HTMLPage(Page):
     Make links URLs absolute.
     """
 
+    DOC_ATTRIBUTES = ("ABSOLUTE_LINKS",)
+
     def __init__(self, *args, **kwargs):
         self.setup_xpath_functions()
         super().__init__(*args, **kwargs)
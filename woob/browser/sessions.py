@@ -16,11 +16,13 @@
 # along with woob. If not, see <http://www.gnu.org/licenses/>.
 
 try:
-    from concurrent.futures import ThreadPoolExecutor
+    from concurrent.futures import Future, ThreadPoolExecutor
 except ImportError:
     ThreadPoolExecutor = None
 
+from copy import copy
 from http import cookiejar
+from threading import Lock
 
 from requests import Session
 from requests.adapters import DEFAULT_POOLSIZE
@@ -102,7 +104,19 @@ def prepare_request(self, request):
 
 
 class FuturesSession(WoobSession):
-    def __init__(self, executor=None, max_workers=2, max_retries=2, adapter_class=HTTPAdapter, *args, **kwargs):
+    COALESCE_METHODS = ("GET", "HEAD")
+
+    def __init__(
+        self,
+        executor=None,
+        max_workers=2,
+        max_retries=2,
+        adapter_class=HTTPAdapter,
+        *args,
+        coalesce=False,
+        pool_maxsize=None,
+        **kwargs,
+    ):
         """Creates a FuturesSession
 
         Notes
@@ -113,13 +127,24 @@ def __init__(self, executor=None, max_workers=2, max_retries=2, adapter_class=HT
 
         * If you provide both `executor` and `max_workers`, the latter is
           ignored and provided executor is used as is.
+
+        * `pool_maxsize` is the size of the connection pool. By default, it
+          is `max_workers` if it is greater than the default of requests.
+
+        * If `coalesce` is True, identical GET and HEAD requests sent at the
+          same time share the same network exchange: only the first one is
+          sent, and the others get a copy of its response.
         """
         super().__init__(*args, **kwargs)
+        self.coalesce = coalesce
+        self.inflight = {}
+        self.inflight_lock = Lock()
         if executor is None and ThreadPoolExecutor is not None:
             executor = ThreadPoolExecutor(max_workers=max_workers)
             # set connection pool size equal to max_workers if needed
-            if max_workers > DEFAULT_POOLSIZE:
-                adapter_kwargs = dict(pool_connections=max_workers, pool_maxsize=max_workers, max_retries=max_retries)
+            pool_maxsize = pool_maxsize or max(max_workers, DEFAULT_POOLSIZE)
+            if pool_maxsize != DEFAULT_POOLSIZE:
+                adapter_kwargs = dict(pool_connections=pool_maxsize, pool_maxsize=pool_maxsize, max_retries=max_retries)
                 self.mount("https://", adapter_class(**adapter_kwargs))
                 self.mount("http://", adapter_class(**adapter_kwargs))
 
@@ -135,6 +160,11 @@ def send(self, *args, **kwargs):
 
         In all cases, it will call the `callback` parameter and return its
         result when the request has been processed.
+
+        If the `retry` param is a :class:`woob.browser.backoff.RetryPolicy`,
+        the request is sent again while it fails with a transient error, as
+        long as the `retry_budget` param allows it, and until the
+        `interruption` param of the backend call is set.
         """
         if "async" in kwargs:
             import warnings
@@ -147,9 +177,20 @@ def send(self, *args, **kwargs):
 
         callback = kwargs.pop("callback", lambda future, response: response)
         is_async = kwargs.pop("is_async", False)
+        retry = kwargs.pop("retry", None)
+        retry_budget = kwargs.pop("retry_budget", None)
+        interruption = kwargs.pop("interruption", None)
+
+        def do_send(*args, **kwargs):
+            if self.coalesce:
+                return self.coalesced_send(sup, *args, **kwargs)
+            return sup(*args, **kwargs)
 
         def func(*args, **kwargs):
-            resp = sup(*args, **kwargs)
+            if retry is not None:
+                resp = retry.send(lambda: do_send(*args, **kwargs), args[0], retry_budget, interruption)
+            else:
+                resp = do_send(*args, **kwargs)
             return callback(self, resp)
 
         if is_async:
@@ -159,6 +200,53 @@ def func(*args, **kwargs):
 
         return func(*args, **kwargs)
 
+    def coalesce_key(self, request, **kwargs):
+        """
+        Get the key identifying identical requests, or None if the request
+        must not be coalesced.
+        """
+        if request.method not in self.COALESCE_METHODS or kwargs.get("stream"):
+            return None
+
+        return (
+            request.method,
+            request.url,
+            request.body,
+            tuple(sorted(request.headers.items())),
+            kwargs.get("allow_redirects", True),
+        )
+
+    def coalesced_send(self, send, request, **kwargs):
+        """
+        Send a request, or wait for the response of an identical request
+        already being sent.
+        """
+        key = self.coalesce_key(request, **kwargs)
+        if key is None:
+            return send(request, **kwargs)
+
+        with self.inflight_lock:
+            future = self.inflight.get(key)
+            leader = future is None
+            if leader:
+                future = self.inflight[key] = Future()
+
+        if not leader:
+            # each caller gets its own response object, as callbacks modify it
+            return copy(future.result())
+
+        try:
+            response = send(request, **kwargs)
+        except BaseException as exc:
+            future.set_exception(exc)
+            raise
+        else:
+            future.set_result(response)
+            return response
+        finally:
+            with self.inflight_lock:
+                del self.inflight[key]
+
     def close(self):
         super().close()
         if self.executor:
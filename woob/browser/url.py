@@ -18,8 +18,8 @@
 from __future__ import annotations
 
 import re
-from functools import wraps
-from typing import TYPE_CHECKING, Callable, TypeVar
+from functools import lru_cache, wraps
+from typing import TYPE_CHECKING, Callable, Iterator, TypeVar
 from urllib.parse import unquote
 
 import requests
@@ -27,9 +27,11 @@
 from woob.browser.filters.base import _Filter
 from woob.browser.pages import Page
 from woob.tools.regex_helper import normalize
+from woob.tools.xpath import xpath
 
 
 if TYPE_CHECKING:
+    from woob.browser.backoff import RetryPolicy
     from woob.browser.browsers import Browser
 
 ABSOLUTE_URL_PATTERN_RE = re.compile(r"^[\w\?]+://[^/].*")
@@ -61,6 +63,9 @@ class which is instancied by PagesBrowser.open if the page matches a regex.
     :param timeout: Timeout to use for this URL in particular.
     :param methods: Request HTTP methods to match the response.
     :param content_type: MIME type of the content to match the response with.
+    :param retry: Policy to retry requests using this URL, or False to
+        disable retries; see :attr:`Browser.RETRY_POLICY
+        <woob.browser.browsers.Browser.RETRY_POLICY>`.
     """
 
     _creation_counter = 0
@@ -73,6 +78,7 @@ def __init__(
         timeout: float | None = None,
         methods: tuple[str, ...] = (),
         content_type: str | None = None,
+        retry: RetryPolicy | bool | None = None,
     ):
         if content_type is not None and ";" in content_type:
             raise ValueError(
@@ -94,6 +100,7 @@ def __init__(
         self._timeout = timeout
         self._methods = tuple(methods)
         self._content_type = content_type
+        self._retry = retry
         self._creation_counter = URL._creation_counter
         URL._creation_counter += 1
 
@@ -190,6 +197,10 @@ def go(
         if timeout is None:
             timeout = self._timeout
 
+        location_kwargs = {}
+        if self._retry is not None:
+            location_kwargs["retry"] = self._retry
+
         r = self.browser.location(
             self.build(**kwargs),
             params=params,
@@ -198,6 +209,7 @@ def go(
             method=method,
             headers=headers,
             timeout=timeout,
+            **location_kwargs,
         )
         return r.page or r
 
@@ -231,6 +243,10 @@ def open(
         if timeout is not None:
             timeout = self._timeout
 
+        open_kwargs = {}
+        if self._retry is not None:
+            open_kwargs["retry"] = self._retry
+
         r = self.browser.open(
             self.build(**kwargs),
             params=params,
@@ -240,6 +256,7 @@ def open(
             headers=headers,
             is_async=is_async,
             callback=callback,
+            **open_kwargs,
         )
 
         if hasattr(r, "page") and r.page:
@@ -358,6 +375,10 @@ def handle(self, response: requests.Response) -> Page | None:
             if content_type != self._content_type:
                 return None
 
+        if getattr(self.klass, "is_here", None) is False:
+            # no need to build the document
+            return None
+
         m = self.match(response.url)
         if m:
             page = self.klass(self.browser, response, m.groupdict())
@@ -374,7 +395,7 @@ def handle(self, response: requests.Response) -> Page | None:
                         return page
                 else:
                     assert isinstance(page.is_here, str)
-                    if page.doc.xpath(page.is_here):
+                    if xpath(page.doc, page.is_here):
                         return page
             else:
                 return page
@@ -436,6 +457,7 @@ class MyChildBrowser(MyBrowser):
             timeout=self._timeout,
             methods=self._methods,
             content_type=self._content_type,
+            retry=self._retry,
         )
         new_url.browser = None
         return new_url
@@ -462,6 +484,7 @@ def with_timeout(self: URLType, timeout: float | None) -> URLType:
             timeout=timeout,
             methods=self._methods,
             content_type=self._content_type,
+            retry=self._retry,
         )
         new_url.browser = None
         return new_url
@@ -473,6 +496,26 @@ def without_timeout(self: URLType) -> URLType:
         """
         return self.with_timeout(None)
 
+    def with_retry(self: URLType, retry: RetryPolicy | bool | None) -> URLType:
+        """Get a new URL object with a retry policy.
+
+        :param retry: The new retry policy, False to disable retries, or
+            ``None`` if the policy of the browser is to be used.
+        :return: The URL using the different retry policy.
+        """
+        new_url = self.__class__(
+            *self.urls,
+            self.klass,
+            base=self._base,
+            headers=self._headers,
+            timeout=self._timeout,
+            methods=self._methods,
+            content_type=self._content_type,
+            retry=retry,
+        )
+        new_url.browser = None
+        return new_url
+
     def with_page(self: URLType, cls: type[Page]) -> URLType:
         """Get a new URL with the same path but a different page class.
 
@@ -487,6 +530,7 @@ def with_page(self: URLType, cls: type[Page]) -> URLType:
             timeout=self._timeout,
             methods=self._methods,
             content_type=self._content_type,
+            retry=self._retry,
         )
         new_url.browser = None
         return new_url
@@ -520,6 +564,7 @@ def with_urls(self: URLType, *urls: str, clear: bool = True, match_new_first: bo
             timeout=self._timeout,
             methods=self._methods,
             content_type=self._content_type,
+            retry=self._retry,
         )
         new_url.browser = None
         return new_url
@@ -541,6 +586,7 @@ def with_base(
             timeout=self._timeout,
             methods=self._methods,
             content_type=self._content_type,
+            retry=self._retry,
         )
 
     def with_methods(
@@ -560,6 +606,7 @@ def with_methods(
             timeout=self._timeout,
             methods=methods,
             content_type=self._content_type,
+            retry=self._retry,
         )
 
     def without_methods(self: URLType) -> URLType:
@@ -583,6 +630,7 @@ def with_content_type(self: URLType, content_type: str | None) -> URLType:
             timeout=self._timeout,
             methods=self._methods,
             content_type=content_type,
+            retry=self._retry,
         )
 
     def without_content_type(self: URLType) -> URLType:
@@ -625,6 +673,154 @@ def build(self, **kwargs) -> str:
         return super().build(**kwargs)
 
 
+NAMED_GROUP_RE = re.compile(r"(?<!\\)\(\?P<(\w+)>")
+NAMED_BACKREF_RE = re.compile(r"(?<!\\)\(\?P=(\w+)\)")
+# numbered backreferences and conditionals can't be renumbered
+UNINDEXABLE_RE = re.compile(r"(?<!\\)(?:\\\d|\(\?\()")
+
+
+@lru_cache(maxsize=1024)
+def _index_alternative(name: str, pattern: str) -> str | None:
+    """
+    Convert a pattern to an alternative of the regex of a :class:`URLIndex`.
+
+    The alternative is a group with the given name, and groups of the
+    pattern are renamed to avoid conflicts with other alternatives.
+
+    :returns: the alternative, or None if the pattern can't be converted
+    """
+    if UNINDEXABLE_RE.search(pattern):
+        return None
+
+    pattern = NAMED_GROUP_RE.sub(lambda m: "(?P<%s_%s>" % (name, m.group(1)), pattern)
+    pattern = NAMED_BACKREF_RE.sub(lambda m: "(?P=%s_%s)" % (name, m.group(1)), pattern)
+    alternative = "(?P<%s>%s)" % (name, pattern)
+    try:
+        re.compile(alternative)
+    except re.error:
+        return None
+    return alternative
+
+
+@lru_cache(maxsize=256)
+def _compile_index(alternatives: tuple[str, ...]) -> re.Pattern | None:
+    try:
+        return re.compile("|".join(alternatives))
+    except re.error:
+        return None
+
+
+class URLIndex:
+    """
+    Find the :class:`URL` objects of a browser able to handle a response.
+
+    The patterns of every URL are combined in a single regex, so the
+    candidates are found in one pass instead of matching each URL in turn.
+    URLs are filtered beforehand on the method and the content type of the
+    response.
+
+    Candidates are returned in declaration order, and each one still has to
+    be checked with :meth:`URL.handle`, which keeps the first match
+    semantics. URLs overriding :meth:`URL.match` or :meth:`URL.handle`, or
+    using patterns which can't be combined, are always candidates.
+
+    :param urls: URL objects, in declaration order
+    :type urls: list[:class:`URL`]
+    """
+
+    def __init__(self, urls: list[URL]):
+        self.urls = list(urls)
+        self.bases = sorted({url._base for url in self.urls})
+        self.regexes: dict[tuple, tuple[re.Pattern | None, list[int]]] = {}
+
+    def get_alternatives(self, index: int, url: URL) -> list[str] | None:
+        if type(url).match is not URL.match:
+            return None
+
+        alternatives = []
+        for i, pattern in enumerate(url.urls):
+            if not ABSOLUTE_URL_PATTERN_RE.match(pattern):
+                try:
+                    base = url.get_base_url()
+                except ValueError:
+                    # URL.handle() will raise the error
+                    return None
+                pattern = re.escape(base).rstrip("/") + "/" + pattern.lstrip("/")
+
+            alternative = _index_alternative("_u%d_%d" % (index, i), pattern)
+            if alternative is None:
+                return None
+            alternatives.append(alternative)
+
+        return alternatives
+
+    def is_eligible(self, url: URL, method: str, content_type: str | None) -> bool:
+        if type(url).handle is not URL.handle:
+            return True
+
+        return (
+            url.klass is not None
+            and method != "HEAD"
+            and (not url._methods or method in url._methods)
+            and (url._content_type is None or url._content_type == content_type)
+        )
+
+    def get_regex(self, start: int, method: str, content_type: str | None) -> tuple[re.Pattern | None, list[int]]:
+        browser = self.urls[0].browser if self.urls else None
+        key = (start, method, content_type, tuple(getattr(browser, base, None) for base in self.bases))
+        try:
+            return self.regexes[key]
+        except KeyError:
+            pass
+
+        alternatives = []
+        indexes = []
+        for index in range(start, len(self.urls)):
+            url = self.urls[index]
+            if not self.is_eligible(url, method, content_type):
+                continue
+
+            indexes.append(index)
+            url_alternatives = self.get_alternatives(index, url)
+            if url_alternatives is None:
+                # matches anything, URL.handle() will check it
+                url_alternatives = ["(?P<_u%d_0>)" % index]
+            alternatives.extend(url_alternatives)
+
+        regex = _compile_index(tuple(alternatives)) if alternatives else None
+        self.regexes[key] = regex, indexes
+        return regex, indexes
+
+    def candidates(self, response: requests.Response) -> Iterator[URL]:
+        """
+        Iterate on URL objects which may handle a response.
+        """
+        method = response.request.method
+        content_type = response.headers.get("Content-Type")
+        if content_type is not None:
+            content_type = content_type.partition(";")[0].strip()
+
+        start = 0
+        while start < len(self.urls):
+            regex, indexes = self.get_regex(start, method, content_type)
+            if regex is None:
+                # patterns can't be combined, check every eligible URL
+                for index in indexes:
+                    yield self.urls[index]
+                return
+
+            m = regex.match(response.url)
+            if m is None:
+                return
+
+            # the matching alternative is named _u<index>_<pattern>
+            index = int(m.lastgroup[2:].partition("_")[0])
+            yield self.urls[index]
+            # look for the next candidates, if this one does not handle the
+            # response
+            start = index + 1
+
+
 def normalize_url(url: str) -> str:
     """Normalize URL by lower-casing the domain and other fixes.
 
@@ -325,6 +325,29 @@ def download_document(self, id):
         """
         raise NotImplementedError()
 
+    def download_document_stream(self, id):
+        """
+        Download a document, in chunks.
+
+        Unlike :meth:`download_document`, the document is not loaded in
+        memory at once. Modules can implement it with a streamed request,
+        for example::
+
+            def download_document_stream(self, document):
+                response = self.browser.open(document.url, stream=True)
+                return response.iter_content(64 * 1024)
+
+        By default, it returns the result of :meth:`download_document` as a
+        single chunk.
+
+        :param id: ID of document
+        :rtype: iter[bytes]
+        :raises: :class:`DocumentNotFound`
+        """
+        content = self.download_document(id)
+        if content:
+            yield content
+
     def download_document_pdf(self, id):
         """
         Download a document, convert it to PDF if it isn't the document format.
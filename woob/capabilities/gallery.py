@@ -154,3 +154,18 @@ def iter_gallery_images(self, gallery):
         :rtype: iter(BaseImage)
         """
         raise NotImplementedError()
+
+    def download_image_stream(self, image):
+        """
+        Download the data of an image, in chunks.
+
+        Unlike filling the ``data`` field, the image is not loaded in memory
+        at once. By default, the ``data`` field is filled and returned as a
+        single chunk.
+
+        :type image: BaseImage
+        :rtype: iter[bytes]
+        """
+        self.fillobj(image, ("data",))
+        if image.data:
+            yield image.data
@@ -17,11 +17,11 @@
 
 from warnings import warn
 
-from .bcall import CallErrors
+from .bcall import CallErrors, CallTimeout
 from .woob import Woob, WoobBase
 
 
-__all__ = ["CallErrors", "Woob", "WoobBase", "Weboob", "WebNip"]
+__all__ = ["CallErrors", "CallTimeout", "Woob", "WoobBase", "Weboob", "WebNip"]
 
 
 class WebNip(WoobBase):
@@ -16,16 +16,29 @@
 # along with woob. If not, see <http://www.gnu.org/licenses/>.
 
 
-import queue
+import asyncio
+import heapq
+import time
+from collections import deque
+from concurrent.futures import CancelledError
+from contextlib import nullcontext
 from copy import copy
-from threading import Event, Thread
+from functools import partial
+from itertools import count
+from threading import Condition, Event, Thread
+from types import GeneratorType
 
 from woob.capabilities.base import BaseObject
+from woob.core.executor import ThreadExecutor
 from woob.tools.log import getLogger
 from woob.tools.misc import get_backtrace
 
 
-__all__ = ["BackendsCall", "CallErrors"]
+__all__ = ["BackendsCall", "CallErrors", "CallTimeout"]
+
+
+PENDING = object()
+"""Returned by :meth:`BackendsCall.next_response` when no result is available yet."""
 
 
 class CallErrors(Exception):
@@ -41,27 +54,171 @@ def __iter__(self):
         return self.errors.__iter__()
 
 
+class CallTimeout(Exception):
+    """
+    Reported in :class:`CallErrors` for a backend which did not finish before
+    the deadline of the call.
+    """
+
+
+class ReversedKey:
+    """Wrap a sort key to reverse its order."""
+
+    __slots__ = ("key",)
+
+    def __init__(self, key):
+        self.key = key
+
+    def __lt__(self, other):
+        return other.key < self.key
+
+    def __eq__(self, other):
+        return self.key == other.key
+
+
 class BackendsCall:
-    def __init__(self, backends, function, *args, **kwargs):
+    MERGE_MAXSIZE = 100
+    """
+    Default maximum number of results waiting for each backend, when merging.
+    """
+
+    def __init__(
+        self,
+        backends,
+        function,
+        *args,
+        executor=None,
+        timeout=None,
+        deadline=None,
+        maxsize=None,
+        max_results=None,
+        first=None,
+        merge_key=None,
+        merge_reverse=False,
+        retry_budget=None,
+        skip_open_circuits=False,
+        **kwargs,
+    ):
         """
         :param backends: List of backends to call
         :type backends: list[:class:`Module`]
         :param function: backends' method name, or callable object.
         :type function: :class:`str` or :class:`callable`
+        :param executor: executor running the backend tasks; by default, a
+                         thread is started for each backend
+        :type executor: :class:`woob.core.executor.IExecutor`
+        :param timeout: maximum duration of the call, in seconds
+        :type timeout: :class:`float`
+        :param deadline: time, as returned by :func:`time.monotonic`, at
+                         which the call expires
+        :type deadline: :class:`float`
+        :param maxsize: maximum number of results waiting to be consumed;
+                        when reached, backends are paused until the consumer
+                        takes results
+        :type maxsize: :class:`int`
+        :param max_results: maximum number of results to get from each
+                            backend; its iterator is then closed
+        :type max_results: :class:`int`
+        :param first: stop the call as soon as this number of results is
+                      received; backends still running are interrupted
+        :type first: :class:`int`
+        :param merge_key: if set, results of every backend are expected to be
+                          sorted by this key, and they are merged to be
+                          returned in a globally sorted order; *maxsize* then
+                          bounds the results waiting for each backend
+                          (:attr:`MERGE_MAXSIZE` by default). A backend is
+                          not paused while another one is still queued by
+                          the executor, as the merge can't go on before it
+                          starts, so the bound only holds if the executor
+                          runs every backend at once
+        :type merge_key: :class:`callable`
+        :param merge_reverse: results are sorted in descending order
+        :type merge_reverse: :class:`bool`
+        :param retry_budget: total number of retries of failed requests
+                             allowed to the browsers of every backend, see
+                             :attr:`woob.browser.browsers.Browser.RETRY_POLICY`
+        :type retry_budget: :class:`int`
+        :param skip_open_circuits: do not call backends whose module has a
+                                   site currently down, see
+                                   :class:`woob.browser.breaker.CircuitBreaker`;
+                                   they are reported with a
+                                   :class:`woob.browser.exceptions.CircuitOpen`
+                                   error
+        :type skip_open_circuits: :class:`bool`
         """
         self.logger = getLogger(__name__)
 
-        self.responses = queue.Queue()
+        # a backend is called once, even if it is given several times
+        backends = list(dict.fromkeys(backends))
+
+        # Results and completion of tasks are signaled through this condition,
+        # so consumers are woken up as soon as something happens.
+        self.condition = Condition()
+        self.responses = deque()
+        self.listeners = []
         self.errors = []
-        self.tasks = queue.Queue()
+        self.running = len(backends)
+        self.pending = set(backends)
+        self.started = set()
+        self.interrupted = set()
         self.stop_event = Event()
-        self.threads = []
+        self.futures = []
+
+        if timeout is not None:
+            deadline = min(deadline or float("inf"), time.monotonic() + timeout)
+        self.deadline = deadline
+        self.expired = False
+        self.maxsize = maxsize
+        self.max_results = max_results
+        self.first = first
+        self.received = 0
+        # set when no more results are expected, because the deadline is over
+        # or enough results have been received
+        self.finished = False
+
+        # When merging, results are queued per backend, and the heap contains
+        # the head of every non-empty queue.
+        self.merge_key = merge_key
+        self.merge_reverse = merge_reverse
+        if merge_key and maxsize is None:
+            self.maxsize = self.MERGE_MAXSIZE
+        self.queues = {backend: deque() for backend in backends}
+        self.heap = []
+        self.sequence = count()
+
+        if retry_budget is not None:
+            from woob.browser.backoff import RetryBudget  # here to avoid loading browser for every call
+
+            retry_budget = RetryBudget(retry_budget)
+        self.retry_budget = retry_budget
+
+        from woob.browser.interrupt import CallInterruption
+
+        self.interruption = CallInterruption(self.deadline)
+
+        if executor is None:
+            executor = ThreadExecutor()
+        self.executor = executor
+
+        if skip_open_circuits:
+            from woob.browser.breaker import breakers  # here to avoid loading browser for every call
+
+            available = []
+            for backend in backends:
+                breaker = breakers.get_open(getattr(backend, "NAME", None))
+                if breaker is None:
+                    available.append(backend)
+                    continue
+
+                self.logger.debug("%s: Skipped as %s is down", backend, breaker.key[1])
+                self.errors.append((backend, breaker.make_error(), ""))
+                self.task_done(backend)
+            backends = available
 
         for backend in backends:
-            t = Thread(target=self.backend_process, args=(function, args, kwargs))
-            t.start()
-            self.threads.append(t)
-            self.tasks.put(backend)
+            future = executor.submit(backend, self.backend_process, backend, function, args, kwargs)
+            self.futures.append((backend, future))
+            future.add_done_callback(partial(self.task_ended, backend))
 
     def store_result(self, backend, result):
         """Store the result when a backend task finished."""
@@ -70,53 +227,329 @@ def store_result(self, backend, result):
 
         if isinstance(result, BaseObject):
             result.backend = backend.name
-        self.responses.put(result)
 
-    def backend_process(self, function, args, kwargs):
+        queue = self.queues[backend] if self.merge_key else self.responses
+        with self.condition:
+            while (
+                self.maxsize
+                and len(queue) >= self.maxsize
+                and not self.stop_event.is_set()
+                and not self.finished
+                and not self.waits_for_queued_backend()
+            ):
+                # wait for the consumer to take results
+                self.wait_condition()
+
+            if self.finished:
+                # too late, the call is over
+                return
+
+            if self.merge_key and not queue:
+                self.push_head(backend, result)
+            queue.append(result)
+            self.received += 1
+            if self.first is not None and self.received >= self.first:
+                self.complete()
+
+            self.notify()
+
+    def waits_for_queued_backend(self):
+        """
+        Whether the merge waits for a backend which is not started yet.
+
+        Backends running are then not paused, otherwise they could keep
+        every worker of the executor, and the merge would never go on.
+
+        Must be called with :attr:`condition` held.
+        """
+        if not self.merge_key:
+            return False
+
+        return any(not self.queues[backend] for backend in self.pending - self.started)
+
+    def store_error(self, backend, error):
+        """Store an error raised by a backend task."""
+        with self.condition:
+            if backend in self.interrupted:
+                # backend has been interrupted because the call is over
+                return
+
+            self.errors.append((backend, error, get_backtrace(error)))
+
+    def task_done(self, backend):
+        """Signal that a backend task is over."""
+        with self.condition:
+            if backend not in self.pending:
+                return
+
+            self.running -= 1
+            self.pending.discard(backend)
+            self.notify()
+
+    def task_ended(self, backend, future):
+        """
+        Called when the future of a backend task is done.
+
+        If the executor cancelled the task, or failed to run it, for example
+        because it is shut down, the task is considered as over.
+        """
+        with self.condition:
+            if backend not in self.pending:
+                # backend_process() ran
+                return
+
+            if not future.cancelled():
+                error = future.exception()
+                self.errors.append((backend, error, ""))
+            elif not self.finished and not self.stop_event.is_set():
+                self.errors.append((backend, CancelledError("Task cancelled by the executor"), ""))
+            self.task_done(backend)
+
+    def remaining_time(self):
+        """
+        Get the time left before the deadline of the call.
+
+        :returns: seconds, or ``None`` if there is no deadline
+        :rtype: :class:`float` or None
+        """
+        if self.deadline is None:
+            return None
+        return max(0, self.deadline - time.monotonic())
+
+    def expire(self):
+        """
+        Stop the call when its deadline is over.
+
+        Results already received are still returned, and backends still
+        running are reported with a :class:`CallTimeout` error. Their
+        requests are interrupted.
+        """
+        with self.condition:
+            if self.finished:
+                return
+
+            self.expired = True
+            self.logger.debug("Call expired, %d backends did not finish", len(self.pending))
+            for backend in self.pending:
+                self.errors.append((backend, CallTimeout("Backend did not finish before the deadline"), ""))
+
+            self.finish()
+
+    def complete(self):
+        """
+        Stop the call when enough results have been received.
+
+        Backends still running are interrupted.
+        """
+        with self.condition:
+            if self.finished:
+                return
+
+            self.logger.debug("Got %d results, interrupting %d backends", self.received, len(self.pending))
+            self.finish()
+
+    def finish(self):
+        """
+        Mark the call as finished, and interrupt backends still running.
+
+        Next requests sent by their browsers for this call raise
+        :class:`woob.browser.exceptions.BrowserInterrupted`, and streamed
+        responses being read are closed. A request already sent runs until it
+        gets a response, or until the timeout of the browser.
+
+        Must be called with :attr:`condition` held.
+        """
+        self.finished = True
+        for backend, future in self.futures:
+            if backend not in self.pending:
+                continue
+
+            self.interrupted.add(backend)
+            # a task still queued will never run
+            future.cancel()
+
+        self.interruption.interrupt()
+        self.notify()
+
+    def wait_condition(self):
+        """
+        Wait until :attr:`condition` is notified, or the deadline is over.
+
+        Must be called with :attr:`condition` held.
+        """
+        timeout = self.remaining_time()
+        if timeout is None:
+            self.condition.wait()
+            return
+
+        if timeout > 0:
+            self.condition.wait(timeout)
+        if self.remaining_time() == 0:
+            self.expire()
+
+    def notify(self):
+        """
+        Wake up consumers waiting for results.
+
+        Must be called with :attr:`condition` held.
+        """
+        self.condition.notify_all()
+        for listener in self.listeners:
+            listener()
+
+    def backend_process(self, backend, function, args, kwargs):
         """
         Internal method to run a method of a backend.
 
-        As this method may be blocking, it should be run on its own thread.
+        As this method may be blocking, it is run by the executor.
         """
-        backend = self.tasks.get()
-        with backend:
+        if self.stop_event.is_set() or self.finished:
+            self.task_done(backend)
+            return
+
+        from woob.browser.interrupt import use_interruption
+
+        with backend, self.use_retry_budget(), use_interruption(self.interruption):
             try:
+                with self.condition:
+                    self.started.add(backend)
+                    # backends paused by the merge may go on
+                    self.notify()
+
                 # Call method on backend
                 try:
                     self.logger.debug("%s: Calling function %s", backend, function)
-                    if callable(function):
-                        result = function(backend, *args, **kwargs)
-                    else:
-                        result = getattr(backend, function)(*args, **kwargs)
+                    result = self.executor.call(backend, function, args, kwargs)
                 except Exception as error:
                     self.logger.debug("%s: Called function %s raised an error: %r", backend, function, error)
-                    self.errors.append((backend, error, get_backtrace(error)))
+                    self.store_error(backend, error)
                 else:
                     self.logger.debug("%s: Called function %s returned: %r", backend, function, result)
 
                     if hasattr(result, "__iter__") and not isinstance(result, (bytes, str)):
                         # Loop on iterator
+                        count = 0
                         try:
                             for subresult in result:
                                 self.store_result(backend, subresult)
-                                if self.stop_event.is_set():
+                                if subresult is not None:
+                                    count += 1
+
+                                if self.stop_event.is_set() or self.finished:
+                                    break
+
+                                if self.max_results is not None and count >= self.max_results:
+                                    self.logger.debug("%s: Got %d results, stop", backend, count)
                                     break
                         except Exception as error:
-                            self.errors.append((backend, error, get_backtrace(error)))
+                            self.store_error(backend, error)
+                        finally:
+                            if isinstance(result, GeneratorType):
+                                # stop the generator now
+                                result.close()
                     else:
                         self.store_result(backend, result)
             finally:
-                self.tasks.task_done()
+                self.task_done(backend)
+
+    def use_retry_budget(self):
+        """
+        Context manager making the retry budget of the call available to
+        requests sent by backends.
+        """
+        if self.retry_budget is None:
+            return nullcontext()
+
+        from woob.browser.backoff import use_retry_budget
+
+        return use_retry_budget(self.retry_budget)
+
+    def push_head(self, backend, result):
+        """
+        Push the first result queued for a backend on the merge heap.
+
+        Must be called with :attr:`condition` held.
+        """
+        key = self.merge_key(result)
+        if self.merge_reverse:
+            key = ReversedKey(key)
+        heapq.heappush(self.heap, (key, next(self.sequence), backend))
+
+    def has_responses(self):
+        """
+        Whether results are waiting to be consumed.
+
+        Must be called with :attr:`condition` held.
+        """
+        return bool(self.heap if self.merge_key else self.responses)
+
+    def is_ready(self):
+        """
+        Whether the next result can be returned.
+
+        When merging, it requires a result from every backend still running,
+        as the next one may be lower than results already received.
+
+        Must be called with :attr:`condition` held.
+        """
+        if not self.merge_key:
+            return bool(self.responses)
+
+        if not self.heap:
+            return False
+        return self.finished or all(self.queues[backend] for backend in self.pending)
+
+    def pop_response(self):
+        """
+        Get the next result.
+
+        Must be called with :attr:`condition` held.
+        """
+        if not self.merge_key:
+            return self.responses.popleft()
+
+        backend = heapq.heappop(self.heap)[2]
+        queue = self.queues[backend]
+        result = queue.popleft()
+        if queue:
+            self.push_head(backend, queue[0])
+        return result
+
+    def next_response(self, block=True):
+        """
+        Wait for the next result.
+
+        :param block: if False, do not wait and return :data:`PENDING` when
+                      no result is available yet
+        :type block: bool
+        :returns: the result, or ``None`` once every task is finished or the
+                  call has been stopped.
+        """
+        with self.condition:
+            if self.remaining_time() == 0:
+                self.expire()
+
+            while block and not self.is_ready() and self.running and not self.stop_event.is_set() and not self.finished:
+                self.wait_condition()
+
+            if self.stop_event.is_set() or not self.has_responses() and (not self.running or self.finished):
+                return None
+            if not self.is_ready():
+                return PENDING
+
+            if self.maxsize:
+                # wake up paused backends
+                self.condition.notify_all()
+            return self.pop_response()
 
     def _callback_thread_run(self, callback, errback, finishback):
-        while not self.stop_event.is_set() and (self.tasks.unfinished_tasks or not self.responses.empty()):
-            try:
-                response = self.responses.get(timeout=0.1)
-            except queue.Empty:
-                continue
-            else:
-                if callback:
-                    callback(response)
+        while True:
+            response = self.next_response()
+            if response is None:
+                break
+
+            if callback:
+                callback(response)
 
         # Raise errors
         while errback and self.errors:
@@ -144,9 +577,10 @@ def finishback()
         return thread
 
     def wait(self):
-        """Wait until all tasks are finished."""
-        for thread in self.threads:
-            thread.join()
+        """Wait until all tasks are finished, or the deadline is over."""
+        with self.condition:
+            while self.running and not self.finished:
+                self.wait_condition()
 
         if self.errors:
             raise CallErrors(self.errors)
@@ -161,19 +595,72 @@ def stop(self, wait=False):
 
         self.stop_event.set()
 
+        for backend, future in self.futures:
+            # a task still queued will never run
+            future.cancel()
+
+        with self.condition:
+            self.notify()
+
         if wait:
             self.wait()
 
     def __iter__(self):
         try:
-            while not self.stop_event.is_set() and (self.tasks.unfinished_tasks or not self.responses.empty()):
-                try:
-                    yield self.responses.get(timeout=0.1)
-                except queue.Empty:
-                    continue
+            while True:
+                response = self.next_response()
+                if response is None:
+                    break
+
+                yield response
         except:
             self.stop()
             raise
 
         if self.errors:
             raise CallErrors(self.errors)
+
+    async def __aiter__(self):
+        """
+        Iterate on results from an :mod:`asyncio` event loop.
+
+        The loop is woken up by backend threads when a result is available,
+        and cancelling the iteration stops the call.
+        """
+        loop = asyncio.get_running_loop()
+        event = asyncio.Event()
+
+        def wakeup():
+            try:
+                loop.call_soon_threadsafe(event.set)
+            except RuntimeError:
+                # event loop is closed
+                pass
+
+        with self.condition:
+            self.listeners.append(wakeup)
+
+        try:
+            while True:
+                event.clear()
+                response = self.next_response(block=False)
+                if response is None:
+                    break
+
+                if response is PENDING:
+                    try:
+                        await asyncio.wait_for(event.wait(), self.remaining_time())
+                    except asyncio.TimeoutError:
+                        pass
+                    continue
+
+                yield response
+        except BaseException:
+            self.stop()
+            raise
+        finally:
+            with self.condition:
+                self.listeners.remove(wakeup)
+
+        if self.errors:
+            raise CallErrors(self.errors)
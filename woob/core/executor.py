@@ -0,0 +1,369 @@
+# Copyright(C) 2010-2024 Romain Bignon
+#
+# This file is part of woob.
+#
+# woob is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# woob is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with woob. If not, see <http://www.gnu.org/licenses/>.
+
+import multiprocessing
+import pickle
+from collections import defaultdict, deque
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from threading import Lock, Thread
+
+from woob.tools.log import getLogger
+from woob.tools.misc import get_backtrace
+
+
+__all__ = ["IExecutor", "ThreadExecutor", "PoolExecutor", "ProcessExecutor"]
+
+
+def _call(backend, function, args, kwargs):
+    if callable(function):
+        return function(backend, *args, **kwargs)
+    return getattr(backend, function)(*args, **kwargs)
+
+
+def _run(future, function, args, kwargs):
+    if not future.set_running_or_notify_cancel():
+        return
+
+    try:
+        result = function(*args, **kwargs)
+    except Exception as exc:
+        future.set_exception(exc)
+    else:
+        future.set_result(result)
+
+
+class IExecutor:
+    """Interface of an executor of backend tasks."""
+
+    def submit(self, backend, function, *args, **kwargs):
+        """
+        Plan a call to a function for a backend.
+
+        :param backend: backend on which the task is run
+        :type backend: :class:`woob.tools.backend.Module`
+        :param function: function to call
+        :type function: callable
+        :param args: arguments to give to function
+        :rtype: :class:`concurrent.futures.Future`
+        """
+        raise NotImplementedError()
+
+    def call(self, backend, function, args, kwargs):
+        """
+        Call a method of a backend.
+
+        This is called by the tasks, with the backend locked.
+
+        :param backend: backend to call
+        :type backend: :class:`woob.tools.backend.Module`
+        :param function: backend's method name, or callable object
+        :type function: :class:`str` or :class:`callable`
+        :returns: the result of the method
+        """
+        return _call(backend, function, args, kwargs)
+
+    def shutdown(self, wait=True):
+        """
+        Stop accepting new tasks and release resources.
+
+        :param wait: if True, wait until running tasks are finished
+        :type wait: bool
+        """
+        raise NotImplementedError()
+
+
+class ThreadExecutor(IExecutor):
+    """
+    Executor which starts a new thread for every task.
+
+    There is no limit on the number of concurrent tasks.
+    """
+
+    def submit(self, backend, function, *args, **kwargs):
+        future = Future()
+        Thread(target=_run, args=(future, function, args, kwargs), daemon=True).start()
+        return future
+
+    def shutdown(self, wait=True):
+        pass
+
+
+class PoolExecutor(IExecutor):
+    """
+    Executor using a bounded pool of long-lived threads.
+
+    Tasks are queued until a worker is available. It is shared by all calls
+    made on a :class:`woob.core.woob.WoobBase` instance.
+
+    As tasks are queued, a backend method must not wait for the result of
+    another call made through the same executor, or it could wait forever
+    when every worker is busy.
+
+    :param max_workers: maximum number of tasks run at the same time
+    :type max_workers: int
+    :param module_workers: maximum number of tasks run at the same time for a
+                           module, keyed by module name
+    :type module_workers: dict[str, int]
+    """
+
+    MAX_WORKERS = 32
+    """
+    Default maximum number of workers.
+    """
+
+    def __init__(self, max_workers=None, module_workers=None):
+        self.logger = getLogger("%s.executor" % __name__)
+        self.max_workers = max_workers or self.MAX_WORKERS
+        self.module_workers = dict(module_workers or {})
+
+        self.pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="woob-backend")
+        self.mutex = Lock()
+        self.running = defaultdict(int)
+        self.pending = defaultdict(deque)
+
+    def submit(self, backend, function, *args, **kwargs):
+        future = Future()
+        module = getattr(backend, "NAME", None)
+
+        with self.mutex:
+            limit = self.module_workers.get(module)
+            if limit is not None and self.running[module] >= limit:
+                self.logger.debug("%s: %d tasks already running for module %s, queuing", backend, limit, module)
+                self.pending[module].append((future, function, args, kwargs))
+                return future
+            self.running[module] += 1
+
+        self._start(module, future, function, args, kwargs)
+        return future
+
+    def _start(self, module, future, function, args, kwargs):
+        try:
+            self.pool.submit(self._run_task, module, future, function, args, kwargs)
+        except RuntimeError as exc:
+            # pool is shut down
+            self._release(module)
+            if future.set_running_or_notify_cancel():
+                future.set_exception(exc)
+
+    def _run_task(self, module, future, function, args, kwargs):
+        try:
+            _run(future, function, args, kwargs)
+        finally:
+            self._release(module)
+
+    def _release(self, module):
+        with self.mutex:
+            if not self.pending[module]:
+                self.running[module] -= 1
+                return
+            task = self.pending[module].popleft()
+
+        self._start(module, *task)
+
+    def shutdown(self, wait=True):
+        with self.mutex:
+            pending = [task for tasks in self.pending.values() for task in tasks]
+            self.pending.clear()
+
+        for future, _, _, _ in pending:
+            future.cancel()
+
+        self.pool.shutdown(wait=wait)
+
+
+class RemoteTraceback(Exception):
+    """Backtrace of an exception raised in a worker process."""
+
+    def __init__(self, backtrace):
+        super().__init__(backtrace)
+        self.backtrace = backtrace
+
+    def __str__(self):
+        return self.backtrace
+
+
+# Backends loaded in a worker process of ProcessExecutor.
+_worker_woobs = {}
+_worker_backends = {}
+
+
+def _get_worker_backend(modules_path, module_name, backend_name, params):
+    from woob.core.woob import WoobBase
+
+    key = (modules_path, module_name, backend_name)
+    backend, backend_params = _worker_backends.get(key, (None, None))
+    if backend is not None and backend_params == params:
+        return backend
+
+    if modules_path not in _worker_woobs:
+        _worker_woobs[modules_path] = WoobBase(modules_path, executor=ThreadExecutor())
+    woob = _worker_woobs[modules_path]
+
+    if backend is not None:
+        # configuration has changed
+        with backend:
+            backend.deinit()
+
+    backend = woob.build_backend(module_name, params, name=backend_name)
+    _worker_backends[key] = (backend, params)
+    return backend
+
+
+def _picklable_error(error):
+    try:
+        pickle.dumps(error)
+    except Exception:
+        return Exception(repr(error))
+    return error
+
+
+def _process_call(modules_path, module_name, backend_name, params, function, args, kwargs, queue, stop, batch_size):
+    batch = []
+    try:
+        backend = _get_worker_backend(modules_path, module_name, backend_name, params)
+        with backend:
+            result = _call(backend, function, args, kwargs)
+
+            if hasattr(result, "__iter__") and not isinstance(result, (bytes, str)):
+                for subresult in result:
+                    if subresult is None:
+                        continue
+
+                    batch.append(subresult)
+                    if len(batch) >= batch_size:
+                        queue.put(("results", batch))
+                        batch = []
+                        if stop.is_set():
+                            break
+            elif result is not None:
+                batch.append(result)
+    except Exception as error:
+        if batch:
+            queue.put(("results", batch))
+            batch = []
+        queue.put(("error", _picklable_error(error), get_backtrace(error)))
+    finally:
+        if batch:
+            queue.put(("results", batch))
+        queue.put(("end",))
+
+
+class ProcessExecutor(PoolExecutor):
+    """
+    Executor running backend calls in a pool of worker processes.
+
+    It is useful when backends do CPU-bound work, like parsing large
+    documents, as processes are not limited by the GIL. Each worker process
+    loads modules and builds backends once, and keeps them for next calls.
+
+    Results are sent back in batches to the calling process, where they are
+    yielded by the :class:`woob.core.bcall.BackendsCall` object as usual.
+
+    Console applications use it with the ``--processes`` option.
+
+    Some limitations apply:
+
+    * the called function must be a method name, or a picklable callable;
+    * arguments and results must be picklable;
+    * backends built in workers have no storage, so the browser state is not
+      loaded nor saved;
+    * transient configuration values (like OTP) are not sent to workers.
+
+    :param processes: number of worker processes (default is the number of CPUs)
+    :type processes: int
+    :param max_workers: maximum number of calls run at the same time
+    :type max_workers: int
+    :param module_workers: maximum number of calls run at the same time for a
+                           module, keyed by module name
+    :type module_workers: dict[str, int]
+    :param mp_context: :mod:`multiprocessing` context to use
+    """
+
+    BATCH_SIZE = 100
+    """
+    Number of results sent at once by workers.
+    """
+
+    def __init__(self, processes=None, max_workers=None, module_workers=None, mp_context=None):
+        super().__init__(max_workers, module_workers)
+        self.mp_context = mp_context or multiprocessing.get_context()
+        self.processes = ProcessPoolExecutor(max_workers=processes, mp_context=self.mp_context)
+        self.manager = None
+        self.manager_lock = Lock()
+
+    def get_manager(self):
+        with self.manager_lock:
+            if self.manager is None:
+                self.manager = self.mp_context.Manager()
+            return self.manager
+
+    def call(self, backend, function, args, kwargs):
+        manager = self.get_manager()
+        queue = manager.Queue()
+        stop = manager.Event()
+
+        params = backend.config.dump()
+        params.update(backend._private_config)
+
+        future = self.processes.submit(
+            _process_call,
+            backend.woob.modules_loader.get_module_path(backend.NAME),
+            backend.NAME,
+            backend.name,
+            params,
+            function,
+            args,
+            kwargs,
+            queue,
+            stop,
+            self.BATCH_SIZE,
+        )
+        return self._iter_results(future, queue, stop)
+
+    def _iter_results(self, future, queue, stop):
+        def done(future):
+            # wake up the reader if the worker process died
+            try:
+                queue.put(("end",))
+            except Exception:
+                pass
+
+        future.add_done_callback(done)
+
+        try:
+            while True:
+                message = queue.get()
+                if message[0] == "results":
+                    yield from message[1]
+                elif message[0] == "error":
+                    _, error, backtrace = message
+                    raise error from RemoteTraceback(backtrace)
+                else:
+                    break
+
+            # raise errors which occurred while sending the task or results
+            future.result()
+        finally:
+            stop.set()
+
+    def shutdown(self, wait=True):
+        super().shutdown(wait)
+        self.processes.shutdown(wait=wait)
+        with self.manager_lock:
+            if self.manager is not None:
+                self.manager.shutdown()
+                self.manager = None
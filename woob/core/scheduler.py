@@ -16,7 +16,11 @@
 # along with woob. If not, see <http://www.gnu.org/licenses/>.
 
 
-from threading import Event, RLock, Timer
+import heapq
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from threading import Condition, Event, RLock, Thread
 
 from woob.tools.log import getLogger
 from woob.tools.misc import get_backtrace
@@ -76,60 +80,172 @@ def want_stop(self):
         raise NotImplementedError()
 
 
-class RepeatedTimer(Timer):
-    def run(self):
-        while not self.finished.is_set():
-            try:
-                self.function(*self.args, **self.kwargs)
-            except Exception:
-                # do not stop timer because of an exception
-                print(get_backtrace())
-            self.finished.wait(self.interval)
-        self.finished.set()
+class ScheduledEvent:
+    """
+    Event planned by :class:`Scheduler`.
+
+    :param id: event identificator
+    :type id: int
+    :param interval: delay before the call, or between two calls
+    :type interval: float
+    :param function: function to call
+    :type function: callable
+    :param args: arguments to give to function
+    :type args: tuple
+    :param repeat: if True, call the function every *interval* seconds
+    :type repeat: bool
+    :param jitter: maximum random delay added to every call
+    :type jitter: float
+    :param max_concurrency: maximum number of calls running at the same time
+    :type max_concurrency: int
+    """
+
+    def __init__(self, id, interval, function, args, repeat=False, jitter=0, max_concurrency=1):
+        self.id = id
+        self.interval = interval
+        self.function = function
+        self.args = args
+        self.repeat = repeat
+        self.jitter = jitter
+        self.max_concurrency = max_concurrency
+        self.running = 0
+        self.base = None
+
+    def plan(self, base):
+        """
+        Compute the time of the next call.
+
+        :param base: time, as returned by :func:`time.monotonic`, at which
+                     the call should happen without jitter
+        :returns: time of the call
+        """
+        self.base = base
+        if self.jitter:
+            return base + random.uniform(0, self.jitter)
+        return base
 
 
 class Scheduler(IScheduler):
-    """Scheduler using Python's :mod:`threading`."""
+    """
+    Scheduler using Python's :mod:`threading`.
+
+    Events are stored in a heap, and a single timer thread waits for the next
+    one. Calls are then dispatched to a bounded pool of worker threads.
+
+    :param max_workers: maximum number of functions called at the same time
+    :type max_workers: int
+    :param jitter: maximum random delay added to every call, to avoid calling
+                   many functions planned with the same interval at once
+    :type jitter: float
+    :param max_concurrency: maximum number of calls of a repeated function
+                            running at the same time; when reached, a call is
+                            skipped
+    :type max_concurrency: int
+    """
+
+    MAX_WORKERS = 10
+    """
+    Default maximum number of workers.
+    """
 
-    def __init__(self):
+    def __init__(self, max_workers=None, jitter=0, max_concurrency=1):
         self.logger = getLogger("%s.scheduler" % __name__)
         self.mutex = RLock()
+        self.condition = Condition(self.mutex)
         self.stop_event = Event()
         self.count = 0
         self.queue = {}
+        self.heap = []
+        self.jitter = jitter
+        self.max_concurrency = max_concurrency
+        self.pool = ThreadPoolExecutor(max_workers=max_workers or self.MAX_WORKERS, thread_name_prefix="woob-scheduler")
+        self.thread = None
 
-    def schedule(self, interval, function, *args):
-        return self._schedule(Timer, interval, self._schedule_callback, function, *args)
+    def schedule(self, interval, function, *args, jitter=None, max_concurrency=None):
+        return self._schedule(False, interval, function, args, jitter, max_concurrency)
 
-    def repeat(self, interval, function, *args):
-        return self._schedule(RepeatedTimer, interval, self._repeat_callback, function, *args)
+    def repeat(self, interval, function, *args, jitter=None, max_concurrency=None):
+        # the first call happens immediately
+        return self._schedule(True, interval, function, args, jitter, max_concurrency)
 
-    def _schedule(self, klass, interval, meta_func, function, *args):
+    def _schedule(self, repeat, interval, function, args, jitter, max_concurrency):
         if self.stop_event.is_set():
             return
 
         with self.mutex:
             self.count += 1
-            self.logger.debug(f'function "{function.__name__}" will be called in {interval} seconds')
-            timer = klass(interval, meta_func, (self.count, interval, function, args))
-            self.queue[self.count] = timer
-            timer.start()
-            return self.count
+            event = ScheduledEvent(
+                self.count,
+                interval,
+                function,
+                args,
+                repeat=repeat,
+                jitter=self.jitter if jitter is None else jitter,
+                max_concurrency=max_concurrency or self.max_concurrency,
+            )
+            delay = 0 if repeat else interval
+            self.logger.debug(f'function "{function.__name__}" will be called in {delay} seconds')
 
-    def _schedule_callback(self, count, interval, function, args):
-        with self.mutex:
-            self.queue.pop(count)
-        return function(*args)
+            self.queue[event.id] = event
+            self._push(event, time.monotonic() + delay)
 
-    def _repeat_callback(self, count, interval, function, args):
-        function(*args)
+            if self.thread is None:
+                self.thread = Thread(target=self._timer_run, name="woob-scheduler-timer", daemon=True)
+                self.thread.start()
+            return event.id
+
+    def _push(self, event, base):
+        heapq.heappush(self.heap, (event.plan(base), event.id))
+        self.condition.notify()
+
+    def _timer_run(self):
         with self.mutex:
-            try:
-                e = self.queue[count]
-            except KeyError:
-                return
-            else:
-                self.logger.debug(f'function "{function.__name__}" will be called in {e.interval} seconds')
+            while not self.stop_event.is_set():
+                if not self.heap:
+                    self.condition.wait()
+                    continue
+
+                when, id = self.heap[0]
+                delay = when - time.monotonic()
+                if delay > 0:
+                    self.condition.wait(delay)
+                    continue
+
+                heapq.heappop(self.heap)
+                event = self.queue.get(id)
+                if event is None:
+                    # canceled
+                    continue
+
+                if event.repeat:
+                    self._push(event, max(event.base + event.interval, time.monotonic()))
+                else:
+                    self.queue.pop(id)
+
+                if event.running >= event.max_concurrency:
+                    self.logger.debug(
+                        'function "%s" is already running %d times, skip this call',
+                        event.function.__name__,
+                        event.running,
+                    )
+                    continue
+
+                event.running += 1
+                try:
+                    self.pool.submit(self._run_event, event)
+                except RuntimeError:
+                    # pool is shut down
+                    return
+
+    def _run_event(self, event):
+        try:
+            event.function(*event.args)
+        except Exception:
+            # do not stop repeated calls because of an exception
+            self.logger.error('function "%s" raised an error:\n%s', event.function.__name__, get_backtrace())
+        finally:
+            with self.mutex:
+                event.running -= 1
 
     def cancel(self, ev):
         with self.mutex:
@@ -137,17 +253,14 @@ def cancel(self, ev):
                 e = self.queue.pop(ev)
             except KeyError:
                 return False
-            e.cancel()
             self.logger.debug('scheduled function "%s" is canceled' % e.function.__name__)
             return True
 
     def _wait_to_stop(self):
         self.want_stop()
-        with self.mutex:
-            for e in self.queue.values():
-                e.cancel()
-                e.join()
-            self.queue = {}
+        if self.thread is not None:
+            self.thread.join()
+        self.pool.shutdown(wait=True)
 
     def run(self):
         try:
@@ -163,8 +276,9 @@ def run(self):
     def want_stop(self):
         self.stop_event.set()
         with self.mutex:
-            for t in self.queue.values():
-                t.cancel()
-                # Contrary to _wait_to_stop(), don't call t.join
-                # because want_stop() have to be non-blocking.
             self.queue = {}
+            self.heap = []
+            self.condition.notify()
+            # Contrary to _wait_to_stop(), don't wait for running calls
+            # because want_stop() have to be non-blocking.
+        self.pool.shutdown(wait=False)
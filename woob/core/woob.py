@@ -28,6 +28,7 @@
 from woob.capabilities.base import Capability
 from woob.core.backendscfg import BackendsConfig
 from woob.core.bcall import BackendsCall
+from woob.core.executor import IExecutor, PoolExecutor
 from woob.core.modules import ModulesLoader, RepositoryModulesLoader
 from woob.core.repositories import IProgress, PrintProgress, Repositories
 from woob.core.requests import RequestsManager
@@ -67,6 +68,8 @@ class WoobBase:
     :type storage: :class:`woob.tools.storage.IStorage`
     :param scheduler: what scheduler to use; default is :class:`woob.core.scheduler.Scheduler`
     :type scheduler: :class:`woob.core.scheduler.IScheduler`
+    :param executor: what executor runs backend calls; default is :class:`woob.core.executor.PoolExecutor`
+    :type executor: :class:`woob.core.executor.IExecutor`
     """
 
     @classproperty
@@ -75,7 +78,11 @@ def VERSION(self):
         return __version__
 
     def __init__(
-        self, modules_path: str | None = None, storage: IStorage | None = None, scheduler: IScheduler | None = None
+        self,
+        modules_path: str | None = None,
+        storage: IStorage | None = None,
+        scheduler: IScheduler | None = None,
+        executor: IExecutor | None = None,
     ):
         self.logger = getLogger("woob")
         self.backend_instances: dict[str, Module] = {}
@@ -88,6 +95,10 @@ def __init__(
             scheduler = Scheduler()
         self.scheduler = scheduler
 
+        if executor is None:
+            executor = PoolExecutor()
+        self.executor = executor
+
         self.storage = storage
 
     def __deinit__(self):
@@ -99,6 +110,7 @@ def deinit(self):
         properly unload all correctly.
         """
         self.unload_backends()
+        self.executor.shutdown(wait=False)
 
     def build_modules_loader(self) -> ModulesLoader:
         """
@@ -268,7 +280,7 @@ def caller(*args, **kwargs):
     def do(self, function: Callable | str, *args, **kwargs) -> BackendsCall:
         r"""
         Do calls on loaded backends with specified arguments, in separated
-        threads.
+        threads of the :attr:`executor`.
 
         This function has two modes:
 
@@ -284,6 +296,50 @@ def do(self, function: Callable | str, *args, **kwargs) -> BackendsCall:
         :type backends: list[:class:`str`]
         :param caps: iterate on backends which implement this caps
         :type caps: list[:class:`woob.capabilities.base.Capability`]
+        :param timeout: maximum duration of the call, in seconds. When it is
+                        over, results already received are returned, and
+                        backends which did not finish are reported with a
+                        :class:`woob.core.bcall.CallTimeout` error
+        :type timeout: :class:`float`
+        :param deadline: same as *timeout*, but expressed as a time returned
+                         by :func:`time.monotonic`
+        :type deadline: :class:`float`
+        :param maxsize: maximum number of results waiting to be consumed;
+                        when reached, backends are paused until the caller
+                        takes results
+        :type maxsize: :class:`int`
+        :param max_results: maximum number of results to get from each backend
+        :type max_results: :class:`int`
+        :param first: return as soon as this number of results is received,
+                      and interrupt backends still running; useful to query
+                      equivalent backends and keep the fastest answer
+        :type first: :class:`int`
+        :param merge_key: if set, results of every backend are expected to be
+                          sorted by this key, and they are returned merged in
+                          a globally sorted order, for example
+                          ``merge_key=lambda tr: tr.date, merge_reverse=True``
+                          for transactions. *maxsize* then bounds the results
+                          waiting for each backend, but backends are only
+                          paused once the :attr:`executor` has started every
+                          one of them
+        :type merge_key: :class:`callable`
+        :param merge_reverse: results are sorted in descending order
+        :type merge_reverse: :class:`bool`
+        :param retry_budget: total number of retries of requests failing with
+                             a transient error, shared by every backend of
+                             the call; it only applies to browsers with a
+                             :attr:`woob.browser.browsers.Browser.RETRY_POLICY`
+        :type retry_budget: :class:`int`
+        :param skip_open_circuits: do not call backends of modules whose site
+                                   is down, according to their circuit
+                                   breaker (see
+                                   :attr:`woob.browser.browsers.Browser.CIRCUIT_BREAKER_THRESHOLD`);
+                                   they are reported with a
+                                   :class:`woob.browser.exceptions.CircuitOpen`
+                                   error without using a worker. The state of
+                                   circuits can also be checked with
+                                   :data:`woob.browser.breaker.breakers`
+        :type skip_open_circuits: :class:`bool`
         :rtype: A :class:`woob.core.bcall.BackendsCall` object (iterable)
         """
         backends = list(self.backend_instances.values())
@@ -318,9 +374,30 @@ def do(self, function: Callable | str, *args, **kwargs) -> BackendsCall:
         # here on this object, because caller might want to use other methods, like
         # wait() on callback_thread().
         # Thanks a lot.
-        return BackendsCall(backends, function, *args, **kwargs)
+        return BackendsCall(backends, function, *args, executor=self.executor, **kwargs)
+
+    async def ado(self, function: Callable | str, *args, **kwargs) -> BackendsCall:
+        r"""
+        Asynchronous counterpart of :meth:`do`, for :mod:`asyncio` applications.
+
+        Calls are still run by the :attr:`executor` threads, but the returned
+        :class:`woob.core.bcall.BackendsCall` object can be iterated with
+        ``async for`` without blocking the event loop:
+
+        >>> async for account in await woob.ado('iter_accounts'):  # doctest: +SKIP
+        ...     print(account)
+
+        Cancelling the iteration stops the call. Errors raised by backends are
+        raised at the end of the iteration in a
+        :class:`woob.core.bcall.CallErrors` exception.
+
+        Parameters are the same as :meth:`do`.
+
+        :rtype: A :class:`woob.core.bcall.BackendsCall` object (async iterable)
+        """
+        return self.do(function, *args, **kwargs)
 
-    def schedule(self, interval: int, function: Callable, *args) -> int | None:
+    def schedule(self, interval: int, function: Callable, *args, **kwargs) -> int | None:
         """
         Schedule an event.
 
@@ -329,11 +406,13 @@ def schedule(self, interval: int, function: Callable, *args) -> int | None:
         :param function: function to call
         :type function: callabale
         :param args: arguments to give to function
+        :param kwargs: options supported by the scheduler, like ``jitter``
+                       for :class:`woob.core.scheduler.Scheduler`
         :returns: an event identificator
         """
-        return self.scheduler.schedule(interval, function, *args)
+        return self.scheduler.schedule(interval, function, *args, **kwargs)
 
-    def repeat(self, interval: int, function: Callable, *args) -> int | None:
+    def repeat(self, interval: int, function: Callable, *args, **kwargs) -> int | None:
         """
         Repeat a call to a function
 
@@ -342,9 +421,11 @@ def repeat(self, interval: int, function: Callable, *args) -> int | None:
         :param function: function to call
         :type function: callable
         :param args: arguments to give to function
+        :param kwargs: options supported by the scheduler, like ``jitter`` or
+                       ``max_concurrency`` for :class:`woob.core.scheduler.Scheduler`
         :returns: an event identificator
         """
-        return self.scheduler.repeat(interval, function, *args)
+        return self.scheduler.repeat(interval, function, *args, **kwargs)
 
     def cancel(self, ev: int) -> bool:
         """
@@ -385,6 +466,8 @@ class Woob(WoobBase):
     :type backends_filename: str
     :param storage: provide a storage where backends can save data
     :type storage: :class:`woob.tools.storage.IStorage`
+    :param executor: what executor runs backend calls; default is :class:`woob.core.executor.PoolExecutor`
+    :type executor: :class:`woob.core.executor.IExecutor`
     """
 
     BACKENDS_FILENAME = "backends"
@@ -396,6 +479,7 @@ def __init__(
         backends_filename: str | None = None,
         scheduler: IScheduler | None = None,
         storage: IStorage | None = None,
+        executor: IExecutor | None = None,
     ):
         # Create WORKDIR
         xdg_config = Path(os.environ.get("XDG_CONFIG_HOME") or Path.home() / ".config")
@@ -436,7 +520,7 @@ def __init__(
             backends_filename = os.path.join(self.workdir, backends_filename)
         self.backends_config: BackendsConfig = BackendsConfig(backends_filename)
 
-        super().__init__(modules_path=None, scheduler=scheduler, storage=storage)
+        super().__init__(modules_path=None, scheduler=scheduler, storage=storage, executor=executor)
 
     def build_modules_loader(self) -> RepositoryModulesLoader:
         """
@@ -43,6 +43,58 @@ class MoreResultsAvailable(Exception):
     pass
 
 
+def _do_complete_obj(backend, fields, obj):
+    if not obj:
+        return obj
+    if not isinstance(obj, BaseObject):
+        return obj
+
+    obj.backend = backend.name
+    if fields is None or len(fields) > 0:
+        obj = backend.fillobj(obj, fields) or obj
+    return obj
+
+
+def _do_complete_iter(backend, count, fields, condition, is_default_count, res):
+    modif = 0
+
+    for i, sub in enumerate(res):
+        sub = _do_complete_obj(backend, fields, sub)
+        if condition and condition.limit and condition.limit == i:
+            return
+
+        if condition and not condition.is_valid(sub):
+            modif += 1
+        else:
+            if count and i - modif == count:
+                if is_default_count:
+                    raise MoreResultsAvailable()
+                else:
+                    return
+            yield sub
+
+
+def do_complete(backend, count, selected_fields, condition, is_default_count, function, *args, **kwargs):
+    """
+    Call a backend method, and fill its results with the selected fields.
+
+    Results which do not match the condition are skipped, and at most *count*
+    results are returned. This function is run by the executor of
+    :class:`woob.core.woob.WoobBase`, so it must be picklable to be used
+    with :class:`woob.core.executor.ProcessExecutor`.
+    """
+    assert count is None or count > 0
+    if callable(function):
+        res = function(backend, *args, **kwargs)
+    else:
+        res = getattr(backend, function)(*args, **kwargs)
+
+    if hasattr(res, "__iter__") and not isinstance(res, (bytes, str)):
+        return _do_complete_iter(backend, count, selected_fields, condition, is_default_count, res)
+    else:
+        return _do_complete_obj(backend, selected_fields, res)
+
+
 class ApplicationStorage:
     def __init__(self, name, storage):
         self.name = name
@@ -177,6 +229,12 @@ def __init__(self, option_parser=None):
         self._parser.add_option("--nss", action="store_true", help="Use NSS instead of OpenSSL")
         self._parser.add_option("--force-ipv4", action="store_const", help="Force IPv4", const=4, dest="ipversion")
         self._parser.add_option("--force-ipv6", action="store_const", help="Force IPv6", const=6, dest="ipversion")
+        self._parser.add_option(
+            "--processes",
+            type="int",
+            metavar="N",
+            help="run backends in N worker processes, for CPU-bound modules (0 for one per CPU)",
+        )
 
         logging_options = OptionGroup(self._parser, "Logging Options")
         logging_options.add_option(
@@ -316,47 +374,6 @@ def _get_optparse_version(self):
                 version = f"Woob {self.APPNAME} v{self.VERSION}"
         return version
 
-    def _do_complete_obj(self, backend, fields, obj):
-        if not obj:
-            return obj
-        if not isinstance(obj, BaseObject):
-            return obj
-
-        obj.backend = backend.name
-        if fields is None or len(fields) > 0:
-            obj = backend.fillobj(obj, fields) or obj
-        return obj
-
-    def _do_complete_iter(self, backend, count, fields, res):
-        modif = 0
-
-        for i, sub in enumerate(res):
-            sub = self._do_complete_obj(backend, fields, sub)
-            if self.condition and self.condition.limit and self.condition.limit == i:
-                return
-
-            if self.condition and not self.condition.is_valid(sub):
-                modif += 1
-            else:
-                if count and i - modif == count:
-                    if self._is_default_count:
-                        raise MoreResultsAvailable()
-                    else:
-                        return
-                yield sub
-
-    def _do_complete(self, backend, count, selected_fields, function, *args, **kwargs):
-        assert count is None or count > 0
-        if callable(function):
-            res = function(backend, *args, **kwargs)
-        else:
-            res = getattr(backend, function)(*args, **kwargs)
-
-        if hasattr(res, "__iter__") and not isinstance(res, (bytes, str)):
-            return self._do_complete_iter(backend, count, selected_fields, res)
-        else:
-            return self._do_complete_obj(backend, selected_fields, res)
-
     def bcall_error_handler(self, backend, error, backtrace):
         """
         Handler for an exception inside the CallErrors exception.
@@ -437,6 +454,8 @@ def parse_args(self, args):
             print("--nss is deprecated and will be removed", file=sys.stderr)
         if self.options.ipversion:
             self.setup_ipversion()
+        if self.options.processes is not None:
+            self.setup_process_executor()
 
         # this only matters to developers
         if not self.options.debug and not self.options.save_responses:
@@ -505,6 +524,17 @@ def setup_ipversion(self):
             # XXX though probably overkill, we need that to each `module`
             module.allowed_gai_family = lambda family=family: family
 
+    def setup_process_executor(self):
+        """
+        Run backends in a pool of worker processes.
+
+        See :class:`woob.core.executor.ProcessExecutor` for limitations.
+        """
+        from woob.core.executor import ProcessExecutor
+
+        self.woob.executor.shutdown(wait=False)
+        self.woob.executor = ProcessExecutor(processes=self.options.processes or None)
+
     def create_logging_file_handler(self, filename):
         try:
             stream = open(os.path.expanduser(filename), "w")
@@ -35,6 +35,7 @@
 from woob.tools.application.formatters.iformatter import MandatoryFieldsNotFound
 from woob.tools.path import WorkingPath
 
+from .base import do_complete
 from .console import BackendNotGiven, ConsoleApplication
 from .formatters.load import FormatterLoadError, FormattersLoader
 from .pretty import colored
@@ -412,7 +413,9 @@ def do(self, function, *args, **kwargs):
                 )
                 self.formatter = self.formatters_loader.build_formatter(ReplApplication.DEFAULT_FORMATTER)
 
-        return self.woob.do(self._do_complete, self.options.count, fields, function, *args, **kwargs)
+        return self.woob.do(
+            do_complete, self.options.count, fields, self.condition, self._is_default_count, function, *args, **kwargs
+        )
 
     # TODO make _do_and_retry and _do_and_retry_wait public
     # TODO (bis): make this comportment as the default of 'do', with support of 'wait()' call on the returned object.
@@ -1335,6 +1338,52 @@ def repl(m):
 
         return re.sub(r"\{(.+?)\}", repl, dest)
 
+    def write_chunks(self, dest, chunks):
+        """
+        Write chunks of bytes to a file, or to stdout if *dest* is ``'-'``.
+
+        The file is written under a temporary name and renamed once every
+        chunk is written, so an interrupted download never leaves a truncated
+        file. Nothing is written if there is no data.
+
+        :param dest: path of the file
+        :type dest: str
+        :param chunks: data to write
+        :type chunks: iter[bytes]
+        :returns: number of bytes written
+        :rtype: int
+        :raises: :class:`OSError` if the file can't be written
+        """
+        written = 0
+        if dest == "-":
+            for chunk in chunks:
+                if chunk:
+                    self.stdout.buffer.write(chunk)
+                    written += len(chunk)
+            self.stdout.flush()
+            return written
+
+        part = dest + ".part"
+        fp = None
+        try:
+            for chunk in chunks:
+                if not chunk:
+                    continue
+                if fp is None:
+                    fp = open(part, "wb")
+                fp.write(chunk)
+                written += len(chunk)
+        except BaseException:
+            if fp is not None:
+                fp.close()
+                os.remove(part)
+            raise
+
+        if fp is not None:
+            fp.close()
+            os.replace(part, dest)
+        return written
+
     # for cd & ls
     def complete_path(self, text, line, begidx, endidx):
         directories = set()
@@ -40,6 +40,7 @@
 
 if TYPE_CHECKING:
     from woob.browser import Browser
+    from woob.browser.cache import CacheStore
     from woob.core import WoobBase
 
 
@@ -451,6 +452,15 @@ def create_browser(self, *args, **kwargs) -> Browser | None:
             else:
                 kwargs.setdefault("verify", value.get())
 
+        for key in ("max_workers", "pool_maxsize", "prefetch_depth"):
+            if "_%s" % key in self._private_config:
+                try:
+                    kwargs.setdefault(key, int(self._private_config["_%s" % key]))
+                except ValueError as e:
+                    raise Module.ConfigError(
+                        f"Backend({self.name}): Configuration error: _{key} must be an integer"
+                    ) from e
+
         kwargs["logger"] = self.logger
 
         if self.logger.settings["responses_dirname"]:
@@ -474,6 +484,18 @@ def create_browser(self, *args, **kwargs) -> Browser | None:
 
             kwargs.setdefault("highlight_el", value.get())
 
+        from woob.browser.browsers import Browser  # here to avoid circular dependency
+        from woob.browser.cache import CacheMixin
+
+        if "_http_cache" in self._private_config and issubclass(klass, CacheMixin):
+            kwargs.setdefault("cache_store", self.create_cache_store())
+            # the store may be shared with other backends
+            kwargs.setdefault("cache_namespace", self.name)
+
+        if issubclass(klass, Browser):
+            # the browser class may be defined by another module
+            kwargs.setdefault("module_name", self.NAME)
+
         browser = klass(*args, **kwargs)
 
         if should_load_state and hasattr(browser, "load_state"):
@@ -481,6 +503,33 @@ def create_browser(self, *args, **kwargs) -> Browser | None:
 
         return browser
 
+    def create_cache_store(self) -> CacheStore:
+        """
+        Build the HTTP cache store of browsers inheriting
+        :class:`woob.browser.cache.CacheMixin`.
+
+        It is configured by these keys in backend config:
+
+        * ``_http_cache``: kind of store, see :func:`woob.browser.cache.open_cache_store`
+        * ``_http_cache_size``: maximum size of the store, in bytes
+        * ``_http_cache_ttl``: time to live of entries, in seconds
+
+        Several backends can use the same persistent store, as their browsers
+        prefix the keys of the cache with the backend name.
+        """
+        from woob.browser.cache import open_cache_store  # here to avoid circular dependency
+
+        max_size = self._private_config.get("_http_cache_size")
+        ttl = self._private_config.get("_http_cache_ttl")
+        try:
+            return open_cache_store(
+                self._private_config["_http_cache"],
+                max_size=int(max_size) if max_size else None,
+                ttl=float(ttl) if ttl else None,
+            )
+        except ValueError as e:
+            raise Module.ConfigError(f"Backend({self.name}): Configuration error: {e}") from e
+
     def get_proxy(self) -> dict[str, str]:
         """
         Get proxy to use.
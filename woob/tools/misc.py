@@ -25,6 +25,7 @@
 import traceback
 import types
 import unicodedata
+import warnings
 from time import sleep, time
 
 import unidecode
@@ -172,8 +173,9 @@ def ratelimit(group, delay):
     This function is intended to be called just before the code that should be
     rate-limited.
 
-    This function is not thread-safe. For reasonably non-critical rate
-    limiting (like accessing a website), it should be sufficient nevertheless.
+    .. deprecated:: 3.8
+       Use the :attr:`woob.browser.browsers.Browser.RATE_LIMIT` attribute, or
+       a :class:`woob.browser.limits.TokenBucket`, instead.
 
     @param group [string]  rate limiting group name, alphanumeric
     @param delay [int]  delay in seconds between each call
@@ -181,21 +183,23 @@ def ratelimit(group, delay):
 
     from tempfile import gettempdir
 
-    path = os.path.join(gettempdir(), "woob_ratelimit.%s" % group)
-    while True:
-        try:
-            offset = time() - os.stat(path).st_mtime
-        except OSError:
-            with open(path, "w"):
-                pass
-            offset = 0
+    from woob.browser.limits import SQLiteBucketBackend, TokenBucket
 
-        if delay < offset:
-            break
+    warnings.warn(
+        "ratelimit() is deprecated, use Browser.RATE_LIMIT or woob.browser.limits.TokenBucket instead",
+        DeprecationWarning,
+        stacklevel=2,
+    )
 
-        sleep(delay - offset)
+    if delay <= 0:
+        # no limit
+        return
 
-    os.utime(path, None)
+    backend = SQLiteBucketBackend(os.path.join(gettempdir(), "woob_ratelimit.sqlite"))
+    try:
+        TokenBucket(1.0 / delay, key=group, backend=backend).acquire()
+    finally:
+        backend.close()
 
 
 def find_exe(basename):
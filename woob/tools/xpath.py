@@ -0,0 +1,187 @@
+# Copyright(C) 2010-2024 Romain Bignon
+#
+# This file is part of woob.
+#
+# woob is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# woob is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public License
+# along with woob. If not, see <http://www.gnu.org/licenses/>.
+
+from __future__ import annotations
+
+from functools import lru_cache
+from typing import Any
+
+from lxml import etree
+from lxml.html import HtmlMixin
+
+
+__all__ = ["compile_xpath", "xpath", "css_to_xpath", "cssselect", "xpath_cache_info", "clear_xpath_cache"]
+
+
+@lru_cache(maxsize=4096)
+def _compile_xpath(
+    expression: str,
+    namespaces: tuple[tuple[str, str], ...] | None,
+    extensions: tuple[frozenset, ...] | None = None,
+    smart_strings: bool = True,
+) -> etree.XPath:
+    return etree.XPath(
+        expression,
+        namespaces=dict(namespaces) if namespaces else None,
+        extensions=[dict(ext) for ext in extensions] if extensions else None,
+        smart_strings=smart_strings,
+    )
+
+
+def compile_xpath(
+    expression: str,
+    namespaces: dict[str, str] | None = None,
+    extensions: dict | list[dict] | None = None,
+    smart_strings: bool = True,
+) -> etree.XPath:
+    """
+    Get a compiled XPath expression, from a cache shared by the whole process.
+
+    Functions registered in the global lxml function namespace, like the
+    ones defined by :meth:`woob.browser.pages.HTMLPage.define_xpath_functions`,
+    are resolved when the expression is evaluated, so they can be used in
+    cached expressions.
+
+    :param expression: XPath expression
+    :type expression: str
+    :param namespaces: prefixes of namespaces used in the expression
+    :type namespaces: dict
+    :param extensions: extension functions, as mappings of
+                       ``(namespace, name)`` to functions, see
+                       :class:`lxml.etree.XPath`
+    :type extensions: dict or list[dict]
+    :param smart_strings: if False, strings returned by the expression are
+                          not linked to their element
+    :type smart_strings: bool
+    :raises: :class:`lxml.etree.XPathSyntaxError` if the expression is invalid
+    """
+    if isinstance(extensions, dict):
+        extensions = [extensions]
+
+    return _compile_xpath(
+        expression,
+        tuple(sorted(namespaces.items())) if namespaces else None,
+        tuple(frozenset(ext.items()) for ext in extensions) if extensions else None,
+        smart_strings,
+    )
+
+
+def xpath(
+    item: Any,
+    expression: str,
+    namespaces: dict[str, str] | None = None,
+    extensions: dict | list[dict] | None = None,
+    smart_strings: bool = True,
+    **variables,
+) -> Any:
+    """
+    Evaluate an XPath expression on an element, like ``item.xpath()`` does,
+    but without compiling the expression again on every call.
+
+    :param item: element or document
+    :param expression: XPath expression
+    :type expression: str
+    :param namespaces: prefixes of namespaces used in the expression
+    :type namespaces: dict
+    :param extensions: extension functions, see :func:`compile_xpath`
+    :type extensions: dict or list[dict]
+    :param smart_strings: if False, strings returned by the expression are
+                          not linked to their element
+    :type smart_strings: bool
+    :param variables: values of XPath variables used in the expression
+    """
+    if isinstance(item, (etree._Element, etree._ElementTree)):
+        try:
+            compiled = compile_xpath(expression, namespaces, extensions, smart_strings)
+        except etree.XPathSyntaxError:
+            # let lxml raise the same error than without cache
+            pass
+        else:
+            return compiled(item, **variables)
+
+    if namespaces:
+        variables["namespaces"] = namespaces
+    if extensions:
+        variables["extensions"] = extensions
+    if not smart_strings:
+        variables["smart_strings"] = smart_strings
+    return item.xpath(expression, **variables)
+
+
+@lru_cache(maxsize=1024)
+def css_to_xpath(selector: str, translator: str = "html") -> str:
+    """
+    Translate a CSS selector to an XPath expression, with a cache.
+
+    :param selector: CSS selector
+    :type selector: str
+    :param translator: "html", "xhtml" or "xml", see :class:`lxml.cssselect.CSSSelector`
+    :type translator: str
+    """
+    # here to keep cssselect an optional dependency
+    from lxml.cssselect import LxmlHTMLTranslator, LxmlTranslator
+
+    if translator == "xml":
+        return LxmlTranslator().css_to_xpath(selector)
+    return LxmlHTMLTranslator(xhtml=translator == "xhtml").css_to_xpath(selector)
+
+
+def cssselect(item: Any, selector: str, translator: str | None = None) -> Any:
+    """
+    Select elements with a CSS selector, like ``item.cssselect()`` does, but
+    without translating and compiling the selector again on every call.
+
+    :param item: element or document
+    :param selector: CSS selector
+    :type selector: str
+    :param translator: "html", "xhtml" or "xml"; by default, "html" for
+                       HTML elements and "xml" for others, like lxml does
+    :type translator: str
+    """
+    if isinstance(item, etree._ElementTree):
+        root = item.getroot()
+    elif isinstance(item, etree._Element):
+        root = item
+    else:
+        return item.cssselect(selector)
+
+    if translator is None:
+        translator = "html" if isinstance(root, HtmlMixin) else "xml"
+
+    return compile_xpath(css_to_xpath(selector, translator))(item)
+
+
+def xpath_cache_info():
+    """
+    Get statistics of the compiled expressions cache, to know its hit rate.
+
+    Expressions translated from CSS selectors by :func:`cssselect` are also
+    in this cache.
+
+    :returns: hits, misses, maximum size and current size of the cache
+    :rtype: :func:`functools.lru_cache` ``CacheInfo``
+    """
+    return _compile_xpath.cache_info()
+
+
+def clear_xpath_cache():
+    """
+    Remove every compiled expression and translated CSS selector from the
+    caches, and reset statistics.
+    """
+    _compile_xpath.cache_clear()
+    css_to_xpath.cache_clear()